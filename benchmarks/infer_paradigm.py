@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#
+# Measures paradigm inference from observed forms (Guesser.infer_paradigm())
+# for unknown words: the time per word and how often the correct paradigm
+# is ranked first.  Known and unknown words are generated with random
+# stems.
+#
+#   python3 benchmarks/infer_paradigm.py [--known N] [--unknown N]
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import time
+import random
+import argparse
+from wiktfinnish.inflect import inflect
+from wiktfinnish.stem import encode_paradigm
+from wiktfinnish.guess import Guesser
+
+# Declensions of the words in the benchmark.  Stems are generated
+# randomly for each word.
+TEMPLATES = [
+    {"template_name": "fi-decl-valo", "2": "", "3": "", "4": "o", "5": "a"},
+    {"template_name": "fi-decl-valo", "2": "kk", "3": "k", "4": "u",
+     "5": "a"},
+    {"template_name": "fi-decl-koira", "4": "a"},
+    {"template_name": "fi-decl-risti", "4": "ä"},
+    {"template_name": "fi-decl-nainen", "2": "a"},
+    {"template_name": "fi-conj-sanoa", "2": "", "3": "", "4": "no",
+     "5": "a"},
+]
+
+# Observed forms of nouns and verbs.
+NOUN_FORMS = [("", "", "", "", ""), ("", "", "gen-sg", "", ""),
+              ("", "", "ptv-pl", "", "")]
+VERB_FORMS = [("inf1", "", "", "", ""), ("pres-1sg", "", "", "", ""),
+              ("past-3sg", "", "", "", "")]
+
+
+def make_lexemes(n, rnd):
+    """Returns ``n`` lexemes with random stems."""
+    lexemes = []
+    for i in range(n):
+        args = dict(rnd.choice(TEMPLATES))
+        args["1"] = "".join(rnd.choice("ptkslmnrhv") + rnd.choice("aeiou")
+                            for _ in range(2)) + rnd.choice("lnrst")
+        lexemes.append({"id": i + 1, "args": args})
+    return lexemes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure paradigm inference from observed forms.")
+    parser.add_argument("--known", type=int, default=500,
+                        help="number of known words in the guesser")
+    parser.add_argument("--unknown", type=int, default=2000,
+                        help="number of unknown words to infer")
+    opts = parser.parse_args()
+    rnd = random.Random(0)
+
+    start = time.perf_counter()
+    guesser = Guesser(make_lexemes(opts.known, rnd), no_clitic=True)
+    print("index: {} classes, {} endings in {:.2f}s".format(
+        len(guesser), len(guesser.endings), time.perf_counter() - start))
+
+    words = []
+    for lexeme in make_lexemes(opts.unknown, rnd):
+        args = lexeme["args"]
+        if args["template_name"].startswith("fi-conj"):
+            forms = VERB_FORMS
+        else:
+            forms = NOUN_FORMS
+        observed = [(form, inflect(args, form)[0]) for form in forms]
+        words.append((encode_paradigm(args), observed))
+
+    for verify in (True, False):
+        correct = 0
+        start = time.perf_counter()
+        for expected, observed in words:
+            inferred = guesser.infer_paradigm(observed, verify=verify)
+            if inferred and inferred[0] == expected:
+                correct += 1
+        us = (time.perf_counter() - start) / len(words) * 1e6
+        print("verify={}: {:.1f} us/word, correct first: {:.1%}".format(
+            verify, us, correct / len(words)))
+
+
+if __name__ == "__main__":
+    main()
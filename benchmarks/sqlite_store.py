@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#
+# Measures bulk loading into the SQLite form store (rows per second) and
+# the latency of point queries (lookup by lemma and form, reverse lookup
+# by surface form, and cached inflect()).
+#
+#   python3 benchmarks/sqlite_store.py [--words N] [--queries N] [--db PATH]
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import time
+import random
+import argparse
+import tempfile
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.sqlitestore import FormStore, CachedInflector
+
+# Declensions of the words in the benchmark.  Stems are generated
+# randomly for each word.
+TEMPLATES = [
+    {"template_name": "fi-decl-valo", "2": "", "3": "", "4": "o", "5": "a"},
+    {"template_name": "fi-decl-koira", "4": "a"},
+    {"template_name": "fi-decl-risti", "4": "ä"},
+    {"template_name": "fi-decl-nainen", "2": "a"},
+    {"template_name": "fi-conj-sanoa", "2": "", "3": "", "4": "no",
+     "5": "a"},
+]
+
+
+def make_lexemes(n, rnd):
+    """Returns ``n`` lexemes with random stems."""
+    lexemes = []
+    for i in range(n):
+        args = dict(rnd.choice(TEMPLATES))
+        args["1"] = "".join(rnd.choice("ptkslmnrhv") + rnd.choice("aeiou")
+                            for _ in range(2)) + rnd.choice("lnrst")
+        lexemes.append({"id": i + 1, "args": args})
+    return lexemes
+
+
+def timed(fn, n):
+    """Calls ``fn(i)`` for i in range(n) and returns the mean latency in
+    microseconds."""
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure SQLite form store load and query speed.")
+    parser.add_argument("--words", type=int, default=200,
+                        help="number of lexemes to load")
+    parser.add_argument("--queries", type=int, default=10000,
+                        help="number of point queries of each kind")
+    parser.add_argument("--db", default=None,
+                        help="database file (default: temporary file)")
+    opts = parser.parse_args()
+    rnd = random.Random(0)
+    lexemes = make_lexemes(opts.words, rnd)
+
+    tmpdir = None
+    path = opts.db
+    if path is None:
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "forms.db")
+    with FormStore(path, no_clitic=True) as store:
+        start = time.perf_counter()
+        rows = store.add_lexicon(lexemes)
+        elapsed = time.perf_counter() - start
+        print("bulk load: {} rows in {:.2f}s, {:.0f} rows/s (including "
+              "generation)".format(rows, elapsed, rows / elapsed))
+
+        # Sample queries from the generated forms
+        samples = []
+        for lexeme in rnd.sample(lexemes, min(len(lexemes), 20)):
+            for form, results in inflect_paradigm(lexeme["args"],
+                                                  no_clitic=True):
+                samples.append((lexeme["id"], form, results[0]))
+        queries = [rnd.choice(samples) for _ in range(opts.queries)]
+
+        us = timed(lambda i: store.lookup(queries[i][0], queries[i][1]),
+                   len(queries))
+        print("lookup(lemma_id, form): {:.1f} us".format(us))
+        us = timed(lambda i: store.analyze(queries[i][2]), len(queries))
+        print("analyze(surface):       {:.1f} us".format(us))
+        cache = CachedInflector(store)
+        args = {x["id"]: x["args"] for x in lexemes}
+        us = timed(lambda i: cache.inflect(args[queries[i][0]],
+                                           queries[i][1]), len(queries))
+        print("cached inflect (cold):  {:.1f} us".format(us))
+        us = timed(lambda i: cache.inflect(args[queries[i][0]],
+                                           queries[i][1]), len(queries))
+        print("cached inflect (warm):  {:.1f} us".format(us))
+    if tmpdir is not None:
+        for name in os.listdir(tmpdir):
+            os.unlink(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+#
+# Measures how generating paradigms scales with the number of threads.
+# On standard CPython builds the global interpreter lock prevents any
+# speedup; on free-threaded builds (python3.13t and later) the speedup
+# should approach the number of cores.
+#
+#   python3 benchmarks/thread_scaling.py [--threads 1,2,4,8] [--words N]
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+import time
+import argparse
+import concurrent.futures
+from wiktfinnish.inflect import inflect_paradigm
+
+# Words used in the benchmark (nouns and adjectives of various
+# declensions).  Each thread inflects full paradigms of these in turn.
+WORDS = [
+    {"template_name": "fi-decl-valo", "1": "tal", "2": "", "3": "",
+     "4": "o", "5": "a"},
+    {"template_name": "fi-decl-valo", "1": "ha", "2": "kk", "3": "k",
+     "4": "u", "5": "a"},
+    {"template_name": "fi-decl-koira", "1": "koir", "4": "a"},
+    {"template_name": "fi-decl-kala", "1": "kal", "4": "a"},
+    {"template_name": "fi-decl-risti", "1": "rist", "4": "ä"},
+    {"template_name": "fi-decl-nainen", "1": "nai", "2": "a"},
+    {"template_name": "fi-decl-kuollut", "1": "kuoll", "2": "a"},
+    {"template_name": "fi-decl-vanhempi", "1": "vanhe", "2": "a"},
+]
+
+
+def work(i):
+    """Generates the paradigm of the i-th word, returning the number of
+    forms."""
+    args = WORDS[i % len(WORDS)]
+    return len(inflect_paradigm(args, "noun"))
+
+
+def run(threads, words):
+    """Inflects ``words`` paradigms using ``threads`` threads.  Returns the
+    elapsed time in seconds."""
+    start = time.time()
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        for _ in executor.map(work, range(words)):
+            pass
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure paradigm generation speed with threads.")
+    parser.add_argument("--threads", default="1,2,4,8",
+                        help="comma-separated numbers of threads")
+    parser.add_argument("--words", type=int, default=64,
+                        help="number of paradigms to generate per run")
+    opts = parser.parse_args()
+    counts = [int(x) for x in opts.threads.split(",")]
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("Python {} (GIL {})".format(sys.version.split()[0],
+                                      "enabled" if gil else "disabled"))
+    # Warm up the caches so that all runs measure the same work
+    run(1, len(WORDS))
+    base = None
+    for threads in counts:
+        elapsed = run(threads, opts.words)
+        if base is None:
+            base = elapsed
+        print("{:3d} threads: {:7.2f}s  {:6.1f} paradigms/s  "
+              "speedup {:.2f}".format(threads, elapsed,
+                                      opts.words / elapsed, base / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,9 @@ setup(name="wiktfinnish",
       license="MIT",
       download_url="https://github.com/tatuylonen/wiktfinnish",
       packages=["wiktfinnish"],
+      entry_points={
+          "console_scripts": ["wiktfinnish=wiktfinnish.cli:main"],
+      },
       # install_requires=[],
       classifiers=[
           "Development Status :: 3 - Alpha",
@@ -5,15 +5,22 @@
 from wiktfinnish.formnames import COMPARATIVE_FORMS, CASE_FORMS
 from wiktfinnish.formnames import POSSESSIVE_FORMS, VERB_FORMS, CLITIC_FORMS
 from wiktfinnish.formnames import all_forms_list, all_forms_iter
-from wiktfinnish.inflect import inflect
+from wiktfinnish.formnames import form_to_str, str_to_form
+from wiktfinnish.inflect import inflect, inflect_paradigm, iter_inflect
 from wiktfinnish.inflect import add_clitic
 from wiktfinnish.inflect import last_char_to_vowel, last_char_to_aou
 from wiktfinnish.inflect import word_to_aae
 from wiktfinnish.stem import encode_paradigm, decode_paradigm, valid_unknown_stem, is_exceptional, is_compound_declension, is_guessable, paradigm_nargs, get_blocked_paradigms
+from wiktfinnish.batch import inflect_many
+from wiktfinnish.fingerprint import spec_hash, spec_hashes, spec_fingerprint
+from wiktfinnish.fingerprint import changed_declensions, check_fingerprint
 
 
 __all__ = (
     "inflect",
+    "iter_inflect",
+    "inflect_paradigm",
+    "inflect_many",
     "add_clitic",
     "COMPARATIVE_FORMS",
     "CASE_FORMS",
@@ -22,6 +29,8 @@ __all__ = (
     "CLITIC_FORMS",
     "all_forms_list",
     "all_forms_iter",
+    "form_to_str",
+    "str_to_form",
     "last_char_to_vowel",
     "last_char_to_aou",
     "word_to_aae",
@@ -33,4 +42,9 @@ __all__ = (
     "is_guessable",
     "paradigm_nargs",
     "get_blocked_paradigms",
+    "spec_hash",
+    "spec_hashes",
+    "spec_fingerprint",
+    "changed_declensions",
+    "check_fingerprint",
 )
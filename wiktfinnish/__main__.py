@@ -0,0 +1,8 @@
+# Running the command-line interface with "python3 -m wiktfinnish".
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+from wiktfinnish.cli import main
+
+sys.exit(main())
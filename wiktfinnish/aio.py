@@ -0,0 +1,131 @@
+# asyncio interface for generating word forms.  Inflecting full paradigms
+# takes long enough to stall an event loop, so the work is offloaded to a
+# process pool managed by AsyncInflector.  Results are memoised: lookups
+# that hit the memo are answered inline without leaving the event loop,
+# and concurrent identical requests share a single computation.
+#
+#   inflector = AsyncInflector()
+#   results = await inflector.inflect(args, form)
+#   forms = await inflector.inflect_paradigm(args)
+#   await inflector.close()
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import asyncio
+import functools
+import concurrent.futures
+from wiktfinnish.inflect import inflect, inflect_paradigm, paradigm_pos
+from wiktfinnish.batch import inflect_group
+from wiktfinnish.memo import ParadigmMemo, FormMemo, DEFAULT_MAX_FORMS
+
+
+class AsyncInflector(object):
+    """Provides coroutines for inflect(), inflect_paradigm() and
+    inflect_many().  The work is done in ``executor`` if given, and
+    otherwise in a process pool with ``max_workers`` processes that is
+    created when first needed and shut down by close().  Results returned
+    by the coroutines are shared with the memo and must not be
+    modified."""
+
+    def __init__(self, max_workers=None, executor=None,
+                 max_forms=DEFAULT_MAX_FORMS):
+        self.max_workers = max_workers
+        self.executor = executor
+        self.own_executor = executor is None
+        self.memo = ParadigmMemo(max_forms)
+        self.form_memo = FormMemo(max_forms)
+        self.inflight = {}
+
+    def get_executor(self):
+        """Returns the executor, creating the process pool if needed."""
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers)
+        return self.executor
+
+    async def close(self):
+        """Shuts down the process pool (if created by this object)."""
+        executor = self.executor
+        if executor is None or not self.own_executor:
+            return
+        self.executor = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.close()
+
+    def single_flight(self, memo, key, func):
+        """Returns an awaitable for the result of calling ``func`` in the
+        executor.  If an identical request is already in progress, its
+        result is shared.  The result is saved in ``memo`` under ``key``
+        when done."""
+        fut = self.inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(self.get_executor(), func)
+
+            def done(f):
+                del self.inflight[key]
+                if not f.cancelled() and f.exception() is None:
+                    memo.put(key, f.result())
+
+            self.inflight[key] = fut
+            fut.add_done_callback(done)
+        # Cancelling one waiter must not cancel the shared computation
+        return asyncio.shield(fut)
+
+    async def inflect(self, args, form):
+        """Like inflect(), but runs in the executor unless the result is
+        memoised."""
+        form = tuple(form)
+        key = self.form_memo.key(args, form)
+        results = self.form_memo.get(key)
+        if results is not None:
+            return results
+        return await self.single_flight(
+            self.form_memo, key, functools.partial(inflect, args, form))
+
+    async def inflect_paradigm(self, args, pos=None, **kwargs):
+        """Like inflect_paradigm(), but runs in the executor unless the
+        paradigm is memoised."""
+        pos = paradigm_pos(args, pos)
+        key = self.memo.key(args, pos, kwargs)
+        forms = self.memo.get(key)
+        if forms is not None:
+            return forms
+        return await self.single_flight(
+            self.memo, key,
+            functools.partial(inflect_paradigm, args, pos, **kwargs))
+
+    async def inflect_many(self, requests):
+        """Like inflect_many(), but runs in the executor.  Memoised results
+        are used directly; the other requests are grouped by
+        declension/conjugation and the groups are inflected in
+        parallel."""
+        requests = [(args, tuple(form)) for args, form in requests]
+        results = [None] * len(requests)
+        groups = {}
+        for idx, (args, form) in enumerate(requests):
+            key = self.form_memo.key(args, form)
+            ret = self.form_memo.get(key)
+            if ret is not None:
+                results[idx] = ret
+                continue
+            groups.setdefault(args["template_name"], []).append(
+                (idx, args, form))
+        if groups:
+            loop = asyncio.get_running_loop()
+            executor = self.get_executor()
+            done = await asyncio.gather(*[
+                loop.run_in_executor(executor, inflect_group, items)
+                for items in groups.values()])
+            for group in done:
+                for idx, ret in group:
+                    results[idx] = ret
+                    args, form = requests[idx]
+                    self.form_memo.put(self.form_memo.key(args, form), ret)
+        return results
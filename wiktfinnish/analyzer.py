@@ -0,0 +1,114 @@
+# Morphological analysis by looking up generated paradigms.  An
+# Analyzer is built by generating all forms of the lexemes in a lexicon
+# (it is a sink for sink.generate_paradigm()), and maps each surface form
+# to the (lemma, paradigm code, form) analyses that produce it.  Lexemes
+# can be added at any time.
+#
+# The index is kept in arrays rather than as lists of tuples: each
+# generated word is an entry with the index of its lemma, its form id (see
+# formnames.form_id()) and the index of the previous entry with the same
+# surface form, and a dictionary maps each surface form to its last entry.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import array
+import threading
+from wiktfinnish import formnames
+from wiktfinnish.stem import encode_paradigm
+from wiktfinnish.sink import generate_paradigm
+
+
+def lexeme_paradigm_code(args):
+    """Returns the paradigm code of the word ``args`` as returned by
+    stem.encode_paradigm(), or the template name for exception templates
+    that cannot be encoded."""
+    stem, code = encode_paradigm(args)
+    if code is None:
+        return args["template_name"]
+    return code
+
+
+class Analyzer(object):
+    """Maps surface forms to their analyses in a lexicon.  The keyword
+    arguments are as for inflect_paradigm() and restrict the forms that
+    are generated for the lexemes (e.g., no_clitic=True)."""
+
+    def __init__(self, **kwargs):
+        self.options = kwargs
+        self.lemmas = []
+        self.codes = []
+        self.code_index = {}
+        self.lemma_codes = array.array("I")
+        self.heads = {}
+        self.entry_lemmas = array.array("I")
+        self.entry_forms = array.array("I")
+        self.entry_prev = array.array("l")
+        self.forms = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of distinct surface forms."""
+        return len(self.heads)
+
+    def __contains__(self, word):
+        return word in self.heads
+
+    def num_entries(self):
+        """Returns the number of (surface form, analysis) entries."""
+        return len(self.entry_lemmas)
+
+    def add(self, lemma_id, args, pos=None, forms=None):
+        """Adds all forms of the word ``args`` with the identifier
+        ``lemma_id`` (e.g., the lemma or a lexeme id).  ``pos`` and
+        ``forms`` are as for inflect_paradigm().  Returns the number of
+        entries added."""
+        code = lexeme_paradigm_code(args)
+        with self.lock:
+            idx = len(self.lemmas)
+            self.lemmas.append(lemma_id)
+            ci = self.code_index.get(code)
+            if ci is None:
+                ci = len(self.codes)
+                self.codes.append(code)
+                self.code_index[code] = ci
+            self.lemma_codes.append(ci)
+            return generate_paradigm(self, idx, args, pos, forms=forms,
+                                     **self.options)
+
+    def add_lexicon(self, lexemes):
+        """Adds the lexemes in ``lexemes`` (dictionaries with "id", "args"
+        and optionally "pos").  Returns the number of entries added."""
+        count = 0
+        for lexeme in lexemes:
+            count += self.add(lexeme["id"], lexeme["args"], lexeme.get("pos"))
+        return count
+
+    def write(self, idx, fid, surface):
+        # Called by generate_paradigm() while holding self.lock
+        entry = len(self.entry_lemmas)
+        self.entry_lemmas.append(idx)
+        self.entry_forms.append(fid)
+        self.entry_prev.append(self.heads.get(surface, -1))
+        self.heads[surface] = entry
+
+    def analyze(self, word):
+        """Returns a list of (lemma_id, paradigm_code, form) tuples for
+        the analyses of the surface form ``word``, in the order in which
+        they were added.  ``form`` is a 5-tuple.  Returns an empty list
+        if the word is not in the lexicon."""
+        entry = self.heads.get(word)
+        if entry is None:
+            return []
+        ret = []
+        while entry >= 0:
+            idx = self.entry_lemmas[entry]
+            fid = self.entry_forms[entry]
+            form = self.forms.get(fid)
+            if form is None:
+                form = formnames.form_from_id(fid)
+                self.forms[fid] = form
+            ret.append((self.lemmas[idx], self.codes[self.lemma_codes[idx]],
+                        form))
+            entry = self.entry_prev[entry]
+        ret.reverse()
+        return ret
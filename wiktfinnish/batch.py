@@ -0,0 +1,70 @@
+# Inflecting batches of (args, form) requests of mixed
+# declensions/conjugations.  Requests are grouped by declension, each
+# distinct word is set up only once, and forms that are equivalent for the
+# declension are generated only once per word.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+from wiktfinnish.inflect import inflect
+
+
+def lexeme_key(args):
+    """Returns a hashable key identifying the word whose
+    declension/conjugation arguments are ``args``."""
+    return tuple(sorted((str(k), v) for k, v in args.items()))
+
+
+def inflect_group(items):
+    """Inflects a group of requests, normally all for the same
+    declension/conjugation.  ``items`` is a list of (index, args, form)
+    tuples.  Returns a list of (index, results) tuples.  This is the unit
+    of work sent to an executor by inflect_many()."""
+    # Imported here so that the package does not import equivalence.py,
+    # which is also run as a script (python3 -m wiktfinnish.equivalence)
+    from wiktfinnish.equivalence import lexeme_form_aliases, canonical_form
+
+    lexemes = {}
+    ret = []
+    for idx, args, form in items:
+        form = tuple(form)
+        key = lexeme_key(args)
+        lexeme = lexemes.get(key)
+        if lexeme is None:
+            lexeme = (lexeme_form_aliases(args), {})
+            lexemes[key] = lexeme
+        aliases, done = lexeme
+        canonical = canonical_form(form, aliases)
+        results = done.get(canonical)
+        if results is None:
+            results = inflect(args, canonical)
+            done[canonical] = results
+        ret.append((idx, list(results)))
+    return ret
+
+
+def inflect_many(requests, executor=None):
+    """Inflects a batch of requests.  ``requests`` is a sequence of (args,
+    form) tuples, with arguments as for inflect().  The requests are
+    grouped by declension/conjugation, and each group is inflected with
+    inflect_group().  If ``executor`` is given (e.g., a
+    concurrent.futures.ProcessPoolExecutor), the groups are submitted to
+    it and processed in parallel.  Returns a list of results (each as
+    returned by inflect()) in the same order as the requests."""
+    groups = {}
+    count = 0
+    for idx, (args, form) in enumerate(requests):
+        groups.setdefault(args["template_name"], []).append((idx, args, form))
+        count += 1
+
+    results = [None] * count
+    if executor is None:
+        for items in groups.values():
+            for idx, ret in inflect_group(items):
+                results[idx] = ret
+    else:
+        futures = [executor.submit(inflect_group, items)
+                   for items in groups.values()]
+        for future in futures:
+            for idx, ret in future.result():
+                results[idx] = ret
+    return results
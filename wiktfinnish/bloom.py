@@ -0,0 +1,249 @@
+# Bloom filter of surface forms, for rejecting words that are not forms
+# of a lexicon before consulting an analyser or a form store.  A filter
+# never rejects a word that was added to it, and accepts other words with
+# a probability close to the false-positive rate it was sized for.  The
+# filter takes about 1.2 bytes per word at a 1% false-positive rate and
+# 1.8 bytes per word at 0.1%, much less than a set or an index of the
+# words.
+#
+# The positions of the bits of a word are computed by double hashing from
+# the BLAKE2b hash of its UTF-8 encoding, so filters saved to disk can be
+# used by other processes (Python's own string hash is randomised per
+# process).
+#
+# The file is little-endian and consists of a header (see HEADER)
+# followed by the bits.
+#
+# Filters are sized for a given number of words (their capacity) before
+# any words are added, and the generated forms are added to them as they
+# are produced, so building one needs no memory beyond its bits.  The
+# number of words is counted as they are added; a word added twice is
+# counted twice, so the reported false-positive rate is an upper bound
+# unless the added words are distinct.  As a sink, a filter skips the
+# repeated surface forms of one lemma.
+#
+# A filter can be built from a lexicon from the command line:
+#
+#   python3 -m wiktfinnish.bloom --capacity 5000000 --fp-rate 0.001 \
+#       lexicon.jsonl forms.bloom
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+import math
+import hashlib
+import struct
+import argparse
+from wiktfinnish.sink import generate_lexicon
+
+# Magic bytes and version at the start of a filter file.
+MAGIC = b"WFBLOOM1"
+
+# Header: magic, number of bits, number of hash functions, number of
+# words added.
+HEADER = struct.Struct("<8sQIQ")
+
+# Default false-positive rate.
+DEFAULT_FP_RATE = 0.01
+
+
+def optimal_params(capacity, fp_rate):
+    """Returns (num_bits, num_hashes) for a filter of ``capacity`` words
+    with the false-positive rate ``fp_rate``."""
+    if not 0 < fp_rate < 1:
+        raise ValueError("false-positive rate must be between 0 and 1: {!r}"
+                         .format(fp_rate))
+    capacity = max(capacity, 1)
+    num_bits = int(math.ceil(-capacity * math.log(fp_rate) /
+                             (math.log(2) ** 2)))
+    num_bits = max((num_bits + 7) // 8 * 8, 8)
+    num_hashes = max(int(round(num_bits / capacity * math.log(2))), 1)
+    return num_bits, num_hashes
+
+
+def word_hashes(word):
+    """Returns the two 64-bit hashes of ``word`` used for computing its
+    bit positions."""
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=16).digest()
+    return (int.from_bytes(digest[:8], "little"),
+            int.from_bytes(digest[8:], "little") | 1)
+
+
+class BloomFilter(object):
+    """A Bloom filter sized for ``capacity`` words with the false-positive
+    rate ``fp_rate``.  This is also a sink (see sink.py) that adds the
+    generated surface forms."""
+
+    def __init__(self, capacity, fp_rate=DEFAULT_FP_RATE):
+        self.num_bits, self.num_hashes = optimal_params(capacity, fp_rate)
+        self.bits = bytearray(self.num_bits // 8)
+        self.count = 0
+        self.lemma_id = None
+        self.lemma_words = set()
+
+    @classmethod
+    def from_words(cls, words, fp_rate=DEFAULT_FP_RATE, capacity=None):
+        """Returns a filter of the words in the iterable ``words``, sized
+        for ``capacity`` words.  If ``capacity`` is None, ``words`` must
+        be a sequence of distinct words and the filter is sized for its
+        length."""
+        if capacity is None:
+            capacity = len(words)
+        bf = cls(capacity, fp_rate)
+        bf.update(words)
+        return bf
+
+    def positions(self, word):
+        """Returns the bit positions of ``word``."""
+        h1, h2 = word_hashes(word)
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, word):
+        """Adds ``word`` to the filter.  Every call is counted, including
+        calls for words that were already added."""
+        bits = self.bits
+        for pos in self.positions(word):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, words):
+        """Adds the words in the iterable ``words``."""
+        for word in words:
+            self.add(word)
+
+    def write(self, lemma_id, form_id, surface):
+        # Many forms of a lemma share a surface form; only the surface
+        # forms of the current lemma are remembered
+        if lemma_id != self.lemma_id:
+            self.lemma_id = lemma_id
+            self.lemma_words = set()
+        if surface not in self.lemma_words:
+            self.lemma_words.add(surface)
+            self.add(surface)
+
+    def __contains__(self, word):
+        bits = self.bits
+        h1, h2 = word_hashes(word)
+        m = self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % m
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        """Returns the number of words added to the filter (see add())."""
+        return self.count
+
+    def filter(self, words):
+        """Iterates over the words in ``words`` that may be in the
+        filter."""
+        for word in words:
+            if word in self:
+                yield word
+
+    def memory_size(self):
+        """Returns the size of the bits of the filter in bytes."""
+        return len(self.bits)
+
+    def fp_rate(self):
+        """Returns the expected false-positive rate of the filter for the
+        number of words added to it."""
+        k = self.num_hashes
+        return (1 - math.exp(-k * self.count / self.num_bits)) ** k
+
+    def stats(self):
+        """Returns a dictionary of statistics about the filter."""
+        return {"words": self.count,
+                "bits": self.num_bits,
+                "hashes": self.num_hashes,
+                "bytes": self.memory_size(),
+                "fp_rate": self.fp_rate()}
+
+    def save(self, path):
+        """Writes the filter into the file ``path``."""
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.num_bits, self.num_hashes,
+                                self.count))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a filter written by save() from the file ``path``."""
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+                raise ValueError("{}: not a Bloom filter".format(path))
+            magic, num_bits, num_hashes, count = HEADER.unpack(header)
+            bits = bytearray(f.read())
+        if len(bits) != num_bits // 8:
+            raise ValueError("{}: truncated Bloom filter".format(path))
+        bf = cls.__new__(cls)
+        bf.num_bits = num_bits
+        bf.num_hashes = num_hashes
+        bf.bits = bits
+        bf.count = count
+        bf.lemma_id = None
+        bf.lemma_words = set()
+        return bf
+
+
+def build_bloom(lexemes, capacity, fp_rate=DEFAULT_FP_RATE, **kwargs):
+    """Generates all forms of the lexemes in ``lexemes`` (dictionaries
+    with "id", "args" and optionally "pos") into a filter sized for
+    ``capacity`` surface forms with the false-positive rate ``fp_rate``
+    and returns the filter.  The keyword arguments are as for
+    inflect_paradigm()."""
+    bf = BloomFilter(capacity, fp_rate)
+    generate_lexicon(bf, lexemes, **kwargs)
+    bf.lemma_words = set()
+    return bf
+
+
+def main(argv=None):
+    """Builds a Bloom filter of the forms of a lexicon from the command
+    line."""
+    # Imported here to avoid a circular import
+    from wiktfinnish.cli import open_input, INPUT_FORMATS
+
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.bloom",
+        description="Build a Bloom filter of the surface forms of a "
+        "lexicon.")
+    parser.add_argument("input", help="input file (- for standard input)")
+    parser.add_argument("output", help="filter file to write")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS,
+                        default="auto", help="input format")
+    parser.add_argument("--capacity", type=int, required=True,
+                        help="number of distinct surface forms the filter "
+                        "is sized for")
+    parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE,
+                        help="false-positive rate (default: {})"
+                        .format(DEFAULT_FP_RATE))
+    parser.add_argument("--no-comp", action="store_true",
+                        help="do not add comparatives")
+    parser.add_argument("--no-poss", action="store_true",
+                        help="do not add possessive suffixes")
+    parser.add_argument("--no-clitic", action="store_true",
+                        help="do not add clitics")
+    opts = parser.parse_args(argv)
+    kwargs = {}
+    for name in ("no_comp", "no_poss", "no_clitic"):
+        if getattr(opts, name):
+            kwargs[name] = True
+    try:
+        bf = build_bloom(open_input(opts.input, opts.input_format),
+                         opts.capacity, opts.fp_rate, **kwargs)
+    except ValueError as e:
+        print("wiktfinnish.bloom: {}".format(e), file=sys.stderr)
+        return 1
+    bf.save(opts.output)
+    print("{} words, {} bytes, {} hashes, false-positive rate {:.4%}".format(
+        len(bf), bf.memory_size(), bf.num_hashes, bf.fp_rate()),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
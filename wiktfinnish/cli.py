@@ -0,0 +1,272 @@
+# Command-line interface for generating inflected forms for a lexicon.
+# This reads lexemes from a file or standard input and writes the
+# generated forms to standard output, so that it can be used in shell
+# pipelines:
+#
+#   python3 -m wiktfinnish --form gen-sg --form ptv-pl lexicon.tsv
+#   wiktfinnish --jobs 8 --no-poss --no-clitic kaikki.jsonl > forms.tsv
+#
+# The input may be in one of the following formats (by default the format
+# is detected from the first line):
+#
+#   jsonl        lexemes as JSON objects with "id", "args" and optionally
+#                "pos" (see incremental.py)
+#   tsv          lines "stem<TAB>paradigm[<TAB>pos[<TAB>id]]", where the
+#                paradigm is encoded as by stem.encode_paradigm()
+#   wiktextract  a wiktextract JSON Lines dump (see ingest.py)
+#
+# The output is either TSV (one line "id<TAB>form<TAB>word" for each
+# generated word) or JSON Lines (one object with "id", "form" and
+# "results" for each form) or factored JSON Lines, where possessive
+# suffixes and clitics are not expanded (see factored.py).  Forms are
+# written as by formnames.form_to_str().
+#
+# If a daemon (see daemon.py) is running, single-job invocations send the
+# lexemes to it instead of generating the forms in this process.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import sys
+import json
+import argparse
+import itertools
+from wiktfinnish import formnames
+from wiktfinnish.stem import decode_paradigm
+from wiktfinnish.ingest import read_lexemes
+from wiktfinnish.expand import expand_lexicon, DEFAULT_CHUNK_COST
+from wiktfinnish.factored import write_factored
+from wiktfinnish import daemon
+
+INPUT_FORMATS = ("auto", "jsonl", "tsv", "wiktextract")
+OUTPUT_FORMATS = ("tsv", "jsonl", "factored")
+
+
+def warn(msg):
+    """Prints a warning about invalid input to standard error."""
+    print("wiktfinnish: {}".format(msg), file=sys.stderr)
+
+
+def detect_format(line):
+    """Returns the input format detected from the first line of input."""
+    line = line.strip()
+    if not line.startswith(b"{"):
+        return "tsv"
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return "wiktextract"
+    if isinstance(data, dict) and "args" in data:
+        return "jsonl"
+    return "wiktextract"
+
+
+def jsonl_lexemes(lines):
+    """Iterates over lexemes in JSON Lines format.  Lexemes without an "id"
+    are identified by their line number."""
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            lexeme = json.loads(line)
+        except ValueError as e:
+            warn("line {}: invalid JSON: {}".format(lineno, e))
+            continue
+        if (not isinstance(lexeme, dict) or
+            not isinstance(lexeme.get("args"), dict) or
+            "template_name" not in lexeme["args"]):
+            warn("line {}: not a lexeme with args".format(lineno))
+            continue
+        if "id" not in lexeme:
+            lexeme["id"] = lineno
+        yield lexeme
+
+
+def tsv_lexemes(lines):
+    """Iterates over lexemes given as lines of tab-separated stem,
+    encoded paradigm, and optionally part-of-speech and identifier.
+    Lexemes without an identifier are identified by their line number."""
+    for lineno, line in enumerate(lines, 1):
+        line = line.decode("utf-8").rstrip("\r\n")
+        if not line:
+            continue
+        parts = line.split("\t")
+        if len(parts) < 2:
+            warn("line {}: expected stem and paradigm".format(lineno))
+            continue
+        pos = parts[2] if len(parts) > 2 else None
+        try:
+            args = decode_paradigm(parts[0], parts[1], pos)
+        except ValueError:
+            # Malformed gradation in the paradigm
+            args = None
+        if args is None:
+            warn("line {}: invalid stem or paradigm".format(lineno))
+            continue
+        lexeme = {"id": parts[3] if len(parts) > 3 else lineno,
+                  "args": args}
+        if pos:
+            lexeme["pos"] = pos
+        yield lexeme
+
+
+def open_input(path, fmt):
+    """Returns an iterator over the lexemes in the file ``path`` (standard
+    input if None or "-") in the input format ``fmt``."""
+    if path in (None, "-"):
+        f = sys.stdin.buffer
+    else:
+        f = open(path, "rb")
+    if fmt == "auto":
+        first = b""
+        for first in f:
+            if first.strip():
+                break
+        fmt = detect_format(first)
+        if fmt == "wiktextract" and f is not sys.stdin.buffer:
+            # Reopen the file so that it can be memory-mapped
+            f.close()
+            return read_lexemes(path)
+        lines = itertools.chain([first], f)
+    elif fmt == "wiktextract" and f is not sys.stdin.buffer:
+        f.close()
+        return read_lexemes(path)
+    else:
+        lines = f
+    if fmt == "jsonl":
+        return jsonl_lexemes(lines)
+    if fmt == "tsv":
+        return tsv_lexemes(lines)
+    return read_lexemes(lines)
+
+
+def parse_forms(values):
+    """Parses the values of --form options into a list of 5-tuples.  Each
+    value may contain several comma-separated forms."""
+    forms = []
+    for value in values:
+        for s in value.split(","):
+            forms.append(formnames.str_to_form(s.strip()))
+    return forms
+
+
+def write_output(out, items, fmt):
+    """Writes the (lexeme_id, form, results) tuples from ``items`` to the
+    text file ``out`` in the output format ``fmt``."""
+    form_strs = {}
+    for lexeme_id, form, results in items:
+        form_str = form_strs.get(form)
+        if form_str is None:
+            form_str = formnames.form_to_str(form)
+            form_strs[form] = form_str
+        if fmt == "jsonl":
+            out.write(json.dumps({"id": lexeme_id, "form": form_str,
+                                  "results": results},
+                                 ensure_ascii=False))
+            out.write("\n")
+        else:
+            prefix = "{}\t{}\t".format(lexeme_id, form_str)
+            out.write("".join(prefix + x + "\n" for x in results))
+
+
+def build_parser():
+    """Returns the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="wiktfinnish",
+        description="Generate inflected forms of Finnish words.")
+    parser.add_argument("input", nargs="?", default=None,
+                        help="input file (default: standard input)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS,
+                        default="auto", help="input format")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS,
+                        default="tsv", help="output format")
+    parser.add_argument("--form", action="append", default=[],
+                        help="generate only the given form, e.g., gen-sg "
+                        "or ine-pl+1s+kin (may be repeated or "
+                        "comma-separated)")
+    parser.add_argument("--no-comp", action="store_true",
+                        help="do not generate comparatives")
+    parser.add_argument("--no-case", action="store_true",
+                        help="do not generate case forms")
+    parser.add_argument("--no-poss", action="store_true",
+                        help="do not generate possessive suffixes")
+    parser.add_argument("--no-clitic", action="store_true",
+                        help="do not generate clitics")
+    parser.add_argument("--intransitive", action="store_true",
+                        help="do not generate agent participles")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--chunk-cost", type=int, default=DEFAULT_CHUNK_COST,
+                        help="estimated number of forms per unit of work")
+    parser.add_argument("--buffer", type=int, default=None,
+                        help="maximum number of units of work in progress "
+                        "(default: four per job)")
+    parser.add_argument("--serve", action="store_true",
+                        help="run a daemon serving other invocations")
+    parser.add_argument("--socket", default=None,
+                        help="daemon socket path")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="do not use a running daemon")
+    return parser
+
+
+def main(argv=None):
+    """Runs the command-line interface.  Returns the exit status."""
+    parser = build_parser()
+    opts = parser.parse_args(argv)
+    try:
+        forms = parse_forms(opts.form) if opts.form else None
+    except ValueError as e:
+        parser.error(str(e))
+    if opts.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if opts.jobs > 1 and opts.output_format == "factored":
+        parser.error("--jobs cannot be used with --output-format factored")
+    if opts.serve:
+        return daemon.main([] if opts.socket is None
+                           else ["--socket", opts.socket])
+
+    kwargs = {}
+    if forms is not None:
+        kwargs["forms"] = forms
+    for name in ("no_comp", "no_case", "no_poss", "no_clitic"):
+        if getattr(opts, name):
+            kwargs[name] = True
+    if opts.intransitive:
+        kwargs["transitive"] = False
+
+    try:
+        lexemes = open_input(opts.input, opts.input_format)
+    except OSError as e:
+        print("wiktfinnish: {}".format(e), file=sys.stderr)
+        return 1
+    client = None
+    items = None
+    # Factored paradigms need only a few inflections per base form, so
+    # they are generated in this process without workers or the daemon
+    if opts.output_format != "factored":
+        if opts.jobs == 1 and not opts.no_daemon:
+            client = daemon.connect(opts.socket)
+        if client is not None:
+            items = client.expand(lexemes, opts.chunk_cost, **kwargs)
+        else:
+            items = expand_lexicon(lexemes, jobs=opts.jobs,
+                                   chunk_cost=opts.chunk_cost,
+                                   max_pending=opts.buffer, **kwargs)
+    try:
+        if items is None:
+            write_factored(sys.stdout, lexemes, **kwargs)
+        else:
+            write_output(sys.stdout, items, opts.output_format)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (e.g., head) exited; silence the error at exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    finally:
+        if items is not None:
+            items.close()
+        if client is not None:
+            client.close()
+    return 0
@@ -0,0 +1,291 @@
+# A local daemon that keeps the specifications, form lists, compiled
+# templates and generated paradigms warm between invocations of short
+# scripts.  The daemon listens on a Unix domain socket; clients send
+# requests as JSON objects, one per line, and receive one JSON object per
+# line in response.  The following requests are supported:
+#
+#   {"op": "ping"}                      -> {"fingerprint": ...}
+#   {"op": "inflect", "args": {...}, "form": [...]}
+#                                       -> {"results": [...]}
+#   {"op": "inflect_many", "requests": [[args, form], ...]}
+#                                       -> {"results": [[...], ...]}
+#   {"op": "expand", "lexemes": [...], "options": {...}}
+#                                       -> {"items": [[id, form, results],
+#                                                     ...]}
+#   {"op": "stats"}                     -> {"memo": {...}}
+#   {"op": "shutdown"}                  -> {}
+#
+# Errors are returned as {"error": message}.  The daemon is started with
+# "wiktfinnish --serve" or "python3 -m wiktfinnish.daemon".
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import sys
+import stat
+import json
+import socket
+import argparse
+import tempfile
+import threading
+import socketserver
+from wiktfinnish import formnames
+from wiktfinnish import fingerprint
+from wiktfinnish.inflect import inflect
+from wiktfinnish.batch import inflect_many
+from wiktfinnish.expand import cost_chunks, DEFAULT_CHUNK_COST
+from wiktfinnish.memo import ParadigmMemo, memo_paradigm, DEFAULT_MAX_FORMS
+
+# Environment variable that overrides the default socket path.
+SOCKET_ENV = "WIKTFINNISH_SOCKET"
+
+# Parts-of-speech whose form lists are generated when the daemon starts.
+WARM_POS = ("noun", "adj", "verb", "name", "num", "pron", "adv")
+
+
+class DaemonError(Exception):
+    """Raised by the client when the daemon returns an error."""
+    pass
+
+
+def default_socket_path():
+    """Returns the default path of the daemon socket.  This is private to
+    the user."""
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    return os.path.join(tempfile.gettempdir(),
+                        "wiktfinnish-{}.sock".format(os.getuid()))
+
+
+def decode_options(options):
+    """Converts options received in a request into keyword arguments for
+    inflect_paradigm()."""
+    options = dict(options)
+    if options.get("forms") is not None:
+        options["forms"] = [tuple(x) for x in options["forms"]]
+    return options
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    """Handles the requests on one client connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            req = {}
+            try:
+                req = json.loads(line.decode("utf-8"))
+                resp = self.server.dispatch(req)
+            except Exception as e:
+                resp = {"error": "{}: {}".format(type(e).__name__, e)}
+            self.wfile.write(json.dumps(resp, ensure_ascii=False)
+                             .encode("utf-8") + b"\n")
+            if req.get("op") == "shutdown" and "error" not in resp:
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """The daemon server.  Each client connection is served in its own
+    thread.  Generated paradigms are memoised in ``self.memo``."""
+    daemon_threads = True
+
+    def __init__(self, path, max_forms=DEFAULT_MAX_FORMS):
+        self.path = path
+        self.memo = ParadigmMemo(max_forms)
+        socketserver.UnixStreamServer.__init__(self, path, DaemonHandler)
+        os.chmod(path, 0o600)
+
+    def server_bind(self):
+        # The socket is created without permissions for other users, so
+        # that they cannot connect before the chmod above
+        umask = os.umask(0o077)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+    def warm_up(self):
+        """Computes the specification fingerprint and form lists so that
+        the first requests are fast."""
+        fingerprint.spec_fingerprint()
+        for pos in WARM_POS:
+            formnames.all_forms_list(pos)
+
+    def dispatch(self, req):
+        """Executes the request ``req`` and returns the response."""
+        op = req.get("op")
+        if op == "ping":
+            return {"fingerprint": fingerprint.spec_fingerprint()}
+        if op == "inflect":
+            return {"results": inflect(req["args"], tuple(req["form"]))}
+        if op == "inflect_many":
+            return {"results": inflect_many([(args, tuple(form)) for
+                                             args, form in req["requests"]])}
+        if op == "expand":
+            options = decode_options(req.get("options", {}))
+            items = []
+            for lexeme in req["lexemes"]:
+                for form, results in memo_paradigm(self.memo, lexeme["args"],
+                                                   lexeme.get("pos"),
+                                                   **options):
+                    items.append((lexeme["id"], form, results))
+            return {"items": items}
+        if op == "stats":
+            return {"memo": self.memo.stats()}
+        if op == "shutdown":
+            return {}
+        raise ValueError("unknown op {!r}".format(op))
+
+
+def remove_stale_socket(path):
+    """Removes the socket ``path`` if no daemon is listening on it.  Raises
+    RuntimeError if a daemon is already running or ``path`` is not a
+    socket."""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise RuntimeError("{} exists and is not a socket".format(path))
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError("daemon already running on {}".format(path))
+    finally:
+        s.close()
+
+
+def serve(path=None, max_forms=DEFAULT_MAX_FORMS):
+    """Runs the daemon on the Unix domain socket ``path`` (see
+    default_socket_path()) until it receives a shutdown request."""
+    if path is None:
+        path = default_socket_path()
+    remove_stale_socket(path)
+    server = Daemon(path, max_forms)
+    try:
+        server.warm_up()
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+class DaemonClient(object):
+    """A connection to a running daemon."""
+
+    def __init__(self, path=None, timeout=None):
+        if path is None:
+            path = default_socket_path()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.f = self.sock.makefile("rwb")
+
+    def close(self):
+        """Closes the connection."""
+        self.f.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def request(self, req):
+        """Sends the request ``req`` and returns the response.  Raises
+        DaemonError if the daemon returns an error."""
+        self.f.write(json.dumps(req, ensure_ascii=False).encode("utf-8"))
+        self.f.write(b"\n")
+        self.f.flush()
+        line = self.f.readline()
+        if not line:
+            raise DaemonError("connection closed by daemon")
+        resp = json.loads(line.decode("utf-8"))
+        if "error" in resp:
+            raise DaemonError(resp["error"])
+        return resp
+
+    def ping(self):
+        """Returns the specification fingerprint of the daemon."""
+        return self.request({"op": "ping"})["fingerprint"]
+
+    def inflect(self, args, form):
+        """Like inflect(), but executed in the daemon."""
+        return self.request({"op": "inflect", "args": args,
+                             "form": form})["results"]
+
+    def inflect_many(self, requests):
+        """Like inflect_many(), but executed in the daemon."""
+        return self.request({"op": "inflect_many",
+                             "requests": list(requests)})["results"]
+
+    def expand(self, lexemes, chunk_cost=DEFAULT_CHUNK_COST, **kwargs):
+        """Like expand_lexicon() with one job, but executed in the daemon.
+        The lexemes are sent in chunks of about ``chunk_cost`` forms."""
+        for chunk in cost_chunks(lexemes, chunk_cost, **kwargs):
+            resp = self.request({"op": "expand", "lexemes": chunk,
+                                 "options": kwargs})
+            for lexeme_id, form, results in resp["items"]:
+                yield lexeme_id, tuple(form), results
+
+    def stats(self):
+        """Returns statistics about the daemon's memo."""
+        return self.request({"op": "stats"})
+
+    def shutdown(self):
+        """Asks the daemon to exit."""
+        self.request({"op": "shutdown"})
+
+
+def connect(path=None, timeout=None):
+    """Returns a DaemonClient connected to the daemon at ``path``, or None
+    if no daemon is running there or it uses different specifications
+    (e.g., a different version of wiktfinnish)."""
+    try:
+        client = DaemonClient(path, timeout)
+    except OSError:
+        return None
+    try:
+        if client.ping() == fingerprint.spec_fingerprint():
+            return client
+    except (OSError, ValueError, DaemonError):
+        pass
+    client.close()
+    return None
+
+
+def main(argv=None):
+    """Runs the daemon from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.daemon",
+        description="Serve wiktfinnish requests on a Unix domain socket.")
+    parser.add_argument("--socket", default=None,
+                        help="socket path (default: {})"
+                        .format(default_socket_path()))
+    parser.add_argument("--memo-forms", type=int, default=DEFAULT_MAX_FORMS,
+                        help="maximum number of memoised forms")
+    opts = parser.parse_args(argv)
+    try:
+        serve(opts.socket, opts.memo_forms)
+    except RuntimeError as e:
+        print("wiktfinnish: {}".format(e), file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+# Minimal deterministic acyclic automaton (DAWG) of surface forms, for
+# spell-checking and membership tests on the forms of a complete lexicon.
+#
+# The automaton accepts the UTF-8 encodings of the surface forms and is
+# built with the incremental algorithm for sorted input (Daciuk et al.
+# 2000), so it is minimal.  Each state also records the number of words
+# accepted from it, which gives each word its index in sorted order
+# (minimal perfect hashing); the (lemma_id, form_id) payloads of the
+# words are kept in a separate table indexed by it.  Keeping the payloads
+# out of the automaton lets the words share suffixes.  Lemma ids must be
+# integers in 0..2**32-1.
+#
+# The file is little-endian and consists of a header (see HEADER), the
+# index of the first edge of each state (num_states + 1 entries), the
+# target of each edge, the number of words accepted from each state, the
+# index of the first payload of each word (num_words + 1 entries), the
+# payloads as pairs of lemma id and form id, the byte label of each edge
+# and a final flag for each state.  The edges of a state are sorted by
+# label.  DawgReader memory-maps the file, so it is not loaded into
+# memory and can be shared by processes.
+#
+# A DAWG can be built from the output of BufferSink (see sink.py) sorted
+# by surface form:
+#
+#   LC_ALL=C sort -t '<TAB>' -k3,3 forms.tsv | python3 -m wiktfinnish.dawg - forms.dawg
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+import mmap
+import array
+import struct
+import bisect
+import argparse
+
+# Magic bytes and version at the start of a DAWG file.
+MAGIC = b"WFDAWG01"
+
+# Header: magic, number of states, number of edges, root state, number of
+# distinct words, number of payloads.
+HEADER = struct.Struct("<8sIIIII")
+
+
+class DawgState(object):
+    """A state of a DAWG under construction."""
+    __slots__ = ("final", "edges", "id")
+
+    def __init__(self):
+        self.final = False
+        self.edges = []
+        self.id = None
+
+
+class DawgBuilder(object):
+    """Builds a DAWG from (surface, lemma_id, form_id) entries added in
+    order of the UTF-8 encoding of the surface form (as by ``LC_ALL=C
+    sort``).  The payloads of a surface form may be added in any order;
+    duplicates are ignored."""
+
+    def __init__(self):
+        self.root = DawgState()
+        self.unchecked = []
+        self.register = {}
+        self.states = []
+        self.word = None
+        self.payloads = set()
+        self.payload_starts = array.array("I", [0])
+        self.payload_data = array.array("I")
+        self.finished = False
+
+    @property
+    def num_words(self):
+        return len(self.payload_starts) - 1
+
+    @property
+    def num_entries(self):
+        return len(self.payload_data) // 2
+
+    def add(self, word, lemma_id, form_id):
+        """Adds a surface form with its payload."""
+        assert not self.finished
+        data = word.encode("utf-8")
+        if data != self.word:
+            if self.word is not None:
+                if data < self.word:
+                    raise ValueError("words not in sorted order: {!r}"
+                                     .format(word))
+                self.flush_word()
+            self.insert(data)
+            self.word = data
+        self.payloads.add((lemma_id, form_id))
+
+    def flush_word(self):
+        """Saves the payloads of the current word."""
+        for lemma_id, form_id in sorted(self.payloads):
+            self.payload_data.append(lemma_id)
+            self.payload_data.append(form_id)
+        self.payload_starts.append(len(self.payload_data) // 2)
+        self.payloads = set()
+
+    def insert(self, key):
+        """Inserts ``key``, which must sort after all previous keys."""
+        prev = self.word or b""
+        common = 0
+        n = min(len(key), len(prev))
+        while common < n and key[common] == prev[common]:
+            common += 1
+        self.minimize(common)
+        node = self.unchecked[-1][2] if self.unchecked else self.root
+        for label in key[common:]:
+            child = DawgState()
+            node.edges.append((label, child))
+            self.unchecked.append((node, label, child))
+            node = child
+        node.final = True
+
+    def minimize(self, depth):
+        """Replaces the unchecked states below ``depth`` by equivalent
+        registered states, or registers them."""
+        while len(self.unchecked) > depth:
+            parent, label, child = self.unchecked.pop()
+            sig = (child.final, tuple((x, c.id) for x, c in child.edges))
+            state = self.register.get(sig)
+            if state is not None:
+                parent.edges[-1] = (label, state)
+            else:
+                self.register_state(sig, child)
+
+    def register_state(self, sig, state):
+        state.id = len(self.states)
+        self.states.append(state)
+        self.register[sig] = state
+
+    def finish(self):
+        """Completes the automaton.  No entries can be added after
+        this."""
+        if not self.finished:
+            if self.word is not None:
+                self.flush_word()
+            self.minimize(0)
+            self.register_state(None, self.root)
+            self.register = None
+            self.finished = True
+
+    def write(self, f):
+        """Writes the automaton into the binary file ``f``."""
+        self.finish()
+        starts = array.array("I", [0])
+        targets = array.array("I")
+        counts = array.array("I")
+        labels = bytearray()
+        finals = bytearray()
+        # States are registered after the states they lead to
+        for state in self.states:
+            count = 1 if state.final else 0
+            for label, child in state.edges:
+                labels.append(label)
+                targets.append(child.id)
+                count += counts[child.id]
+            starts.append(len(targets))
+            counts.append(count)
+            finals.append(1 if state.final else 0)
+        f.write(HEADER.pack(MAGIC, len(self.states), len(targets),
+                            self.root.id, self.num_words, self.num_entries))
+        for a in (starts, targets, counts, self.payload_starts,
+                  self.payload_data):
+            if sys.byteorder != "little":
+                a = array.array("I", a)
+                a.byteswap()
+            f.write(a.tobytes())
+        f.write(labels)
+        f.write(finals)
+
+    def save(self, path):
+        """Writes the automaton into the file ``path``."""
+        with open(path, "wb") as f:
+            self.write(f)
+
+
+def build_dawg(entries, path):
+    """Builds a DAWG of the (surface, lemma_id, form_id) tuples in
+    ``entries``, which must be sorted as for DawgBuilder, and writes it
+    into the file ``path``.  Returns the builder."""
+    builder = DawgBuilder()
+    for word, lemma_id, form_id in entries:
+        builder.add(word, lemma_id, form_id)
+    builder.save(path)
+    return builder
+
+
+class EntrySink(object):
+    """A sink (see sink.py) that collects (surface, lemma_id, form_id)
+    entries for building a DAWG in memory."""
+
+    def __init__(self):
+        self.entries = []
+
+    def write(self, lemma_id, form_id, surface):
+        self.entries.append((surface, lemma_id, form_id))
+
+    def sorted_entries(self):
+        """Returns the entries sorted for DawgBuilder."""
+        self.entries.sort(key=lambda x: (x[0].encode("utf-8"), x[1], x[2]))
+        return self.entries
+
+
+def read_tsv(lines):
+    """Iterates over (surface, lemma_id, form_id) tuples from lines
+    "lemma_id<TAB>form_id<TAB>surface" as written by BufferSink."""
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        lemma_id, form_id, word = line.split("\t", 2)
+        yield word, int(lemma_id), int(form_id)
+
+
+class DawgReader(object):
+    """Memory-mapped reader for a DAWG file written by DawgBuilder."""
+
+    def __init__(self, path):
+        self.views = []
+        self.mm = None
+        self.f = open(path, "rb")
+        try:
+            self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.f.close()
+            raise ValueError("{}: not a DAWG file".format(path))
+        view = memoryview(self.mm)
+        self.views.append(view)
+        if len(view) < HEADER.size or view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("{}: not a DAWG file".format(path))
+        (magic, num_states, num_edges, self.root, self.num_words,
+         self.num_entries) = HEADER.unpack_from(view)
+        self.num_states = num_states
+        self.num_edges = num_edges
+        pos = HEADER.size
+        self.starts, pos = self.uint32_array(view, pos, num_states + 1)
+        self.targets, pos = self.uint32_array(view, pos, num_edges)
+        self.counts, pos = self.uint32_array(view, pos, num_states)
+        self.payload_starts, pos = self.uint32_array(view, pos,
+                                                     self.num_words + 1)
+        self.payload_data, pos = self.uint32_array(view, pos,
+                                                   2 * self.num_entries)
+        self.labels = view[pos:pos + num_edges]
+        pos += num_edges
+        self.finals = view[pos:pos + num_states]
+        self.views.extend((self.labels, self.finals))
+
+    def uint32_array(self, view, pos, n):
+        """Returns a sequence of the ``n`` unsigned 32-bit integers at
+        ``pos`` in the file and the position following them."""
+        part = view[pos:pos + 4 * n]
+        if sys.byteorder != "little":
+            a = array.array("I")
+            a.frombytes(part)
+            a.byteswap()
+            part.release()
+            return a, pos + 4 * n
+        part = part.cast("I")
+        self.views.append(part)
+        return part, pos + 4 * n
+
+    def close(self):
+        """Closes the file."""
+        if self.mm is None:
+            return
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.mm.close()
+        self.f.close()
+        self.mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __len__(self):
+        """Returns the number of distinct surface forms."""
+        return self.num_words
+
+    def __contains__(self, word):
+        return self.contains(word)
+
+    def edge(self, state, label):
+        """Returns the index of the edge from ``state`` with the byte
+        ``label``, or -1 if there is no such edge."""
+        lo = self.starts[state]
+        hi = self.starts[state + 1]
+        i = bisect.bisect_left(self.labels, label, lo, hi)
+        if i < hi and self.labels[i] == label:
+            return i
+        return -1
+
+    def walk(self, data):
+        """Returns the state reached from the root with the bytes
+        ``data``, or -1 if there is none."""
+        state = self.root
+        for label in data:
+            i = self.edge(state, label)
+            if i < 0:
+                return -1
+            state = self.targets[i]
+        return state
+
+    def contains(self, word):
+        """Returns True if ``word`` is one of the surface forms."""
+        state = self.walk(word.encode("utf-8"))
+        return state >= 0 and self.finals[state] != 0
+
+    def index(self, word):
+        """Returns the index of ``word`` among the surface forms in
+        sorted order, or -1 if it is not in the DAWG."""
+        state = self.root
+        idx = 0
+        for label in word.encode("utf-8"):
+            i = self.edge(state, label)
+            if i < 0:
+                return -1
+            if self.finals[state]:
+                idx += 1
+            for j in range(self.starts[state], i):
+                idx += self.counts[self.targets[j]]
+            state = self.targets[i]
+        if not self.finals[state]:
+            return -1
+        return idx
+
+    def payloads(self, word):
+        """Returns a sorted list of the (lemma_id, form_id) payloads of
+        ``word``.  Returns an empty list if it is not in the DAWG."""
+        idx = self.index(word)
+        if idx < 0:
+            return []
+        data = self.payload_data
+        return [(data[2 * i], data[2 * i + 1])
+                for i in range(self.payload_starts[idx],
+                               self.payload_starts[idx + 1])]
+
+    def iter_prefix(self, prefix=""):
+        """Iterates over the surface forms that start with ``prefix`` in
+        sorted order."""
+        start = prefix.encode("utf-8")
+        state = self.walk(start)
+        if state < 0:
+            return
+        stack = [(state, start)]
+        while stack:
+            state, data = stack.pop()
+            if self.finals[state]:
+                yield data.decode("utf-8")
+            for i in range(self.starts[state + 1] - 1,
+                           self.starts[state] - 1, -1):
+                stack.append((self.targets[i],
+                              data + bytes((self.labels[i],))))
+
+
+def main(argv=None):
+    """Builds a DAWG from sorted BufferSink output from the command
+    line."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.dawg",
+        description="Build a DAWG of surface forms from TSV lines "
+        "lemma_id<TAB>form_id<TAB>surface sorted by surface.")
+    parser.add_argument("input", help="input file (- for standard input)")
+    parser.add_argument("output", help="DAWG file to write")
+    opts = parser.parse_args(argv)
+    if opts.input == "-":
+        f = sys.stdin
+    else:
+        f = open(opts.input, encoding="utf-8")
+    try:
+        builder = build_dawg(read_tsv(f), opts.output)
+    except ValueError as e:
+        print("wiktfinnish.dawg: {}".format(e), file=sys.stderr)
+        return 1
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    print("{} words, {} entries, {} states".format(
+        builder.num_words, builder.num_entries, len(builder.states)),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+# Detecting declensions/conjugations and word forms that always produce
+# identical output.  Equivalence is determined symbolically by comparing
+# templates after substituting the fixed arguments (e.g., consonant
+# gradation), without generating any word forms.  The runtime tables are
+# used by inflect_paradigm() to generate each equivalence class of forms
+# only once.
+#
+# This module can also be run as a script to print the equivalence
+# classes:
+#
+#   python3 -m wiktfinnish.equivalence
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import re
+import threading
+from wiktfinnish import nounspecs
+from wiktfinnish import verbspecs
+from wiktfinnish import formnames
+from wiktfinnish.inflect import EMPTY_CHAR, argument_name_map
+
+# Characters used for the free arguments in resolved templates.  These are
+# from the Unicode private use area and should not appear in data.
+STEM_CHAR = "\uf8f0"
+END_CHAR = "\uf8f1"
+AE_CHAR = "\uf8f2"
+
+# Consonant gradations tried when looking for equivalent paradigms.  These
+# are given as (strong, weak) values of the second and third arguments.
+GRADATIONS = (
+    ("kk", "k"), ("k", "kk"), ("pp", "p"), ("p", "pp"), ("tt", "t"),
+    ("t", "tt"), ("k", ""), ("", "k"), ("k", "j"), ("j", "k"), ("k", "v"),
+    ("v", "k"), ("p", "v"), ("v", "p"), ("t", "d"), ("d", "t"),
+    ("nk", "ng"), ("ng", "nk"), ("mp", "mm"), ("mm", "mp"),
+    ("lt", "ll"), ("ll", "lt"), ("nt", "nn"), ("nn", "nt"),
+    ("rt", "rr"), ("rr", "rt"), ("s", "d"), ("rk", "rj"), ("lk", "lj"),
+)
+
+# Verb forms that inflect_verbal() post-processes based on the form name.
+# These are never treated as equivalent to other forms.
+SPECIAL_VERB_FORMS = ("inf1-long", "inf5", "pres-part", "pres-pass-part",
+                      "agnt-part", "nega-part", "past-part", "past-pass-part",
+                      "inf2", "inf2-pass", "inf3", "inf3-pass", "inf4", "jA")
+
+# Forms for which add_possessive() uses the vowel lengthening variant of
+# the third person possessive suffix.
+LENGTHENING_POSS_FORMS = (
+    "ine-sg", "ine-pl", "ela-sg", "ela-pl", "all-sg", "all-pl",
+    "ade-sg", "ade-pl", "abl-sg", "abl-pl", "tra-sg", "tra-pl",
+    "ess-sg", "ess-pl", "abe-sg", "abe-pl", "ptv-sg", "ptv-pl", "cmt",
+    "inf1-long", "inf2", "inf3", "inf4", "inf5")
+
+# Exception declensions/conjugations, where forms are listed in arguments.
+EXCEPTION_DECLS = ("fi-decl", "fi-decl-pron", "fi-conj", "fi-conj-table")
+
+# Cache of form alias tables for each declension/conjugation name.  Entries
+# are added while holding form_aliases_lock.
+form_aliases_cache = {}
+form_aliases_lock = threading.Lock()
+
+
+def get_decl(name):
+    """Returns the specification of the declension/conjugation ``name``, or
+    None if it is unknown."""
+    name = nounspecs.decl_name_map.get(name, name)
+    if name.startswith("fi-decl"):
+        return nounspecs.noun_decls.get(name)
+    return verbspecs.verb_conjs.get(name)
+
+
+def effective_templates(decl, form, use_poss, use_clitic):
+    """Returns the templates that inflect_using() would use for ``form``
+    with the given flags, as a tuple (empty if the form does not exist)."""
+    templates = False
+    if use_clitic and not use_poss:
+        templates = decl.get(form + "-clitic", False)
+    if templates is False and use_poss:
+        templates = decl.get(form + "-poss", False)
+    if templates is False:
+        templates = decl.get(form, None)
+    if not templates:
+        return ()
+    if isinstance(templates, str):
+        return (templates,)
+    return tuple(templates)
+
+
+def resolve_template(template, args, nargs):
+    """Substitutes the fixed arguments in ``args`` into ``template``.  The
+    stem, the end part/vowel and the final a/ä are replaced by special
+    characters, so that templates that resolve to the same string
+    produce identical output for all words."""
+    parts = []
+    for x in template:
+        if not x.isdigit():
+            parts.append(x)
+            continue
+        k = int(x)
+        if k == 1:
+            parts.append(STEM_CHAR)
+        elif k == nargs and nargs > 1:
+            parts.append(AE_CHAR)
+        elif (nargs == 5 and k == 4) or (nargs == 3 and k == 2):
+            parts.append(END_CHAR)
+        elif x == "9":
+            # Depends on par_sg_a or deleted characters; keep as is
+            parts.append(x)
+        else:
+            v = args.get(x, "")
+            if v == "(')":
+                v = ""
+            if x == "3" and not v:
+                v = EMPTY_CHAR
+            parts.append(v)
+    return "".join(parts)
+
+
+def paradigm_signature(name, args):
+    """Returns a signature for the declension/conjugation ``name`` with the
+    fixed arguments ``args`` (consonant gradation).  Two paradigms with the
+    same signature produce identical output for the same stem, end part and
+    final a/ä.  Returns None for declensions that cannot be compared this
+    way (unknown, exception or compound declensions)."""
+    name = nounspecs.decl_name_map.get(name, name)
+    decl = get_decl(name)
+    if decl is None or name in EXCEPTION_DECLS or "split" in decl:
+        return None
+    nargs = decl.get("nargs", 0)
+    names = set(formnames.CASE_FORMS) | set(formnames.VERB_FORMS)
+    names.update(formnames.COMPARATIVE_FORMS)
+    sig = [name[:8]]
+    for form in sorted(names):
+        for use_poss, use_clitic in ((False, False), (False, True),
+                                     (True, False)):
+            templates = effective_templates(decl, form, use_poss, use_clitic)
+            sig.append(tuple(resolve_template(t, args, nargs)
+                             for t in templates))
+    return tuple(sig)
+
+
+def paradigm_code(name, args):
+    """Returns the paradigm encoding (as in stem.encode_paradigm()) for
+    the declension/conjugation ``name`` with gradation arguments in
+    ``args``."""
+    code = ("N" if name.startswith("fi-decl-") else "V") + name[8:]
+    if args.get("2") or args.get("3"):
+        code += "G{}-{}".format(args.get("2", ""), args.get("3", ""))
+    return code
+
+
+def find_equivalent_paradigms(gradations=GRADATIONS):
+    """Finds paradigms (declensions/conjugations combined with consonant
+    gradation) that always produce identical output.  Returns a list of
+    equivalence classes, each a sorted list of paradigm codes (as in
+    stem.encode_paradigm()) with more than one member."""
+    classes = {}
+    for decls in (nounspecs.noun_decls, verbspecs.verb_conjs):
+        for name, decl in decls.items():
+            if decl.get("nargs", 0) >= 4:
+                argsets = [{"2": a, "3": b} for a, b in gradations]
+                argsets.insert(0, {})
+            else:
+                argsets = [{}]
+            for args in argsets:
+                sig = paradigm_signature(name, args)
+                if sig is None:
+                    continue
+                code = paradigm_code(name, args)
+                classes.setdefault(sig, []).append(code)
+    return list(sorted(sorted(codes) for codes in classes.values()
+                       if len(codes) > 1))
+
+
+def form_signature(decl, form):
+    """Returns the signature of ``form`` in the declension/conjugation
+    ``decl``.  Forms with the same signature produce identical output
+    (unless overridden by exceptions in the arguments).  Returns None for
+    forms that are post-processed based on the form name."""
+    if form in SPECIAL_VERB_FORMS or form in ("", "cmt"):
+        return None
+    sig = [form in LENGTHENING_POSS_FORMS,
+           form.endswith("-sg"), form.endswith("-pl")]
+    for use_poss, use_clitic in ((False, False), (False, True),
+                                 (True, False)):
+        sig.append(effective_templates(decl, form, use_poss, use_clitic))
+    if not any(sig[3:]):
+        return None  # Form does not exist
+    return tuple(sig)
+
+
+def form_aliases(name):
+    """Returns a dictionary mapping verb forms (for conjugations) or case
+    forms (for declensions) to an equivalent form of the same
+    declension/conjugation that always produces identical output.  Only
+    forms that have an equivalent form earlier in VERB_FORMS/CASE_FORMS
+    are included."""
+    aliases = form_aliases_cache.get(name)
+    if aliases is not None:
+        return aliases
+    key = name
+    name = nounspecs.decl_name_map.get(name, name)
+    decl = get_decl(name)
+    aliases = {}
+    if (decl is not None and name not in EXCEPTION_DECLS and
+        "split" not in decl):
+        if name.startswith("fi-conj"):
+            forms = formnames.VERB_FORMS
+        else:
+            forms = formnames.CASE_FORMS
+        seen = {}
+        for form in forms:
+            sig = form_signature(decl, form)
+            if sig is None:
+                continue
+            if sig in seen:
+                aliases[form] = seen[sig]
+            else:
+                seen[sig] = form
+    with form_aliases_lock:
+        return form_aliases_cache.setdefault(key, aliases)
+
+
+def exception_arg_names(form):
+    """Returns the names of the arguments that may override ``form`` with
+    an exception value."""
+    formarg = re.sub("-", "_", form)
+    names = [formarg] + [formarg + str(i) for i in range(2, 5)]
+    names.extend(argument_name_map.get(form, ()))
+    return names
+
+
+def lexeme_form_aliases(args):
+    """Returns the form aliases (see form_aliases()) that are valid for the
+    word with declension/conjugation arguments ``args``.  Aliases are
+    dropped if either form may be overridden by an exception value in
+    ``args``."""
+    aliases = form_aliases(args["template_name"])
+    if not aliases:
+        return aliases
+    ret = {}
+    for alias, form in aliases.items():
+        if any(x in args for x in exception_arg_names(alias)):
+            continue
+        if any(x in args for x in exception_arg_names(form)):
+            continue
+        ret[alias] = form
+    return ret
+
+
+def canonical_form(form, aliases):
+    """Returns the 5-tuple form that is guaranteed to produce the same
+    output as ``form``, using the aliases returned by
+    lexeme_form_aliases().  Returns ``form`` itself if it has no
+    equivalent."""
+    vform, comp, case, poss, clitic = form
+    if vform:
+        if not case and vform in aliases:
+            return (aliases[vform], comp, case, poss, clitic)
+    elif not comp and case in aliases:
+        return (vform, comp, aliases[case], poss, clitic)
+    return form
+
+
+def main():
+    """Prints the equivalence classes of paradigms and forms."""
+    print("Equivalent paradigms:")
+    for codes in find_equivalent_paradigms():
+        print("  " + " = ".join(codes))
+    print("Equivalent forms:")
+    for decls in (nounspecs.noun_decls, verbspecs.verb_conjs):
+        for name in decls:
+            aliases = form_aliases(name)
+            if not aliases:
+                continue
+            classes = {}
+            for alias, form in aliases.items():
+                classes.setdefault(form, [form]).append(alias)
+            print("  {}: {}".format(name, "; ".join(
+                " = ".join(x) for x in classes.values())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Expanding complete lexicons into all inflected forms using a pool of
+# worker processes.  The lexemes are packed into chunks of roughly equal
+# estimated cost (the number of forms enumerated for their
+# part-of-speech), so that a verb, which has tens of thousands of forms,
+# is not scheduled like a conjunction, which has one.  Idle workers take
+# the next chunk from a shared queue, and results are returned in the
+# order of the input.
+#
+# Lexemes are dictionaries with keys "id", "args" and optionally "pos" (see
+# incremental.py).
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import collections
+import concurrent.futures
+from wiktfinnish import formnames
+from wiktfinnish.inflect import inflect_paradigm, paradigm_pos
+
+# Default estimated cost (number of forms) of each chunk of work.  A chunk
+# always contains at least one lexeme.
+DEFAULT_CHUNK_COST = 20000
+
+
+def lexeme_cost(lexeme, forms=None, **kwargs):
+    """Returns the estimated cost of generating all forms for ``lexeme``.
+    This is the number of forms enumerated for its part-of-speech with
+    the given restrictions (keyword arguments to all_forms_list()), or the
+    number of ``forms`` if only specific forms are requested."""
+    if forms is not None:
+        return len(forms) or 1
+    pos = paradigm_pos(lexeme["args"], lexeme.get("pos"))
+    return len(formnames.all_forms_list(pos, **kwargs)) or 1
+
+
+def cost_chunks(lexemes, chunk_cost=DEFAULT_CHUNK_COST, **kwargs):
+    """Iterates over lists of lexemes from ``lexemes`` whose total
+    estimated cost is about ``chunk_cost``.  This consumes the input
+    incrementally."""
+    chunk = []
+    total = 0
+    for lexeme in lexemes:
+        cost = lexeme_cost(lexeme, **kwargs)
+        if chunk and total + cost > chunk_cost:
+            yield chunk
+            chunk = []
+            total = 0
+        chunk.append(lexeme)
+        total += cost
+    if chunk:
+        yield chunk
+
+
+def expand_chunk(chunk, kwargs):
+    """Generates all forms for the lexemes in ``chunk``.  Returns a list of
+    (lexeme_id, form, results) tuples.  This is the unit of work executed
+    in the worker processes."""
+    ret = []
+    for lexeme in chunk:
+        lexeme_id = lexeme["id"]
+        for form, results in inflect_paradigm(lexeme["args"],
+                                              lexeme.get("pos"), **kwargs):
+            ret.append((lexeme_id, form, results))
+    return ret
+
+
+def expand_lexicon(lexemes, jobs=None, chunk_cost=DEFAULT_CHUNK_COST,
+                   max_pending=None, executor=None, **kwargs):
+    """Generates all forms of the lexemes in ``lexemes``, yielding
+    (lexeme_id, form, results) tuples in the order of the input (and the
+    order of all_forms_list() for each lexeme).  ``jobs`` is the number of
+    worker processes (defaults to the number of CPUs); with one job the
+    forms are generated in this process.  ``chunk_cost`` is the estimated
+    cost of each unit of work, and ``max_pending`` limits the number of
+    chunks in progress or waiting to be returned (defaults to four per
+    job), which bounds memory use.  An existing ``executor`` may be given
+    instead of ``jobs``.  Other keyword arguments are passed to
+    all_forms_list()."""
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    chunks = cost_chunks(lexemes, chunk_cost, **kwargs)
+    if executor is None and jobs <= 1:
+        for chunk in chunks:
+            yield from expand_chunk(chunk, kwargs)
+        return
+
+    if max_pending is None:
+        max_pending = 4 * max(jobs, 1)
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    pending = collections.deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(expand_chunk, chunk, kwargs))
+            while len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # If the caller stops iterating early, don't run remaining chunks
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
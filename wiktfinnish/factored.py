@@ -0,0 +1,235 @@
+# Factored output of paradigms.  Most of the forms of a word differ only
+# in the possessive suffix and clitic added to a small number of base
+# forms, so instead of listing every combination, a factored paradigm
+# lists each base form (vform, comp, case) once, together with the
+# results of the inflection pipeline before the possessive suffix and
+# clitic stages and a reference to the suffix class (list of (poss,
+# clitic) pairs) that is generated for it.  The full forms are re-created
+# on demand by expand_factored().
+#
+# A factored paradigm is a list of (base, suffixes, stems) tuples, where
+# base is a 5-tuple with empty poss and clitic, suffixes is a tuple of
+# (poss, clitic) pairs and stems maps a stem key (see stem_key()) to a
+# list of (results, form, poss) groups as returned by iter_stages(), with
+# poss left empty in the groups of the "p" key (the possessive suffix of
+# each form is added when expanding).  Keys whose groups are the same as
+# for the bare form ("") are omitted, so possessive stems are only saved
+# for base forms where they differ from the bare form (e.g., the
+# genitive talon, whose possessive stem is talo-).
+#
+# Factored lexicons are written as JSON Lines.  Each suffix class is
+# written once, before its first use, as {"class": n, "suffixes": [[poss,
+# clitic], ...]}, and each lexeme as {"id": id, "forms": [[base, n, stems],
+# ...]}, with the base written as by formnames.form_to_str().  A factored
+# lexicon is expanded into TSV with:
+#
+#   python3 -m wiktfinnish.factored lexicon.factored.jsonl
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+import json
+import argparse
+import threading
+from wiktfinnish import formnames
+from wiktfinnish.inflect import iter_stages, iter_suffixed, paradigm_pos
+
+# Cache of the factored form lists for the lists returned by
+# all_forms_list(), keyed by its arguments.  Entries are added while
+# holding factored_forms_lock.
+factored_forms_cache = {}
+factored_forms_lock = threading.Lock()
+
+
+def stem_key(poss, clitic):
+    """Returns the key of the stems used for the possessive suffix ``poss``
+    and the clitic ``clitic``.  The templates used for a form depend only
+    on whether a possessive suffix follows, and clitic templates are only
+    used when no possessive suffix follows (see inflect_using())."""
+    if poss:
+        return "p"
+    if clitic:
+        return "c"
+    return ""
+
+
+def factor_forms(forms):
+    """Groups consecutive forms with the same (vform, comp, case) in
+    ``forms``.  Returns a list of (base, suffixes) tuples, where suffixes
+    is a tuple of the (poss, clitic) pairs of the forms in the group."""
+    ret = []
+    base = None
+    suffixes = []
+    for form in forms:
+        if base is None or tuple(form[:3]) != base[:3]:
+            if base is not None:
+                ret.append((base, tuple(suffixes)))
+            base = tuple(form[:3]) + ("", "")
+            suffixes = []
+        suffixes.append((form[3], form[4]))
+    if base is not None:
+        ret.append((base, tuple(suffixes)))
+    return ret
+
+
+def all_factored_forms(pos, **kwargs):
+    """Returns factor_forms() for all_forms_list(pos, **kwargs)."""
+    key = (pos, tuple(sorted(kwargs.items())))
+    ret = factored_forms_cache.get(key)
+    if ret is not None:
+        return ret
+    ret = tuple(factor_forms(formnames.all_forms_list(pos, **kwargs)))
+    with factored_forms_lock:
+        return factored_forms_cache.setdefault(key, ret)
+
+
+def factor_paradigm(args, pos=None, forms=None, **kwargs):
+    """Returns the factored paradigm of the word ``args``.  ``pos``,
+    ``forms`` and the keyword arguments are as for inflect_paradigm().
+    Base forms that have no results are omitted."""
+    pos = paradigm_pos(args, pos)
+    if pos != "verb" and "pos" not in args:
+        # Comparatives are only generated for args marked as adjectives
+        args = args.copy()
+        args["pos"] = pos
+    if forms is None:
+        factored = all_factored_forms(pos, **kwargs)
+    else:
+        factored = factor_forms(forms)
+    ret = []
+    for base, suffixes in factored:
+        stems = {}
+        for poss, clitic in suffixes:
+            key = stem_key(poss, clitic)
+            if key in stems:
+                continue
+            form = base[:3] + (poss, clitic)
+            # expand_factored() adds the possessive suffix of each form to
+            # the "p" stems, so the one used for generating them is not
+            # saved and the stems can be the same as for the bare form
+            stems[key] = [(list(results), name, "" if poss else p)
+                          for results, name, p in iter_stages(args, form)]
+        if not any(results for groups in stems.values()
+                   for results, _, _ in groups):
+            continue
+        bare = stems.get("")
+        if bare is not None:
+            for key in ("c", "p"):
+                if stems.get(key) == bare:
+                    del stems[key]
+        ret.append((base, suffixes, stems))
+    return ret
+
+
+def expand_factored(factored):
+    """Iterates over the (form, results) tuples of a factored paradigm.
+    The results are the same as those of inflect_paradigm() for the same
+    arguments."""
+    for base, suffixes, stems in factored:
+        bare = stems.get("")
+        for poss, clitic in suffixes:
+            groups = stems.get(stem_key(poss, clitic), bare)
+            results = list(iter_suffixed(((x, name, poss or p)
+                                          for x, name, p in groups),
+                                         clitic))
+            if results:
+                yield base[:3] + (poss, clitic), results
+
+
+class FactoredWriter(object):
+    """Writes factored paradigms as JSON Lines into the text file ``f``.
+    Suffix classes are numbered in the order of their first use."""
+
+    def __init__(self, f):
+        self.f = f
+        self.classes = {}
+
+    def write(self, lexeme_id, factored):
+        """Writes the factored paradigm of the lexeme ``lexeme_id``."""
+        forms = []
+        for base, suffixes, stems in factored:
+            n = self.classes.get(suffixes)
+            if n is None:
+                n = len(self.classes)
+                self.classes[suffixes] = n
+                self.f.write(json.dumps({"class": n,
+                                         "suffixes": suffixes},
+                                        ensure_ascii=False))
+                self.f.write("\n")
+            forms.append((formnames.form_to_str(base), n, stems))
+        self.f.write(json.dumps({"id": lexeme_id, "forms": forms},
+                                ensure_ascii=False))
+        self.f.write("\n")
+
+
+def write_factored(f, lexemes, **kwargs):
+    """Writes the factored paradigms of the lexemes in ``lexemes``
+    (dictionaries with "id", "args" and optionally "pos") into the text
+    file ``f``.  The keyword arguments are as for inflect_paradigm().
+    Returns the number of lexemes written."""
+    writer = FactoredWriter(f)
+    count = 0
+    for lexeme in lexemes:
+        writer.write(lexeme["id"], factor_paradigm(lexeme["args"],
+                                                   lexeme.get("pos"),
+                                                   **kwargs))
+        count += 1
+    return count
+
+
+def read_factored(lines):
+    """Iterates over (lexeme_id, factored) tuples from the lines of a file
+    written by write_factored()."""
+    classes = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        data = json.loads(line)
+        if "class" in data:
+            classes[data["class"]] = tuple(tuple(x)
+                                           for x in data["suffixes"])
+            continue
+        factored = []
+        for base, n, stems in data["forms"]:
+            factored.append((formnames.str_to_form(base), classes[n],
+                             {key: [(results, name, poss)
+                                    for results, name, poss in groups]
+                              for key, groups in stems.items()}))
+        yield data["id"], factored
+
+
+def expand_file(lines):
+    """Iterates over (lexeme_id, form, results) tuples for the factored
+    paradigms in the lines of a file written by write_factored()."""
+    for lexeme_id, factored in read_factored(lines):
+        for form, results in expand_factored(factored):
+            yield lexeme_id, form, results
+
+
+def main(argv=None):
+    """Expands a factored lexicon from the command line."""
+    # Imported here to avoid a circular import
+    from wiktfinnish.cli import write_output
+
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.factored",
+        description="Expand a factored lexicon into inflected forms.")
+    parser.add_argument("input", nargs="?", default=None,
+                        help="input file (default: standard input)")
+    parser.add_argument("--output-format", choices=("tsv", "jsonl"),
+                        default="tsv", help="output format")
+    opts = parser.parse_args(argv)
+    if opts.input in (None, "-"):
+        f = sys.stdin
+    else:
+        f = open(opts.input, encoding="utf-8")
+    try:
+        write_output(sys.stdout, expand_file(f), opts.output_format)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# Content hashes for the declension and conjugation specifications.  These
+# identify which version of nounspecs.py/verbspecs.py produced a given
+# output, so that persistent caches and generated form stores need only
+# be invalidated for declensions/conjugations that have actually changed.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import json
+import hashlib
+import threading
+from wiktfinnish import nounspecs
+from wiktfinnish import verbspecs
+
+# Version of the inflection engine.  This is included in every hash, and
+# should be incremented whenever inflect.py is changed in a way that
+# changes the generated forms (changes to the spec files are detected
+# automatically).
+ENGINE_VERSION = 1
+
+# Declensions that inflect_nominal() uses for comparatives and
+# superlatives.  These affect the output of every nominal declension and,
+# through comparatives of participles, of every conjugation.
+COMPARISON_DECLS = ("fi-decl-vanhempi", "fi-decl-sisin", "fi-decl-valo")
+
+# Declensions that inflect_verbal() uses for inflecting participles and
+# infinitives in cases.  These affect the output of every conjugation.
+VERBAL_NOMINAL_DECLS = ("fi-decl-koira", "fi-decl-kuollut", "fi-decl-valo",
+                        "fi-decl-inf2", "fi-decl-inf3", "fi-decl-nainen",
+                        "fi-decl-kulkija", "fi-decl-onneton")
+
+# Cache of computed hashes for each declension/conjugation name.  This is
+# filled on first use, while holding spec_hash_lock.
+spec_hash_cache = {}
+spec_hash_lock = threading.Lock()
+
+
+def canonical_json(data):
+    """Returns a canonical JSON encoding of ``data`` (with sorted keys), used
+    as input for hashing."""
+    return json.dumps(data, sort_keys=True, ensure_ascii=False,
+                      separators=(",", ":"))
+
+
+def digest(data):
+    """Returns a short hexadecimal digest of the canonical JSON encoding
+    of ``data``."""
+    h = hashlib.sha256(canonical_json(data).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def spec_dependencies(name):
+    """Returns a sorted list of the canonical names of all
+    declensions/conjugations whose definitions affect the output of the
+    declension/conjugation ``name`` (including ``name`` itself)."""
+    name = nounspecs.decl_name_map.get(name, name)
+    if name in nounspecs.noun_decls:
+        deps = set([name])
+        deps.update(COMPARISON_DECLS)
+        split = nounspecs.noun_decls[name].get("split")
+        if split:
+            deps.update(split[1::2])
+    elif name in verbspecs.verb_conjs:
+        deps = set([name])
+        deps.update(VERBAL_NOMINAL_DECLS)
+        # Comparatives of participles are inflected as nominals
+        deps.update(COMPARISON_DECLS)
+    else:
+        return []
+    return list(sorted(deps))
+
+
+def spec_hash(name):
+    """Returns a stable content hash for the declension/conjugation
+    ``name``.  The hash covers the definition of the declension itself,
+    any declensions it uses internally, and the possessive suffixes.
+    Returns None for unknown names."""
+    h = spec_hash_cache.get(name)
+    if h is not None:
+        return h
+    deps = spec_dependencies(name)
+    if not deps:
+        return None
+    data = {"engine": ENGINE_VERSION,
+            "possessive": nounspecs.possessive_suffixes,
+            "specs": {}}
+    for dep in deps:
+        if dep in nounspecs.noun_decls:
+            data["specs"][dep] = nounspecs.noun_decls[dep]
+        else:
+            data["specs"][dep] = verbspecs.verb_conjs[dep]
+    h = digest(data)
+    with spec_hash_lock:
+        spec_hash_cache[name] = h
+    return h
+
+
+def spec_hashes():
+    """Returns a dictionary mapping each declension/conjugation name
+    (including legacy names that redirect to other declensions) to its
+    content hash."""
+    names = (set(nounspecs.noun_decls) | set(nounspecs.decl_name_map) |
+             set(verbspecs.verb_conjs))
+    return {name: spec_hash(name) for name in sorted(names)}
+
+
+def spec_fingerprint():
+    """Returns a fingerprint identifying the complete set of
+    declension/conjugation specifications.  This changes whenever any
+    of the per-declension hashes changes."""
+    fp = spec_hash_cache.get(None)
+    if fp is not None:
+        return fp
+    fp = digest([ENGINE_VERSION, spec_hashes()])
+    with spec_hash_lock:
+        spec_hash_cache[None] = fp
+    return fp
+
+
+def changed_declensions(old_hashes):
+    """Given a dictionary of per-declension hashes saved earlier (as
+    returned by spec_hashes()), returns the set of declension/conjugation
+    names whose output may differ now.  This includes names that have
+    been added or removed."""
+    assert isinstance(old_hashes, dict)
+    new_hashes = spec_hashes()
+    changed = set()
+    for name in set(old_hashes) | set(new_hashes):
+        if old_hashes.get(name) != new_hashes.get(name):
+            changed.add(name)
+    return changed
+
+
+def spec_tag(name):
+    """Returns the hash of the declension/conjugation ``name`` for tagging
+    cached results of its words, or "" for unknown names (whose words
+    have no forms)."""
+    return spec_hash(name) or ""
+
+
+def stale_tags(old_hashes):
+    """Given a dictionary of per-declension hashes saved earlier (as
+    returned by spec_hashes()), returns the set of tags (see spec_tag())
+    of cached results that may differ now.  The tag of unknown names is
+    included if names have been added."""
+    return set(old_hashes.get(name) or ""
+               for name in changed_declensions(old_hashes))
+
+
+def check_fingerprint(fingerprint):
+    """Returns True if ``fingerprint`` (as embedded in a persistent cache
+    or snapshot) matches the current specifications."""
+    return fingerprint == spec_fingerprint()
+
+
+def args_hash(args, pos=None):
+    """Returns a stable hash for the declension/conjugation arguments of a
+    word (including the template name) and its part-of-speech.  This is
+    used for detecting lexemes whose arguments have changed."""
+    assert isinstance(args, dict)
+    data = {str(k): v for k, v in args.items()}
+    return digest([pos, data])
@@ -4,6 +4,8 @@
 #
 # Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
 
+import threading
+
 # Names of comparative forms for adjectives (the empty string means positive,
 # or normal form).
 COMPARATIVE_FORMS = (
@@ -143,25 +145,97 @@ CLITIC_FORMS = ("",
                 #"kinkOhAn",
 )
 
+# Names of each component of the 5-tuple, in order.
+FORM_PARTS = (VERB_FORMS, COMPARATIVE_FORMS, CASE_FORMS, POSSESSIVE_FORMS,
+              CLITIC_FORMS)
+
+# Map from each (non-empty) component name to its index in the 5-tuple.
+# The names of the different components are disjoint.
+form_part_index = {name: idx
+                   for idx, names in enumerate(FORM_PARTS)
+                   for name in names if name}
+
+# Maps from the names of each component to their positions in FORM_PARTS.
+form_part_positions = tuple({name: i for i, name in enumerate(names)}
+                            for names in FORM_PARTS)
+
+# Number of distinct form ids (see form_id()).
+NUM_FORM_IDS = (len(VERB_FORMS) * len(COMPARATIVE_FORMS) * len(CASE_FORMS) *
+                len(POSSESSIVE_FORMS) * len(CLITIC_FORMS))
+
+
+def form_to_str(form):
+    """Converts a 5-tuple form into a string, where the non-empty components
+    are joined by +, e.g., "gen-sg+1s+kin".  The basic form is the empty
+    string."""
+    return "+".join(x for x in form if x)
+
+
+def str_to_form(s):
+    """Converts a string returned by form_to_str() back into a 5-tuple.
+    Raises ValueError if the string is not a valid form name."""
+    form = ["", "", "", "", ""]
+    if not s:
+        return tuple(form)
+    for name in s.split("+"):
+        idx = form_part_index.get(name)
+        if idx is None:
+            raise ValueError("unknown form component {!r} in {!r}"
+                             .format(name, s))
+        if form[idx]:
+            raise ValueError("conflicting form components in {!r}"
+                             .format(s))
+        form[idx] = name
+    return tuple(form)
+
+
+def form_id(form):
+    """Returns a compact integer identifying the 5-tuple ``form``, in the
+    range 0..NUM_FORM_IDS-1.  The ids depend on the order of the names in
+    FORM_PARTS.  Raises ValueError if the form is invalid."""
+    fid = 0
+    for names, positions, x in zip(FORM_PARTS, form_part_positions, form):
+        pos = positions.get(x)
+        if pos is None:
+            raise ValueError("invalid form {!r}".format(form))
+        fid = fid * len(names) + pos
+    return fid
+
+
+def form_from_id(fid):
+    """Returns the 5-tuple form identified by ``fid`` (see form_id())."""
+    if not 0 <= fid < NUM_FORM_IDS:
+        raise ValueError("invalid form id {!r}".format(fid))
+    parts = []
+    for names in reversed(FORM_PARTS):
+        fid, pos = divmod(fid, len(names))
+        parts.append(names[pos])
+    return tuple(reversed(parts))
+
+
 ######################################################################
 # The rest of file is about enumerating 5-tuples representing
 # inflected forms.
 ######################################################################
 
 # Cache of all forms for combinations of part-of-speech and other parameters
-# restricting which forms are posible.
+# restricting which forms are posible.  Entries are added while holding
+# all_forms_lock.
 all_forms_cache = {}
+all_forms_lock = threading.Lock()
 
 
 def all_forms_list(*args, **kwargs):
     """Returns a list/tuple of all possible word form descriptors for the given
     part-of-speech and other restrictions.  This caches the result."""
     key = (args, tuple(sorted(kwargs.items())))
-    if key in all_forms_cache:
-        return all_forms_cache[key]
+    forms = all_forms_cache.get(key)
+    if forms is not None:
+        return forms
     forms = tuple(x for x in all_forms_iter(*args, **kwargs))
-    all_forms_cache[key] = forms
-    return forms
+    with all_forms_lock:
+        # Another thread may have added it first; all callers get the same
+        return all_forms_cache.setdefault(key, forms)
 
 
 def all_forms_iter(pos, transitive=True,
@@ -0,0 +1,379 @@
+# Exporting a lexicon as a finite-state transducer, either as a lexc
+# description with continuation classes or as a flat transducer in the
+# AT&T text format (as read by, e.g., hfst-txt2fst and foma).  The upper
+# (analysis) side is the lemma followed by the components of the form as
+# multicharacter tags (e.g., "talo+ine-pl+1s+kin"), and the lower side is
+# the surface form ("taloissanikin").
+#
+# The transducer is built from the suffix structure of the paradigms
+# rather than by enumerating the forms of every word.  Words with the same
+# declension/conjugation arguments other than the stem, the same stem
+# class (see inflect.stem_class()) and the same last STEM_CONTEXT
+# characters of the stem produce the same suffixes, so they share a
+# paradigm class, which is generated once from the factored paradigm (see
+# factored.py) of the first such word.  Each base form of a class
+# continues to a class of possessive suffixes and clitics, which is
+# computed once for the words ending the same way and shared by all
+# paradigm classes.  Words whose forms do not all begin with the stem
+# (exception templates, compound declensions and irregular forms) get a
+# class of their own.
+#
+# The exporter can be run from the command line:
+#
+#   python3 -m wiktfinnish.fst --format lexc lexicon.jsonl finnish.lexc
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import re
+import sys
+import argparse
+from wiktfinnish.inflect import (inflect, iter_suffixed, get_arg,
+                                 stem_class, paradigm_pos)
+from wiktfinnish.stem import is_exceptional, is_compound_declension
+from wiktfinnish.factored import factor_paradigm, stem_key
+
+# Number of characters at the end of the stem that are part of the
+# paradigm class.  Templates that are not compiled into suffixes may
+# delete characters from the end of the stem.
+STEM_CONTEXT = 2
+
+# Epsilon in the AT&T format.
+ATT_EPSILON = "@0@"
+
+# Characters that must be escaped with "%" in lexc entries.
+LEXC_SPECIAL_RE = re.compile(r"""([!%:;<>0#"{}\[\]\s+\-])""")
+
+
+def form_tags(form):
+    """Returns the multicharacter tags of the non-empty components of
+    ``form`` (or a part of a 5-tuple)."""
+    return tuple("+" + x for x in form if x)
+
+
+def lexeme_lemma(lexeme):
+    """Returns the lemma (dictionary form) of ``lexeme``: its "word" if
+    given, otherwise the nominative singular or first infinitive."""
+    if lexeme.get("word"):
+        return lexeme["word"]
+    args = lexeme["args"]
+    if args["template_name"].startswith("fi-conj"):
+        forms = [("inf1", "", "", "", "")]
+    else:
+        forms = [("", "", "", "", ""), ("", "", "nom-pl", "", "")]
+    for form in forms:
+        results = inflect(args, form, force_n=True)
+        if results:
+            return results[0]
+    return str(lexeme["id"])
+
+
+class FstExport(object):
+    """Lexicon converted into paradigm classes and continuation classes of
+    possessive suffixes and clitics.  The keyword arguments are as for
+    inflect_paradigm() and restrict the forms that are exported.
+
+    ``entries`` is a list of (lemma, stem, class_name) tuples, ``classes``
+    maps a paradigm class name to a list of (tags, suffix, cont_name)
+    tuples, and ``conts`` maps a continuation class name to a list of
+    (tags, suffix) tuples, where tags is a tuple of multicharacter
+    tags."""
+
+    def __init__(self, **kwargs):
+        self.options = kwargs
+        self.entries = []
+        self.classes = {}
+        self.class_keys = {}
+        self.conts = {}
+        self.cont_names = {}
+        self.cont_cache = {}
+        self.tags = set()
+
+    def class_key(self, args, pos, stem):
+        """Returns the key of the paradigm class of a word, or None if the
+        word needs a class of its own."""
+        if is_exceptional(args) or is_compound_declension(args):
+            return None
+        rest = tuple(sorted((str(k), v) for k, v in args.items()
+                            if str(k) != "1"))
+        return (pos, rest, stem_class(stem), stem[-STEM_CONTEXT:])
+
+    def add(self, lexeme):
+        """Adds the lexeme ``lexeme`` (a dictionary with "id", "args" and
+        optionally "pos" and "word").  Returns the name of its paradigm
+        class, or None if it has no forms."""
+        args = lexeme["args"]
+        pos = paradigm_pos(args, lexeme.get("pos"))
+        stem = get_arg(args, "1")
+        if not isinstance(stem, str) or stem == "(')":
+            stem = ""
+        key = self.class_key(args, pos, stem)
+        name = self.class_keys.get(key) if key is not None else None
+        if name is None:
+            prefix = args["template_name"][3:]
+            name = "{}_{}".format(prefix, len(self.classes))
+            entries = self.paradigm_class(args, pos, stem)
+            if entries is None:
+                # Some form does not begin with the stem
+                key = None
+                stem = ""
+                entries = self.paradigm_class(args, pos, stem)
+            if not entries:
+                return None
+            self.classes[name] = entries
+            if key is not None:
+                self.class_keys[key] = name
+        self.entries.append((lexeme_lemma(lexeme), stem, name))
+        return name
+
+    def add_lexicon(self, lexemes):
+        """Adds the lexemes in ``lexemes``."""
+        for lexeme in lexemes:
+            self.add(lexeme)
+
+    def paradigm_class(self, args, pos, stem):
+        """Returns the entries of the paradigm class of the word ``args``,
+        with suffixes relative to ``stem``, or None if some form does not
+        begin with the stem."""
+        entries = []
+        seen = set()
+        for base, suffixes, stems in factor_paradigm(args, pos,
+                                                     **self.options):
+            tags = form_tags(base[:3])
+            bare = stems.get("")
+            pairs = {}
+            for poss, clitic in suffixes:
+                key = stem_key(poss, clitic)
+                if key not in stems:
+                    key = ""
+                pairs.setdefault(key, []).append((poss, clitic))
+            for key, groups in stems.items():
+                if key not in pairs:
+                    continue
+                for results, name, p in groups:
+                    for x in results:
+                        if not x.startswith(stem):
+                            return None
+                        cont = self.continuation(x, name, p,
+                                                 tuple(pairs[key]))
+                        if cont is None:
+                            # Expand the suffixes in this class
+                            for form, v in self.expand(x, name, p,
+                                                       pairs[key]):
+                                if not v.startswith(stem):
+                                    return None
+                                entry = (tags + form_tags(form),
+                                         v[len(stem):], None)
+                                if entry not in seen:
+                                    seen.add(entry)
+                                    entries.append(entry)
+                        elif self.conts[cont]:
+                            entry = (tags, x[len(stem):], cont)
+                            if entry not in seen:
+                                seen.add(entry)
+                                entries.append(entry)
+            self.tags.update(tags)
+        return entries
+
+    def expand(self, x, name, p, pairs):
+        """Returns a list of ((poss, clitic), word) tuples for the results
+        of adding the possessive suffixes and clitics in ``pairs`` to the
+        base result ``x``."""
+        ret = []
+        for poss, clitic in pairs:
+            for v in iter_suffixed((([x], name, poss or p),), clitic):
+                ret.append(((poss, clitic), v))
+        return ret
+
+    def continuation(self, x, name, p, pairs):
+        """Returns the name of the continuation class for adding the
+        possessive suffixes and clitics in ``pairs`` to the base result
+        ``x``, or None if some of the results do not begin with ``x``."""
+        # The suffixes depend only on the vowels and the last characters
+        # of the word
+        key = (stem_class(x), x[-2:], name, p, pairs)
+        cont = self.cont_cache.get(key, False)
+        if cont is not False:
+            return cont
+        entries = []
+        for form, v in self.expand(x, name, p, pairs):
+            if not v.startswith(x):
+                entries = None
+                break
+            tags = form_tags(form)
+            self.tags.update(tags)
+            entries.append((tags, v[len(x):]))
+        if entries is None:
+            cont = None
+        else:
+            entries = tuple(entries)
+            cont = self.cont_names.get(entries)
+            if cont is None:
+                cont = "PC_{}".format(len(self.conts))
+                self.conts[cont] = entries
+                self.cont_names[entries] = cont
+        self.cont_cache[key] = cont
+        return cont
+
+
+def build_export(lexemes, **kwargs):
+    """Returns an FstExport of the lexemes in ``lexemes``.  The keyword
+    arguments are as for inflect_paradigm()."""
+    export = FstExport(**kwargs)
+    export.add_lexicon(lexemes)
+    return export
+
+
+def iter_export(export):
+    """Iterates over the (upper, lower) string pairs accepted by the
+    transducer of ``export``, with the tags joined to the upper side."""
+    for lemma, stem, name in export.entries:
+        for tags, suffix, cont in export.classes[name]:
+            if cont is None:
+                yield lemma + "".join(tags), stem + suffix
+                continue
+            for tags2, suffix2 in export.conts[cont]:
+                yield (lemma + "".join(tags + tags2),
+                       stem + suffix + suffix2)
+
+
+def lexc_escape(s):
+    """Escapes ``s`` for use in a lexc entry.  The empty string is written
+    as 0."""
+    if not s:
+        return "0"
+    return LEXC_SPECIAL_RE.sub(r"%\1", s)
+
+
+def lexc_entry(tags, upper, lower, cont):
+    """Returns a lexc entry line."""
+    upper = lexc_escape(upper) if upper or not tags else ""
+    upper += "".join(tags)
+    lower = lexc_escape(lower)
+    if upper == lower:
+        return "{} {} ;\n".format(upper, cont or "#")
+    return "{}:{} {} ;\n".format(upper, lower, cont or "#")
+
+
+def write_lexc(f, export):
+    """Writes ``export`` into the text file ``f`` in the lexc format."""
+    f.write("Multichar_Symbols\n")
+    for tag in sorted(export.tags):
+        f.write(tag + "\n")
+    f.write("\nLEXICON Root\n")
+    for lemma, stem, name in export.entries:
+        f.write(lexc_entry((), lemma, stem, name))
+    for name, entries in export.classes.items():
+        f.write("\nLEXICON {}\n".format(name))
+        for tags, suffix, cont in entries:
+            f.write(lexc_entry(tags, "", suffix, cont))
+    for name, entries in export.conts.items():
+        f.write("\nLEXICON {}\n".format(name))
+        for tags, suffix in entries:
+            f.write(lexc_entry(tags, "", suffix, None))
+
+
+def att_symbol(x):
+    """Returns the symbol ``x`` as written in the AT&T format."""
+    if x == " ":
+        return "@_SPACE_@"
+    if x == "\t":
+        return "@_TAB_@"
+    return x
+
+
+class AttWriter(object):
+    """Writes arcs of a transducer in the AT&T format into a text file.
+    State 0 is the start state."""
+
+    def __init__(self, f):
+        self.f = f
+        self.num_states = 1
+
+    def new_state(self):
+        state = self.num_states
+        self.num_states += 1
+        return state
+
+    def path(self, src, dst, upper, lower):
+        """Writes a path from ``src`` to ``dst`` that maps the symbols in
+        ``upper`` to the characters of ``lower``."""
+        upper = list(upper)
+        lower = list(lower)
+        n = max(len(upper), len(lower))
+        if n == 0:
+            upper = [ATT_EPSILON]
+            n = 1
+        upper += [ATT_EPSILON] * (n - len(upper))
+        lower += [ATT_EPSILON] * (n - len(lower))
+        for i, (a, b) in enumerate(zip(upper, lower)):
+            nxt = dst if i == n - 1 else self.new_state()
+            self.f.write("{}\t{}\t{}\t{}\n".format(src, nxt, att_symbol(a),
+                                                   att_symbol(b)))
+            src = nxt
+
+
+def write_att(f, export):
+    """Writes ``export`` into the text file ``f`` as a flat transducer in
+    the AT&T format."""
+    writer = AttWriter(f)
+    final = writer.new_state()
+    starts = {}
+    for name in list(export.classes) + list(export.conts):
+        starts[name] = writer.new_state()
+    for lemma, stem, name in export.entries:
+        writer.path(0, starts[name], lemma, stem)
+    for name, entries in export.classes.items():
+        for tags, suffix, cont in entries:
+            writer.path(starts[name], starts[cont] if cont else final,
+                        tags, suffix)
+    for name, entries in export.conts.items():
+        for tags, suffix in entries:
+            writer.path(starts[name], final, tags, suffix)
+    f.write("{}\n".format(final))
+
+
+def main(argv=None):
+    """Exports a lexicon as a transducer from the command line."""
+    # Imported here to avoid a circular import
+    from wiktfinnish.cli import open_input, INPUT_FORMATS
+
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.fst",
+        description="Export a lexicon as a lexc description or as a "
+        "transducer in the AT&T format.")
+    parser.add_argument("input", help="input file (- for standard input)")
+    parser.add_argument("output", help="output file (- for standard output)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS,
+                        default="auto", help="input format")
+    parser.add_argument("--format", choices=("lexc", "att"), default="lexc",
+                        help="output format")
+    parser.add_argument("--no-comp", action="store_true",
+                        help="do not export comparatives")
+    parser.add_argument("--no-poss", action="store_true",
+                        help="do not export possessive suffixes")
+    parser.add_argument("--no-clitic", action="store_true",
+                        help="do not export clitics")
+    opts = parser.parse_args(argv)
+    kwargs = {}
+    for name in ("no_comp", "no_poss", "no_clitic"):
+        if getattr(opts, name):
+            kwargs[name] = True
+    export = build_export(open_input(opts.input, opts.input_format),
+                          **kwargs)
+    if opts.output == "-":
+        f = sys.stdout
+    else:
+        f = open(opts.output, "w", encoding="utf-8")
+    try:
+        if opts.format == "lexc":
+            write_lexc(f, export)
+        else:
+            write_att(f, export)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
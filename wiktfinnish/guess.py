@@ -0,0 +1,275 @@
+# Guessing the lemma and paradigm of unknown words.  A Guesser is built
+# from a lexicon of known words: words with the same paradigm code (see
+# stem.encode_paradigm()), part-of-speech, stem class (see
+# inflect.stem_class()) and last STEM_CONTEXT characters of the stem form
+# their endings the same way, so the forms of one word of each such
+# class are generated and the ending of each form after the rest of the
+# stem is saved in a trie of reversed endings.  Words of declensions and
+# conjugations that are internal (not productive) are not used.
+#
+# guess_lemmas() walks the trie backwards from the end of an unknown word
+# and collects the (stem, paradigm) candidates of all matching endings.
+# Candidates whose stem is too short for the paradigm (see
+# stem.valid_unknown_stem()) or whose gradation is blocked by another
+# candidate for the same form (see stem.get_blocked_paradigms()) are
+# pruned, and the remaining candidates are verified by generating the
+# matching form from the decoded paradigm.
+#
+# The trie is kept as a dictionary mapping each of its nodes (an ending
+# or a suffix of an ending) to the (class, form id) pairs of the endings
+# ending at the node, so walking it costs one lookup per character and
+# stops at the first suffix of the word that is not a node.  Guesses are
+# cached per surface form, since unknown-word streams from a corpus
+# repeat the same words.
+#
+#   guesser = Guesser(lexemes, no_clitic=True)
+#   guesser.guess_lemmas("kalossa")
+#   -> [("kalo", "kalo||a", "Nvalo", ("", "", "ine-sg", "", ""))]
+#
+# The guesser can be run from the command line:
+#
+#   python3 -m wiktfinnish.guess lexicon.jsonl < words.txt
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+import argparse
+from wiktfinnish import formnames
+from wiktfinnish.inflect import (inflect, inflect_paradigm, paradigm_pos,
+                                 stem_class)
+from wiktfinnish.stem import (SEPARATOR, encode_paradigm, decode_paradigm,
+                              valid_unknown_stem, is_guessable,
+                              get_blocked_paradigms)
+from wiktfinnish.memo import FormMemo
+from wiktfinnish.fst import lexeme_lemma
+
+# Number of characters at the end of the stem that are part of the class
+# of a known word.  Longer contexts produce fewer candidates but miss
+# words whose stems end differently from all known words.
+STEM_CONTEXT = 1
+
+# Default maximum number of surface forms whose guesses are cached.
+DEFAULT_CACHE_SIZE = 100000
+
+
+class Guesser(object):
+    """Guesses lemmas of unknown words by analogy to the known words in
+    ``lexemes`` (dictionaries with "args" and optionally "pos").  The
+    keyword arguments are as for inflect_paradigm() and restrict the
+    forms that are recognised (e.g., no_clitic=True)."""
+
+    def __init__(self, lexemes=(), cache_size=DEFAULT_CACHE_SIZE, **kwargs):
+        self.options = kwargs
+        self.classes = []
+        self.class_counts = []
+        self.class_index = {}
+        self.nodes = {}
+        self.endings = {}
+        self.cache = FormMemo(cache_size)
+        for lexeme in lexemes:
+            self.add(lexeme["args"], lexeme.get("pos"))
+
+    def __len__(self):
+        """Returns the number of word classes in the index."""
+        return len(self.classes)
+
+    def add(self, args, pos=None):
+        """Adds the known word ``args`` to the index.  Returns False if
+        the word cannot be used for guessing (its paradigm cannot be
+        encoded or is not productive)."""
+        stem, code = encode_paradigm(args)
+        if code is None or not is_guessable(stem, code):
+            return False
+        pos = paradigm_pos(args, pos)
+        root = stem.split(SEPARATOR)[0]
+        prefix = root[:max(len(root) - STEM_CONTEXT, 0)]
+        key = (code, pos, stem_class(root), stem[len(prefix):])
+        self.cache.clear()
+        cid = self.class_index.get(key)
+        if cid is not None:
+            self.class_counts[cid] += 1
+            return True
+        cid = len(self.classes)
+        self.class_index[key] = cid
+        self.classes.append((code, pos, stem[len(prefix):]))
+        self.class_counts.append(1)
+        nodes = self.nodes
+        for form, results in inflect_paradigm(args, pos, **self.options):
+            fid = formnames.form_id(form)
+            for word in set(results):
+                if not word.startswith(prefix) or len(word) == len(prefix):
+                    continue
+                ending = word[len(prefix):]
+                for i in range(len(ending) - 1, 0, -1):
+                    nodes.setdefault(ending[i:], [])
+                nodes.setdefault(ending, []).append((cid, fid))
+                self.endings.setdefault((fid, ending), []).append(cid)
+        return True
+
+    def candidates(self, word, fid=None):
+        """Returns a dictionary mapping the (stem, paradigm, pos)
+        candidates for ``word`` to a dictionary mapping the form ids for
+        which they were proposed to the classes that proposed them,
+        before pruning and verification.  If ``fid`` is not None, only
+        candidates for that form id are returned."""
+        nodes = self.nodes
+        endings = self.endings
+        classes = self.classes
+        ret = {}
+        for i in range(len(word) - 1, -1, -1):
+            ending = word[i:]
+            entries = nodes.get(ending)
+            if entries is None:
+                break
+            if fid is not None:
+                entries = [(cid, fid) for cid in endings.get((fid, ending),
+                                                            ())]
+            prefix = word[:i]
+            for cid, x in entries:
+                code, pos, tail = classes[cid]
+                fids = ret.setdefault((prefix + tail, code, pos), {})
+                fids.setdefault(x, []).append(cid)
+        return ret
+
+    def prune(self, candidates):
+        """Removes candidates with stems that are not valid for the
+        paradigm and candidates whose paradigm is blocked by another
+        candidate for the same form.  Returns a list of (stem, paradigm,
+        pos, form_id, classes) tuples."""
+        blocked = {}
+        valid = []
+        for (stem, code, pos), fids in candidates.items():
+            if not valid_unknown_stem(stem, code):
+                continue
+            for fid, cids in fids.items():
+                valid.append((stem, code, pos, fid, cids))
+                for x in get_blocked_paradigms(code):
+                    blocked.setdefault(fid, set()).add(x)
+        return [x for x in valid if x[1] not in blocked.get(x[3], ())]
+
+    def guess_lemmas(self, word):
+        """Returns a list of (lemma, stem, paradigm, form) tuples for the
+        guessed analyses of the unknown word ``word``, where stem and
+        paradigm are as returned by stem.encode_paradigm().  Guesses
+        supported by more known words come first."""
+        guesses = self.cache.get(word)
+        if guesses is not None:
+            return guesses
+        scores = {}
+        if word and SEPARATOR not in word:
+            lemmas = {}
+            for stem, code, pos, fid, cids in self.prune(
+                    self.candidates(word)):
+                args = decode_paradigm(stem, code, pos)
+                if args is None:
+                    continue
+                form = formnames.form_from_id(fid)
+                if word not in inflect(args, form):
+                    continue
+                lemma = lemmas.get((stem, code))
+                if lemma is None:
+                    lemma = lexeme_lemma({"args": args, "id": stem})
+                    lemmas[stem, code] = lemma
+                key = (lemma, stem, code, form)
+                scores[key] = (scores.get(key, 0) +
+                               sum(self.class_counts[cid] for cid in cids))
+        guesses = sorted(scores, key=lambda x: (-scores[x], x[0], x[2],
+                                                formnames.form_id(x[3])))
+        self.cache.put(word, guesses)
+        return guesses
+
+    def guess_stream(self, words):
+        """Iterates over (word, guesses) tuples for the words in the
+        iterable ``words``, where guesses is as returned by
+        guess_lemmas()."""
+        for word in words:
+            yield word, self.guess_lemmas(word)
+
+    def infer_paradigm(self, observed, verify=True):
+        """Infers the paradigm of an unknown word from several of its
+        forms.  ``observed`` is a list of (form, word) tuples.  The
+        candidates for each observed form are looked up from the index of
+        endings by form id, and only candidates proposed for all of them
+        are kept.  If ``verify`` is True, the observed forms are generated
+        from each remaining candidate and candidates producing other forms
+        are dropped.  Returns a list of (stem, paradigm) tuples as returned
+        by stem.encode_paradigm(), those supported by more known words
+        first."""
+        common = None
+        for form, word in observed:
+            found = self.candidates(word, formnames.form_id(form))
+            if common is not None:
+                found = {k: v for k, v in found.items() if k in common}
+                for k, fids in found.items():
+                    for fid, cids in common[k].items():
+                        fids.setdefault(fid, []).extend(cids)
+            common = found
+            if not common:
+                return []
+        if common is None:
+            return []
+        if verify:
+            for key in list(common):
+                args = decode_paradigm(*key)
+                if args is None or any(word not in inflect(args, form)
+                                       for form, word in observed):
+                    del common[key]
+        # A candidate is kept only if it is not pruned for any form
+        num_fids = {}
+        scores = {}
+        for stem, code, pos, fid, cids in self.prune(common):
+            k = (stem, code, pos)
+            num_fids[k] = num_fids.get(k, 0) + 1
+            scores[k] = (scores.get(k, 0) +
+                         sum(self.class_counts[cid] for cid in cids))
+        ret = {}
+        for k, n in num_fids.items():
+            if n == len(common[k]):
+                ret[k[:2]] = ret.get(k[:2], 0) + scores[k]
+        return sorted(ret, key=lambda x: (-ret[x], x))
+
+
+def main(argv=None):
+    """Guesses lemmas of unknown words from the command line."""
+    # Imported here to avoid a circular import
+    from wiktfinnish.cli import open_input, INPUT_FORMATS
+
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.guess",
+        description="Guess lemmas and paradigms of unknown words (one per "
+        "line) by analogy to a lexicon of known words.  Writes lines of "
+        "tab-separated word, lemma, stem, paradigm and form.")
+    parser.add_argument("lexicon", help="lexicon of known words")
+    parser.add_argument("words", nargs="?", default="-",
+                        help="file of unknown words (default: standard "
+                        "input)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS,
+                        default="auto", help="format of the lexicon")
+    parser.add_argument("--no-poss", action="store_true",
+                        help="do not recognise possessive suffixes")
+    parser.add_argument("--no-clitic", action="store_true",
+                        help="do not recognise clitics")
+    opts = parser.parse_args(argv)
+    kwargs = {}
+    for name in ("no_poss", "no_clitic"):
+        if getattr(opts, name):
+            kwargs[name] = True
+    guesser = Guesser(open_input(opts.lexicon, opts.input_format), **kwargs)
+    if opts.words == "-":
+        f = sys.stdin
+    else:
+        f = open(opts.words, encoding="utf-8")
+    try:
+        words = (line.strip() for line in f)
+        for word, guesses in guesser.guess_stream(x for x in words if x):
+            for lemma, stem, code, form in guesses:
+                print("\t".join((word, lemma, stem, code,
+                                 formnames.form_to_str(form))))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
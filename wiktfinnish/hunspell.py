@@ -0,0 +1,313 @@
+# Exporting a lexicon as a Hunspell dictionary (.aff and .dic files).
+# The affix classes are derived from the same paradigm classes and
+# possessive/clitic continuation classes as the transducer export (see
+# fst.py): each paradigm class becomes a suffix flag whose rules append
+# the suffixes of the base forms, and each continuation class becomes a
+# suffix flag for the possessive suffixes and clitics, used as the
+# continuation class of the base form rules (Hunspell's twofold suffix
+# stripping).  The stems in the .dic file have the NEEDAFFIX flag, so only
+# inflected forms are accepted.  Each .dic line has the lemma as the
+# "st:" field and affix rules have the form tags as "is:" fields.
+#
+# Words containing whitespace cannot be checked by Hunspell and are not
+# exported.  The rules only use the subset of the affix file format
+# understood by AffixData, which is used to verify that the dictionary
+# accepts exactly the forms generated by inflect():
+#
+#   python3 -m wiktfinnish.hunspell lexicon.jsonl fi_FI --verify 100
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+import random
+import argparse
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.fst import FstExport, lexeme_lemma
+
+# Flag for stems and affixes that are not words without another affix.
+NEEDAFFIX_FLAG = 1
+
+# Largest flag value allowed with "FLAG num".
+MAX_FLAG = 65000
+
+# Characters suggested by Hunspell for misspelled words.
+TRY_CHARS = "aitesnulokämrvpyhjdögfbcwxzqåéšžAITESNULOKÄMRVPYHJDÖGFBCWXZQÅ-'"
+
+
+def escape(word):
+    """Escapes "/" in a word or affix."""
+    return word.replace("/", "\\/")
+
+
+def unescape(word):
+    return word.replace("\\/", "/")
+
+
+def has_space(s):
+    return any(x.isspace() for x in s)
+
+
+class HunspellExport(object):
+    """Converts an FstExport into Hunspell affix flags and rules."""
+
+    def __init__(self, export):
+        self.export = export
+        self.flags = {}
+        for name in list(export.classes) + list(export.conts):
+            self.flags[name] = len(self.flags) + 2
+        if len(self.flags) + 1 > MAX_FLAG:
+            raise ValueError("too many affix classes for Hunspell: {}"
+                             .format(len(self.flags)))
+        self.skipped = 0
+
+    def needs_affix(self, cont):
+        """Returns True if the continuation class ``cont`` does not accept
+        the base form without a suffix."""
+        return not any(not suffix for tags, suffix in self.export.conts[cont])
+
+    def cont_flags(self, cont):
+        """Returns the flags of the continuation class ``cont`` added to
+        a rule or a stem."""
+        if cont is None:
+            return []
+        flags = [self.flags[cont]]
+        if self.needs_affix(cont):
+            flags.append(NEEDAFFIX_FLAG)
+        return flags
+
+    def rules(self):
+        """Iterates over (flag, rules) tuples, where rules is a list of
+        (suffix, continuation flags, tags) tuples."""
+        export = self.export
+        for name, entries in export.classes.items():
+            rules = []
+            for tags, suffix, cont in entries:
+                if has_space(suffix):
+                    self.skipped += 1
+                    continue
+                rules.append((suffix, self.cont_flags(cont), tags))
+            yield self.flags[name], rules
+        for name, entries in export.conts.items():
+            rules = []
+            for tags, suffix in entries:
+                if has_space(suffix):
+                    self.skipped += 1
+                    continue
+                rules.append((suffix, [], tags))
+            yield self.flags[name], rules
+
+    def words(self):
+        """Iterates over (word, flags, lemma) tuples for the .dic file."""
+        export = self.export
+        for lemma, stem, name in export.entries:
+            if has_space(lemma):
+                self.skipped += 1
+                continue
+            if stem:
+                if has_space(stem):
+                    self.skipped += 1
+                    continue
+                yield stem, [self.flags[name], NEEDAFFIX_FLAG], lemma
+                continue
+            # The class contains full words
+            for tags, suffix, cont in export.classes[name]:
+                if not suffix or has_space(suffix):
+                    self.skipped += 1
+                    continue
+                yield suffix, self.cont_flags(cont), lemma
+
+    def write_aff(self, f):
+        """Writes the affix file into the text file ``f``."""
+        f.write("SET UTF-8\n")
+        f.write("FLAG num\n")
+        f.write("TRY {}\n".format(TRY_CHARS))
+        f.write("NEEDAFFIX {}\n".format(NEEDAFFIX_FLAG))
+        for flag, rules in self.rules():
+            if not rules:
+                continue
+            f.write("\nSFX {} Y {}\n".format(flag, len(rules)))
+            for suffix, flags, tags in rules:
+                add = escape(suffix) or "0"
+                if flags:
+                    add += "/" + ",".join(str(x) for x in flags)
+                line = "SFX {} 0 {} .".format(flag, add)
+                if tags:
+                    line += " is:" + "".join(tags)
+                f.write(line + "\n")
+
+    def write_dic(self, f):
+        """Writes the dictionary file into the text file ``f``."""
+        lines = []
+        for word, flags, lemma in self.words():
+            line = escape(word)
+            if flags:
+                line += "/" + ",".join(str(x) for x in flags)
+            lines.append("{} st:{}\n".format(line, lemma))
+        f.write("{}\n".format(len(lines)))
+        f.writelines(lines)
+
+
+def write_hunspell(lexemes, path, **kwargs):
+    """Writes a Hunspell dictionary of the lexemes in ``lexemes`` into
+    ``path``.aff and ``path``.dic.  The keyword arguments are as for
+    inflect_paradigm().  Returns the HunspellExport."""
+    export = FstExport(**kwargs)
+    export.add_lexicon(lexemes)
+    hunspell = HunspellExport(export)
+    with open(path + ".aff", "w", encoding="utf-8") as f:
+        hunspell.write_aff(f)
+    with open(path + ".dic", "w", encoding="utf-8") as f:
+        hunspell.write_dic(f)
+    return hunspell
+
+
+class AffixData(object):
+    """Reads a dictionary written by HunspellExport and expands it.  Only
+    the features used by HunspellExport are supported (suffixes without
+    stripping or conditions, twofold suffixes and NEEDAFFIX)."""
+
+    def __init__(self, path):
+        self.rules = {}
+        self.needaffix = None
+        with open(path + ".aff", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] == "NEEDAFFIX":
+                    self.needaffix = int(parts[1])
+                elif parts[0] == "SFX" and len(parts) >= 5:
+                    add, _, flags = parts[3].partition("/")
+                    add = unescape(add)
+                    if add == "0":
+                        add = ""
+                    self.rules.setdefault(int(parts[1]), []).append(
+                        (add, self.parse_flags(flags)))
+        self.words = {}
+        with open(path + ".dic", encoding="utf-8") as f:
+            next(f)
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                word, _, flags = parts[0].replace("\\/", "\0").partition("/")
+                lemma = None
+                for x in parts[1:]:
+                    if x.startswith("st:"):
+                        lemma = x[3:]
+                self.words.setdefault(lemma, []).append(
+                    (word.replace("\0", "/"), self.parse_flags(flags)))
+
+    def parse_flags(self, flags):
+        return tuple(int(x) for x in flags.split(",") if x)
+
+    def expand_word(self, word, flags):
+        """Returns the set of words accepted for the dictionary word
+        ``word`` with the flags ``flags``."""
+        ret = set()
+        if self.needaffix not in flags:
+            ret.add(word)
+        for flag in flags:
+            for add, cont in self.rules.get(flag, ()):
+                v = word + add
+                if self.needaffix not in cont:
+                    ret.add(v)
+                for flag2 in cont:
+                    for add2, _ in self.rules.get(flag2, ()):
+                        ret.add(v + add2)
+        return ret
+
+    def expand_lemma(self, lemma):
+        """Returns the set of words accepted for the dictionary words of
+        ``lemma``."""
+        ret = set()
+        for word, flags in self.words.get(lemma, ()):
+            ret.update(self.expand_word(word, flags))
+        return ret
+
+
+def verify(path, lexemes, sample=100, seed=0, **kwargs):
+    """Checks that the Hunspell dictionary at ``path`` accepts exactly the
+    forms generated by inflect_paradigm() for a random sample of
+    ``sample`` lexemes in ``lexemes`` (all if None).  The keyword
+    arguments must be the same as used for writing the dictionary.  Words
+    containing whitespace are ignored.  Returns a dictionary with the
+    number of lexemes and forms checked, the coverage, and lists of
+    (lemma, word) tuples for missing and extra words."""
+    lexemes = list(lexemes)
+    if sample is not None and sample < len(lexemes):
+        lexemes = random.Random(seed).sample(lexemes, sample)
+    data = AffixData(path)
+    expected = {}
+    for lexeme in lexemes:
+        lemma = lexeme_lemma(lexeme)
+        words = expected.setdefault(lemma, set())
+        for form, results in inflect_paradigm(lexeme["args"],
+                                              lexeme.get("pos"), **kwargs):
+            words.update(x for x in results if not has_space(x))
+    missing = []
+    extra = []
+    num_forms = 0
+    for lemma, words in expected.items():
+        got = data.expand_lemma(lemma)
+        num_forms += len(words)
+        missing.extend((lemma, x) for x in sorted(words - got))
+        extra.extend((lemma, x) for x in sorted(got - words))
+    return {"lexemes": len(lexemes),
+            "forms": num_forms,
+            "coverage": 1.0 - len(missing) / num_forms if num_forms else 1.0,
+            "missing": missing,
+            "extra": extra}
+
+
+def main(argv=None):
+    """Writes a Hunspell dictionary from the command line."""
+    # Imported here to avoid a circular import
+    from wiktfinnish.cli import open_input, INPUT_FORMATS
+
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.hunspell",
+        description="Write a Hunspell dictionary (PATH.aff and PATH.dic) "
+        "for a lexicon.")
+    parser.add_argument("input", help="input file (- for standard input)")
+    parser.add_argument("path", help="path of the dictionary without "
+                        "the .aff/.dic suffix")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS,
+                        default="auto", help="input format")
+    parser.add_argument("--no-comp", action="store_true",
+                        help="do not include comparatives")
+    parser.add_argument("--no-poss", action="store_true",
+                        help="do not include possessive suffixes")
+    parser.add_argument("--no-clitic", action="store_true",
+                        help="do not include clitics")
+    parser.add_argument("--verify", type=int, default=0, metavar="N",
+                        help="verify the dictionary for N random lexemes")
+    opts = parser.parse_args(argv)
+    kwargs = {}
+    for name in ("no_comp", "no_poss", "no_clitic"):
+        if getattr(opts, name):
+            kwargs[name] = True
+    lexemes = open_input(opts.input, opts.input_format)
+    if opts.verify:
+        lexemes = list(lexemes)
+    hunspell = write_hunspell(lexemes, opts.path, **kwargs)
+    print("{} words, {} affix classes, {} items skipped".format(
+        len(hunspell.export.entries), len(hunspell.flags), hunspell.skipped),
+          file=sys.stderr)
+    if opts.verify:
+        result = verify(opts.path, lexemes, opts.verify, **kwargs)
+        print("verified {} lexemes, {} forms: coverage {:.4f}, {} missing, "
+              "{} extra".format(result["lexemes"], result["forms"],
+                                result["coverage"], len(result["missing"]),
+                                len(result["extra"])), file=sys.stderr)
+        for lemma, word in result["missing"][:20]:
+            print("missing: {} {}".format(lemma, word), file=sys.stderr)
+        for lemma, word in result["extra"][:20]:
+            print("extra: {} {}".format(lemma, word), file=sys.stderr)
+        if result["missing"] or result["extra"]:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
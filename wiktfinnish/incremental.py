@@ -0,0 +1,175 @@
+# Generating complete paradigms for a lexicon into a form store, and
+# incrementally regenerating only the lexemes whose declension/conjugation
+# specification or arguments have changed since the store was built.
+#
+# A form store is a JSON Lines file.  The first line is a header containing
+# the specification fingerprint, the per-declension hashes and the options
+# used for enumerating forms.  Each following line contains one lexeme:
+#
+#   {"id": ..., "pos": ..., "args": {...}, "args_hash": ..., "spec_hash": ...,
+#    "forms": [[[vform, comp, case, poss, clitic], [surface, ...]], ...]}
+#
+# A delta file has the same format, except that it may also contain
+# records of the form {"id": ..., "deleted": true} for lexemes that have
+# been removed from the lexicon.
+#
+# A lexeme is given as a dictionary with keys "id" (a string or an integer
+# identifying the lexeme), "args" (the declension/conjugation arguments,
+# including "template_name"), and optionally "pos".
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import json
+from wiktfinnish import fingerprint
+from wiktfinnish.inflect import inflect_paradigm, paradigm_pos
+
+# Name and version of the store format.  These are saved in the header.
+STORE_FORMAT = "wiktfinnish-forms"
+STORE_VERSION = 1
+
+
+def store_header(**kwargs):
+    """Returns the header for a form store or delta generated with the
+    current specifications.  The keyword arguments are the options
+    passed to ``all_forms_list()``."""
+    return {"format": STORE_FORMAT,
+            "version": STORE_VERSION,
+            "fingerprint": fingerprint.spec_fingerprint(),
+            "spec_hashes": fingerprint.spec_hashes(),
+            "options": kwargs}
+
+
+def lexeme_record(lexeme, **kwargs):
+    """Generates all forms for ``lexeme`` and returns the record to be
+    saved in a form store."""
+    args = lexeme["args"]
+    pos = paradigm_pos(args, lexeme.get("pos"))
+    forms = inflect_paradigm(args, pos, **kwargs)
+    return {"id": lexeme["id"],
+            "pos": pos,
+            "args": args,
+            "args_hash": fingerprint.args_hash(args, pos),
+            "spec_hash": fingerprint.spec_hash(args["template_name"]),
+            "forms": [[list(form), results] for form, results in forms]}
+
+
+def write_record(f, record):
+    """Writes a single record (or header) as a line into ``f``."""
+    f.write(json.dumps(record, ensure_ascii=False))
+    f.write("\n")
+
+
+def read_store(path):
+    """Reads the form store (or delta) at ``path``.  Returns (header,
+    records), where records is an iterator over the lexeme records in the
+    file.  Raises ValueError if the file is not a form store."""
+    f = open(path, "r", encoding="utf-8")
+    line = f.readline()
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != STORE_FORMAT:
+        f.close()
+        raise ValueError("{}: not a form store".format(path))
+    if header.get("version") != STORE_VERSION:
+        f.close()
+        raise ValueError("{}: unsupported form store version {}"
+                         "".format(path, header.get("version")))
+
+    def records():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, records()
+
+
+def build_store(lexemes, path, **kwargs):
+    """Generates all forms for the lexemes in ``lexemes`` and writes them
+    into a new form store at ``path``.  The keyword arguments are passed
+    to ``all_forms_list()``.  Returns the number of lexemes written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        write_record(f, store_header(**kwargs))
+        for lexeme in lexemes:
+            write_record(f, lexeme_record(lexeme, **kwargs))
+            count += 1
+    return count
+
+
+def incremental_build(lexemes, old_path, delta_path, **kwargs):
+    """Compares the lexemes in ``lexemes`` against the form store at
+    ``old_path`` and writes a delta into ``delta_path`` containing
+    regenerated records for the lexemes that are new, whose arguments have
+    changed, or whose declension/conjugation specification has changed, as
+    well as deletion records for lexemes no longer present.  Only the
+    hashes of the old store are kept in memory.  The keyword arguments are
+    passed to ``all_forms_list()``; if they differ from those used for
+    building the old store, all lexemes are regenerated.  Returns a
+    dictionary with counts of unchanged, changed, added and deleted
+    lexemes."""
+    header, records = read_store(old_path)
+    same_options = header.get("options", {}) == kwargs
+    same_specs = fingerprint.check_fingerprint(header.get("fingerprint"))
+
+    old_hashes = {}
+    for record in records:
+        old_hashes[record["id"]] = (record["args_hash"], record["spec_hash"])
+
+    stats = {"unchanged": 0, "changed": 0, "added": 0, "deleted": 0}
+    with open(delta_path, "w", encoding="utf-8") as f:
+        write_record(f, store_header(**kwargs))
+        for lexeme in lexemes:
+            lexeme_id = lexeme["id"]
+            old = old_hashes.pop(lexeme_id, None)
+            if old is not None and same_options:
+                args = lexeme["args"]
+                pos = paradigm_pos(args, lexeme.get("pos"))
+                old_args_hash, old_spec_hash = old
+                if (old_args_hash == fingerprint.args_hash(args, pos) and
+                    (same_specs or old_spec_hash ==
+                     fingerprint.spec_hash(args["template_name"]))):
+                    stats["unchanged"] += 1
+                    continue
+            write_record(f, lexeme_record(lexeme, **kwargs))
+            if old is None:
+                stats["added"] += 1
+            else:
+                stats["changed"] += 1
+        # Any lexemes left in old_hashes have been removed from the lexicon
+        for lexeme_id in old_hashes:
+            write_record(f, {"id": lexeme_id, "deleted": True})
+            stats["deleted"] += 1
+    return stats
+
+
+def apply_delta(old_path, delta_path, new_path):
+    """Merges the delta at ``delta_path`` into the form store at
+    ``old_path``, writing the result into ``new_path``.  Records in the
+    delta replace records with the same id in the old store; new
+    records are appended at the end.  The header of the delta becomes the
+    header of the new store.  Returns the number of lexemes in the new
+    store."""
+    delta_header, delta_records = read_store(delta_path)
+    updates = {}
+    for record in delta_records:
+        updates[record["id"]] = record
+
+    header, records = read_store(old_path)
+    count = 0
+    with open(new_path, "w", encoding="utf-8") as f:
+        write_record(f, delta_header)
+        for record in records:
+            record = updates.pop(record["id"], record)
+            if record.get("deleted"):
+                continue
+            write_record(f, record)
+            count += 1
+        for record in updates.values():
+            if record.get("deleted"):
+                continue
+            write_record(f, record)
+            count += 1
+    return count
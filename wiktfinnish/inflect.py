@@ -4,6 +4,7 @@
 # Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
 
 import re
+import threading
 from wiktfinnish import nounspecs
 from wiktfinnish import verbspecs
 from wiktfinnish import formnames
@@ -86,10 +87,33 @@ argument_name_map = {
 }
 
 
+# Regular expression for checking whether clean_empty() needs to insert
+# an apostrophe (an EMPTY_CHAR between a long vowel and the same vowel).
+EMPTY_VOWELS_RE = re.compile("[aeiouyäöAEIOUYÄÖ]([aeiouyäöAEIOUYÄÖ])" +
+                             EMPTY_CHAR + r"\1")
+
 # Set of conjugations/declensions for which an undefined warning has already
-# been printed
+# been printed.  This is updated while holding cache_lock.
 undef_decl_warned = set()
 
+# Lock held while adding entries to the module-level caches and sets.
+# Lookups do not take the lock; computing a missing value twice in
+# different threads is harmless.
+cache_lock = threading.Lock()
+
+# Marker for values not found in caches whose values may be None.
+MISSING = object()
+
+
+def first_undefined(name):
+    """Records that the undefined conjugation/declension ``name`` has been
+    seen.  Returns True only the first time (in any thread)."""
+    with cache_lock:
+        if name in undef_decl_warned:
+            return False
+        undef_decl_warned.add(name)
+        return True
+
 
 def needs_aou(word):
     """Returns true if the characters in the word suggest "a", "o", or "u"
@@ -244,23 +268,311 @@ def process_template(template, args, ill_sg_vowel=None):
             parts.append(x)
     v = "".join(parts)
     if v.find(EMPTY_CHAR) >= 0:
+        v = clean_empty(v)
+    return v
+
+
+def clean_empty(v):
+    """Removes EMPTY_CHAR markers from a processed template, inserting an
+    apostrophe where the removal would otherwise join a long vowel with
+    the same vowel."""
+    if EMPTY_VOWELS_RE.search(v):
         for ch in "aeiouyäöAEIOUYÄÖ":
             v = re.sub("([aeiouyäöAEIOUYÄÖ]" + ch + ")" + EMPTY_CHAR +
                        "(" + ch + ")", r"\1'\2", v)
-        v = re.sub(EMPTY_CHAR, "", v)
+    return v.replace(EMPTY_CHAR, "")
+
+
+######################################################################
+# Templates are normally of the form "1..." where "1" is the stem of the
+# word and the rest only depends on the other arguments of the
+# declension/conjugation (gradation, final vowel, a/ä), the vowel
+# harmony class of the stem, and the vowel that illative singular
+# would use after the stem.  Such templates are compiled symbolically
+# into a suffix once for each combination of these, and inflecting a
+# word then reduces to concatenating the stem and the suffix.  Templates
+# whose special characters would need to look at the actual characters
+# of the stem (e.g., "-" or "/" deleting characters from the stem, or
+# "D" directly after the stem) fall back to process_template().
+######################################################################
+
+# Cache of stem classes (see stem_class()).  This is cleared when it
+# grows too large.
+stem_class_cache = {}
+
+# Cache of template information for compiling.  This maps a template to
+# a tuple of the argument digits it uses other than "1", or None if the
+# template is not of a form that can be compiled.
+template_info_cache = {}
+
+# Cache of compiled templates.  The key is (template, ill_sg_vowel,
+# par_sg_a, argument values, stem class) and the value is (suffix,
+# needs_cleanup), or None if the template cannot be compiled for this key.
+compiled_template_cache = {}
+
+# Maximum number of entries in the caches above before they are cleared.
+MAX_CACHE_SIZE = 100000
+
+# Regular expressions used for compiling templates
+VOWEL_RE = re.compile(r"([aeiouyåäöAEIOUYÅÄÖ])[^aeiouyåäöAEIOUYÅÄÖ]*$")
+E_ACUTE_RE = re.compile(r"[éÉ][^aeiouyåäöAEIOUYÅÄÖ]*$")
+AOU_RE = re.compile(r"[aouAOU][^yäöYÄÖ]*$")
+FRONT_RE = re.compile(r"[yäöYÄÖ]")
+
+
+def stem_class(stem):
+    """Returns the class of a stem for compiling templates.  This is a tuple
+    (aou, kind, vowel), where aou indicates back vowel harmony, and vowel
+    is the vowel that "@" would produce directly after the stem.  kind
+    tells how the vowel was determined: "v" from the last vowel of the
+    stem, "e" from "é" in the stem, "c" from the last character of the stem
+    (which only applies if nothing follows the stem), or None for an empty
+    stem."""
+    cls = stem_class_cache.get(stem)
+    if cls is not None:
+        return cls
+    aou = AOU_RE.search(stem) is not None
+    m = VOWEL_RE.search(stem)
+    if m:
+        cls = (aou, "v", m.group(1).lower())
+    elif E_ACUTE_RE.search(stem):
+        cls = (aou, "e", "e")
+    elif stem:
+        cls = (aou, "c", last_char_to_vowel(stem[-1]))
+    else:
+        cls = (aou, None, None)
+    with cache_lock:
+        if len(stem_class_cache) >= MAX_CACHE_SIZE:
+            stem_class_cache.clear()
+        stem_class_cache[stem] = cls
+    return cls
+
+
+def template_info(template):
+    """Returns a tuple of the argument digits other than "1" used by
+    ``template``, or None if the template cannot be compiled (it does not
+    begin with the stem or uses the stem elsewhere)."""
+    info = template_info_cache.get(template, MISSING)
+    if info is not MISSING:
+        return info
+    if not template.startswith("1") or template.find("1", 1) >= 0:
+        info = None
+    else:
+        info = tuple(sorted(set(x for x in template[1:] if x.isdigit())))
+    with cache_lock:
+        template_info_cache[template] = info
+    return info
+
+
+def get_arg(args, x):
+    """Returns the value of the template argument ``x`` (a digit) from
+    ``args``, the same way as process_template()."""
+    k = int(x)
+    if k in args:
+        return args[k]
+    return args.get(x, "")
+
+
+def compile_template(template, args, cls, ill_sg_vowel=None):
+    """Compiles ``template`` into a suffix to be appended to any stem of
+    class ``cls`` (see stem_class()), using the values of other arguments
+    from ``args``.  Returns (suffix, needs_cleanup), or None if the result
+    depends on the characters of the stem or the template would fail.
+    If needs_cleanup is True, clean_empty() must be applied to the
+    concatenated stem and suffix."""
+    aou, kind, stem_vowel = cls
+    parts = []
+    delparts = []
+
+    def tail_needs_aou():
+        p = "".join(parts + delparts)
+        if AOU_RE.search(p):
+            return True
+        if FRONT_RE.search(p):
+            return False
+        return aou
+
+    for x in template[1:]:
+        if x.isdigit():
+            v = get_arg(args, x)
+            if v == "(')":
+                v = ""
+            if x == "9":
+                if "par_sg_a" in args:
+                    parts.append(args["par_sg_a"])
+                else:
+                    if not delparts:
+                        return None
+                    parts.append(delparts[-1])
+            if x == "3" and not v:
+                v = EMPTY_CHAR
+            for y in v:
+                parts.append(y)
+        elif x == "@":
+            if ill_sg_vowel is not None:
+                parts.append(ill_sg_vowel)
+                continue
+            p = "".join(parts + delparts)
+            m = VOWEL_RE.search(p)
+            if m:
+                parts.append(m.group(1).lower())
+            elif kind == "v":
+                parts.append(stem_vowel)
+            elif E_ACUTE_RE.search(p) or kind == "e":
+                parts.append("e")
+            elif p:
+                parts.append(last_char_to_vowel(p[-1]))
+            elif kind == "c":
+                parts.append(stem_vowel)
+            else:
+                return None
+        elif x == "A":
+            a = args.get("par_sg_a", None)
+            if a:
+                parts.append(a)
+            else:
+                parts.append("a" if tail_needs_aou() else "ä")
+        elif x == "O":
+            parts.append("o" if tail_needs_aou() else "ö")
+        elif x == "U":
+            parts.append("u" if tail_needs_aou() else "y")
+        elif x == "D":
+            if not parts:
+                return None
+            if parts[-1] in "rnml":
+                parts.append(parts[-1])
+            else:
+                parts.append("d")
+        elif x == "I":
+            if not delparts:
+                return None
+            if delparts[-1] == "i":
+                parts.append("e")
+            else:
+                parts.append(delparts[-1])
+        elif x == "-":
+            if not parts:
+                return None
+            p = parts.pop()
+            if p not in "aeiouyäöp":
+                return None
+            delparts.append(p)
+        elif x == "/":
+            if len(parts) < 2:
+                return None
+            p = parts.pop()
+            if p not in "aeiouyäö":
+                return None
+            p2 = parts.pop()
+            if p2 not in "aeiouyäö":
+                return None
+            parts.append(p)
+        else:
+            parts.append(x)
+    suffix = "".join(parts)
+    return suffix, suffix.find(EMPTY_CHAR) >= 0
+
+
+def compiled_template(template, info, args, cls, ill_sg_vowel=None):
+    """Returns the compiled form of ``template`` for stems of class
+    ``cls`` (see compile_template()), using a cache shared by all words
+    with the same arguments other than the stem.  ``info`` is the value
+    returned by template_info() for the template."""
+    key = (template, ill_sg_vowel, args.get("par_sg_a", None),
+           tuple(get_arg(args, x) for x in info), cls)
+    compiled = compiled_template_cache.get(key, MISSING)
+    if compiled is not MISSING:
+        return compiled
+    compiled = compile_template(template, args, cls,
+                                ill_sg_vowel=ill_sg_vowel)
+    with cache_lock:
+        if len(compiled_template_cache) >= MAX_CACHE_SIZE:
+            compiled_template_cache.clear()
+        compiled_template_cache[key] = compiled
+    return compiled
+
+
+def apply_template(template, args, ill_sg_vowel=None):
+    """Processes ``template`` like process_template(), but using a
+    compiled suffix shared by all stems of the same class whenever
+    possible."""
+    info = template_info(template)
+    if info is None:
+        return process_template(template, args, ill_sg_vowel=ill_sg_vowel)
+    stem = get_arg(args, "1")
+    if stem == "(')":
+        stem = ""
+    compiled = compiled_template(template, info, args, stem_class(stem),
+                                 ill_sg_vowel=ill_sg_vowel)
+    if compiled is None:
+        return process_template(template, args, ill_sg_vowel=ill_sg_vowel)
+    suffix, needs_cleanup = compiled
+    v = stem + suffix
+    if needs_cleanup:
+        v = clean_empty(v)
     return v
 
 
-def add_possessive(results, form, poss):
-    """Adds a possessive suffix to each result."""
+def suffix_table(name, args):
+    """Returns the suffix table of the declension/conjugation ``name`` for
+    words having the same arguments as ``args`` other than the stem, and
+    a stem of the same class as the stem in ``args``.  The table maps each
+    template name of the declension (e.g., "gen-sg" or "gen-sg-poss") to a
+    list of suffixes to be appended to the stem, one for each template.
+    The suffix is None for templates whose result depends on the
+    characters of the stem.  Returns None if the declension is not
+    known."""
+    name = nounspecs.decl_name_map.get(name, name)
+    decl = nounspecs.noun_decls.get(name) or verbspecs.verb_conjs.get(name)
+    if decl is None:
+        return None
+    stem = get_arg(args, "1")
+    if stem == "(')":
+        stem = ""
+    cls = stem_class(stem)
+    table = {}
+    for k, templates in decl.items():
+        if isinstance(templates, str):
+            templates = [templates]
+        elif not isinstance(templates, list):
+            continue
+        vowels = [None]
+        if k in ("ill-sg", "ill-sg-poss"):
+            vowels = [args.get("ill_sg_vowel", None)]
+            if args.get("ill_sg_vowel2", None) is not None:
+                vowels.append(args["ill_sg_vowel2"])
+        suffixes = []
+        for template in templates:
+            info = template_info(template)
+            for vowel in vowels:
+                if info is None:
+                    suffixes.append(None)
+                    continue
+                compiled = compiled_template(template, info, args, cls,
+                                             ill_sg_vowel=vowel)
+                if compiled is None or compiled[1]:
+                    suffixes.append(None)
+                else:
+                    suffixes.append(compiled[0])
+        table[k] = suffixes
+    return table
+
+
+def iter_possessive(results, form, poss):
+    """Iterates over the results with the possessive suffix ``poss`` added
+    (``results`` itself if ``poss`` is empty).  This is a stage in the
+    pipeline used by iter_inflect()."""
     if not poss:
-        return results
+        yield from results
+        return
 
     # Add possessive suffix
     suffixes = nounspecs.possessive_suffixes[poss]
     if isinstance(suffixes, str):
         suffixes = [suffixes]
-    results2 = []
+    elif not isinstance(results, (list, tuple)):
+        # Results are iterated once for each suffix
+        results = list(results)
     for suffix in suffixes:
         for v in results:
             parts = list(x for x in v)
@@ -292,31 +604,45 @@ def add_possessive(results, form, poss):
                 v += v[-1]
                 v += suffix[1:]
             if v:
-                results2.append(v)
-    return results2
+                yield v
 
 
-def add_clitic(results, clitic):
-    """Adds a clitic to the results."""
-    if not clitic or clitic == "__dummy__":  # dummy used tatufin/makemorph.py
+def add_possessive(results, form, poss):
+    """Adds a possessive suffix to each result."""
+    if not poss:
         return results
+    return list(iter_possessive(results, form, poss))
+
+
+def iter_clitic(results, clitic):
+    """Iterates over the results with the clitic ``clitic`` added
+    (``results`` itself if ``clitic`` is empty).  This is a stage in the
+    pipeline used by iter_inflect()."""
+    if not clitic or clitic == "__dummy__":  # dummy used tatufin/makemorph.py
+        yield from results
+        return
 
-    results2 = []
     for v in results:
         args = {"1": v}
-        ret = process_template("1" + clitic, args)
+        ret = apply_template("1" + clitic, args)
         if v:
-            results2.append(ret)
+            yield ret
         if clitic == "kOs" and v[-1] not in "bcdfghjklmpqrstvwxz":
-            ret = process_template("1" + "ks", args)
+            ret = apply_template("1" + "ks", args)
             if ret:
-                results2.append(ret)
+                yield ret
         if clitic == "kOs" and v[-1] == "t":
             args = {"1": v[:-1]}
-            ret = process_template("1" + "ks", args)
+            ret = apply_template("1" + "ks", args)
             if ret:
-                results2.append(ret)
-    return results2
+                yield ret
+
+
+def add_clitic(results, clitic):
+    """Adds a clitic to the results."""
+    if not clitic or clitic == "__dummy__":  # dummy used tatufin/makemorph.py
+        return results
+    return list(iter_clitic(results, clitic))
 
 
 def clean_exception(v):
@@ -534,30 +860,44 @@ def inflect_using(decls, name, args, form, use_poss, use_clitic):
 
         # Generate word forms for each template
         for template in templates:
-            v = process_template(template, args, ill_sg_vowel=ill_sg_vowel)
+            v = apply_template(template, args, ill_sg_vowel=ill_sg_vowel)
             if v and v not in results:
                 results.append(v)
             # Kludge to handle certain words with two vowel choices in ill-sg
             if ill_sg_vowel2 is not None:
-                v = process_template(template, args, ill_sg_vowel=ill_sg_vowel2)
+                v = apply_template(template, args,
+                                   ill_sg_vowel=ill_sg_vowel2)
                 if v and v not in results:
                     results.append(v)
     return results
 
 
-def inflect_nominal(name, args, form, comp="", poss="",
-                    clitic="", force_n=False):
-    """Inflects the word whose declension/conjugation information is in
-    ``args`` to the form indicated by ``form``.  ``poss`` indicates
-    optional possessive suffix form(s).  Returns None if the
-    form is invalid for the word."""
+def iter_nominal(name, args, form, comp="", poss="",
+                 clitic="", force_n=False):
+    """Iterates over the inflections of the word whose
+    declension/conjugation information is in ``args`` to the form
+    indicated by ``form``.  ``poss`` indicates optional possessive
+    suffix form(s).  Yields nothing if the form is invalid for the
+    word."""
+    stage = nominal_stage(name, args, form, comp=comp, poss=poss,
+                          clitic=clitic, force_n=force_n)
+    if stage is None:
+        return
+    results, poss = stage
+
+    # Add possessive suffix and any clitic or other suffix.
+    yield from iter_clitic(iter_possessive(results, form, poss), clitic)
+
+
+def nominal_stage(name, args, form, comp="", poss="",
+                  clitic="", force_n=False):
+    """Returns (results, poss), where results are the inflections of the
+    word to the form before the possessive suffix and clitic stages
+    (see iter_nominal()) and poss is the possessive suffix to add to
+    them.  Returns None if the form is invalid for the word."""
 
     if name not in nounspecs.noun_decls and name not in nounspecs.decl_name_map:
-        if name not in undef_decl_warned:
-            undef_decl_warned.add(name)
-            # print("inflect_nominal: unrecognized declension", name,
-            #       "for", args)
-        return []
+        return None
     assert form in formnames.CASE_FORMS
     assert comp in formnames.COMPARATIVE_FORMS
     assert poss in formnames.POSSESSIVE_FORMS
@@ -569,24 +909,33 @@ def inflect_nominal(name, args, form, comp="", poss="",
         n = args["n"].strip()
         if n in ("p", "pl", "Pl", "plural", "Plural"):
             if form.endswith("-sg"):
-                return []
+                return None
         if n in ("s", "sg", "Sg", "singular", "Singular"):
             if form.endswith("-pl"):
-                return []
+                return None
     # Another way to mark that only singulars are generated
     if not force_n and args.get("nopl", "0") != "0":
         if form.endswith("-pl"):
-            return []
+            return None
     # A third way to mark that only plurals are generated
     if not force_n and args.get("nosg", "0") != "0":
         if form.endswith("-sg"):
-            return []
+            return None
 
     # In comitative, force possessive suffix if not adj and none provided
     if args.get("pos") not in ("adj", "pron", "num"):
         if form == "cmt" and not poss:
             poss = "3x"
 
+    return nominal_base(name, args, form, comp, poss, clitic), poss
+
+
+def nominal_base(name, args, form, comp="", poss="", clitic=""):
+    """Returns the inflections of the word whose declension/conjugation
+    information is in ``args`` to the form indicated by ``form`` and
+    comparison ``comp``, without possessive suffix and clitic.  ``poss``
+    and ``clitic`` select the templates used when they follow."""
+
     # Only allow comparison for forms treated as adjectives.
     if comp != "" and args.get("pos") != "adj":
         print("Comparative/superlative without pos=adj:", args)
@@ -637,27 +986,43 @@ def inflect_nominal(name, args, form, comp="", poss="",
         for v in results:
             results2.append(v + "e")
         results = results2
-
-    # Add possessive suffix
-    results = add_possessive(results, form, poss)
-
-    # Add any clitic or other suffix.
-    results = add_clitic(results, clitic)
     return results
 
 
-def inflect_verbal(name, args, vform, comp="", case="",
-                   poss="", clitic=""):
+def inflect_nominal(name, args, form, comp="", poss="",
+                    clitic="", force_n=False):
     """Inflects the word whose declension/conjugation information is in
-    ``args`` to the form indicated by ``vform``.  ``poss`` indicates
+    ``args`` to the form indicated by ``form``.  ``poss`` indicates
     optional possessive suffix form(s).  Returns None if the
     form is invalid for the word."""
+    return list(iter_nominal(name, args, form, comp=comp, poss=poss,
+                             clitic=clitic, force_n=force_n))
+
+
+def iter_verbal(name, args, vform, comp="", case="",
+                poss="", clitic=""):
+    """Iterates over the inflections of the word whose
+    declension/conjugation information is in ``args`` to the form
+    indicated by ``vform``.  ``poss`` indicates optional possessive
+    suffix form(s).  Yields nothing if the form is invalid for the
+    word."""
+    for results, form, poss in verbal_stages(name, args, vform, comp=comp,
+                                             case=case, poss=poss,
+                                             clitic=clitic):
+        # Add possessive suffix and any clitic or other suffix.
+        yield from iter_clitic(iter_possessive(results, form, poss), clitic)
+
+
+def verbal_stages(name, args, vform, comp="", case="",
+                  poss="", clitic=""):
+    """Iterates over groups (results, form, poss), where results are
+    inflections of the verb before the possessive suffix and clitic
+    stages (see iter_verbal()), form is the form name used for adding
+    the possessive suffix and poss is the possessive suffix to add.
+    Participles and infinitives inflected in case yield a group for
+    each verb form."""
     if name not in verbspecs.verb_conjs:
-        if name not in undef_decl_warned:
-            undef_decl_warned.add(name)
-            # print("inflect_verbal: unrecognized verb conjucation", name,
-            #       "for", args)
-        return []
+        return
     assert vform in formnames.VERB_FORMS
     assert poss in formnames.POSSESSIVE_FORMS
     assert comp in formnames.COMPARATIVE_FORMS
@@ -684,7 +1049,6 @@ def inflect_verbal(name, args, vform, comp="", case="",
                          "nega-part", "past-part", "past-pass-part",
                          "inf2", "inf2-pass", "inf3", "inf3-pass", "inf4",
                          "jA"):
-        results2 = []
         for v in results:
             if vform in ("pres-part", "pres-pass-part", "agnt-part"):
                 if len(v) < 4:
@@ -771,32 +1135,50 @@ def inflect_verbal(name, args, vform, comp="", case="",
                 name = "fi-decl-onneton"
                 args = {"1": v[:-3], "2": word_to_aae(v),
                         "pos": "adj"}
-            ret = inflect_nominal(name, args, case, comp=comp,
+            stage = nominal_stage(name, args, case, comp=comp,
                                   poss=poss, clitic=clitic)
-            results2.extend(ret)
-        return results2
+            if stage is not None:
+                yield stage[0], case, stage[1]
     else:
-        # Add possessive suffix
-        results = add_possessive(results, vform, poss)
-        # Add any clitic or other suffix.
-        results = add_clitic(results, clitic)
-        return results
+        yield results, vform, poss
 
 
-def inflect(args, form, force_n=False):
-    """This is a generic Finnish word inflection function.  This inflects
-    a word of class args["template_name"], having
-    conjugation/declension arguments ``args`` into the form indicated
-    by ``form``.  The form is indicated by (vform, comp, case, poss,
-    clitic).  This returns a list of inflected forms, the most
-    preferred one first.  If ``force_n`` is True, generates requested
-    number regardless of limitations specified in ``args``."""
+def inflect_verbal(name, args, vform, comp="", case="",
+                   poss="", clitic=""):
+    """Inflects the word whose declension/conjugation information is in
+    ``args`` to the form indicated by ``vform``.  ``poss`` indicates
+    optional possessive suffix form(s).  Returns None if the
+    form is invalid for the word."""
+    return list(iter_verbal(name, args, vform, comp=comp, case=case,
+                            poss=poss, clitic=clitic))
+
+
+def iter_results(args, form, force_n=False):
+    """Returns an iterator over the results of inflect() (including any
+    duplicates).  The results are generated lazily through the stages
+    of the pipeline (templates, possessive suffix, clitic)."""
+    return iter_suffixed(iter_stages(args, form, force_n=force_n), form[4])
+
+
+def iter_suffixed(groups, clitic):
+    """Iterates over the results in the groups returned by iter_stages()
+    with the possessive suffix and ``clitic`` added."""
+    for results, form, poss in groups:
+        yield from iter_clitic(iter_possessive(results, form, poss), clitic)
+
+
+def iter_stages(args, form, force_n=False):
+    """Returns an iterator over groups (results, form, poss), where
+    results are inflections of the word to ``form`` before the possessive
+    suffix and clitic stages, form is the form name used for adding the
+    possessive suffix and poss is the possessive suffix to add (which
+    may differ from the one in ``form``).  The templates used depend
+    only on whether ``form`` has a possessive suffix and a clitic."""
     name = args["template_name"]
     if name not in CONJ_DECL_NAMES:
-        if name not in undef_decl_warned:
-            undef_decl_warned.add(name)
+        if first_undefined(name):
             print("UNDEFINED DECLENSION/CONJUGATION:", name)
-        return []
+        return iter(())
     assert isinstance(args, dict)
     assert isinstance(form, (list, tuple))
     assert len(form) == 5
@@ -807,7 +1189,88 @@ def inflect(args, form, force_n=False):
     assert poss in formnames.POSSESSIVE_FORMS
     assert clitic in formnames.CLITIC_FORMS or clitic == "__dummy__"
     if vform:
-        return inflect_verbal(name, args, vform, comp=comp, case=case,
-                              poss=poss, clitic=clitic)
-    return inflect_nominal(name, args, case, comp=comp, poss=poss,
-                           clitic=clitic, force_n=force_n)
+        return verbal_stages(name, args, vform, comp=comp, case=case,
+                             poss=poss, clitic=clitic)
+    stage = nominal_stage(name, args, case, comp=comp, poss=poss,
+                          clitic=clitic, force_n=force_n)
+    if stage is None:
+        return iter(())
+    return iter(((stage[0], case, stage[1]),))
+
+
+def inflect(args, form, force_n=False):
+    """This is a generic Finnish word inflection function.  This inflects
+    a word of class args["template_name"], having
+    conjugation/declension arguments ``args`` into the form indicated
+    by ``form``.  The form is indicated by (vform, comp, case, poss,
+    clitic).  This returns a list of inflected forms, the most
+    preferred one first.  If ``force_n`` is True, generates requested
+    number regardless of limitations specified in ``args``."""
+    return list(iter_results(args, form, force_n=force_n))
+
+
+def iter_inflect(args, form, force_n=False, max_alternatives=None):
+    """Like inflect(), but iterates over the inflected forms lazily and
+    yields each distinct form only once (in the order of inflect()).  If
+    ``max_alternatives`` is given, stops after yielding that many forms,
+    without generating the rest."""
+    if max_alternatives is not None and max_alternatives <= 0:
+        return
+    seen = set()
+    for v in iter_results(args, form, force_n=force_n):
+        if v in seen:
+            continue
+        seen.add(v)
+        yield v
+        if max_alternatives is not None and len(seen) >= max_alternatives:
+            return
+
+
+def paradigm_pos(args, pos=None):
+    """Returns the part-of-speech used for enumerating the forms of the word
+    whose declension/conjugation is in ``args``.  ``pos`` overrides any
+    part-of-speech given in ``args``."""
+    if pos:
+        return pos
+    if args["template_name"].startswith("fi-conj"):
+        return "verb"
+    return args.get("pos") or "noun"
+
+
+def inflect_paradigm(args, pos=None, forms=None, **kwargs):
+    """Generates all inflected forms of the word whose
+    conjugation/declension arguments are in ``args``.  ``pos`` is the
+    part-of-speech of the word (derived from ``args`` if not given), and
+    the keyword arguments are passed to ``all_forms_list()`` to restrict
+    which forms are generated.  If ``forms`` is given, only the forms in
+    it are generated, in that order.  This returns a list of (form, results)
+    tuples, where form is a 5-tuple and results is the list returned by
+    inflect() for it.  Forms that do not exist for the word are
+    omitted.  Forms that are known to be equivalent (see equivalence.py)
+    are generated only once."""
+    # Imported here to avoid a circular import
+    from wiktfinnish.equivalence import lexeme_form_aliases, canonical_form
+
+    pos = paradigm_pos(args, pos)
+    if pos != "verb" and "pos" not in args:
+        # Comparatives are only generated for args marked as adjectives
+        args = args.copy()
+        args["pos"] = pos
+    aliases = lexeme_form_aliases(args)
+    done = {}
+    ret = []
+    if forms is None:
+        forms = formnames.all_forms_list(pos, **kwargs)
+    for form in forms:
+        if aliases:
+            canonical = canonical_form(form, aliases)
+            if canonical in done:
+                results = list(done[canonical])
+            else:
+                results = inflect(args, canonical)
+                done[canonical] = results
+        else:
+            results = inflect(args, form)
+        if results:
+            ret.append((form, results))
+    return ret
@@ -0,0 +1,137 @@
+# Streaming ingestion of Finnish declension/conjugation data from
+# wiktextract JSON Lines dumps.  The dump is memory-mapped and searched for
+# Finnish declension/conjugation template names as raw bytes, so that only
+# lines that can contain relevant data are decoded and parsed.
+#
+# The entries are converted into normalised lexeme records:
+#
+#   {"id": "talo:noun:0", "word": "talo", "pos": "noun",
+#    "args": {"template_name": "fi-decl-valo", "1": "tal", ...}}
+#
+# The last part of the id numbers the templates of the same word and
+# part-of-speech in the order they occur in the dump.  Entries of one
+# word are not always adjacent, so the number of templates seen is kept
+# for each (word, pos) pair; this is the only memory use that grows with
+# the dump, by one small entry per Finnish word (some tens of megabytes
+# for the whole Wiktionary).
+#
+# These can be passed directly to the functions in incremental.py and
+# expand.py.  Both the current wiktextract format (templates in
+# "inflection_templates" as {"name": ..., "args": {...}}) and the older one
+# (templates in "declension"/"conjugation" with a "template_name" key) are
+# supported.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import re
+import json
+import mmap
+
+# Regular expression for finding lines that may contain Finnish
+# declension/conjugation templates.
+TEMPLATE_RE = re.compile(rb'"fi-(?:decl|conj)')
+
+# Keys under which older versions of wiktextract stored the templates.
+LEGACY_KEYS = ("declension", "conjugation")
+
+
+def iter_matching_lines(buf):
+    """Iterates over the lines (as bytes) in ``buf`` (bytes or a
+    memory-mapped file) that contain a Finnish declension/conjugation
+    template name.  Other lines are skipped without being examined
+    line-by-line."""
+    pos = 0
+    size = len(buf)
+    while pos < size:
+        m = TEMPLATE_RE.search(buf, pos)
+        if m is None:
+            return
+        start = buf.rfind(b"\n", pos, m.start())
+        start = pos if start < 0 else start + 1
+        end = buf.find(b"\n", m.end())
+        if end < 0:
+            end = size
+        yield buf[start:end]
+        pos = end + 1
+
+
+def iter_file_lines(f):
+    """Iterates over the lines (as bytes) from the binary file object ``f``
+    that contain a Finnish declension/conjugation template name.  This is
+    used for input that cannot be memory-mapped (e.g., pipes)."""
+    for line in f:
+        if TEMPLATE_RE.search(line):
+            yield line
+
+
+def entry_templates(data):
+    """Returns a list of declension/conjugation argument dictionaries
+    (including "template_name") from a parsed wiktextract entry."""
+    ret = []
+    for t in data.get("inflection_templates", ()):
+        if not isinstance(t, dict):
+            continue
+        name = t.get("name", "")
+        if not name.startswith("fi-decl") and not name.startswith("fi-conj"):
+            continue
+        args = {str(k): v for k, v in t.get("args", {}).items()}
+        args["template_name"] = name
+        ret.append(args)
+    for key in LEGACY_KEYS:
+        for t in data.get(key, ()):
+            if not isinstance(t, dict):
+                continue
+            name = t.get("template_name", "")
+            if (not name.startswith("fi-decl") and
+                not name.startswith("fi-conj")):
+                continue
+            ret.append({str(k): v for k, v in t.items()})
+    return ret
+
+
+def parse_lines(lines):
+    """Parses wiktextract entries from ``lines`` (bytes) and yields
+    normalised lexeme records for their Finnish declension/conjugation
+    templates.  Lines that are not valid JSON or are for other languages
+    are skipped."""
+    # Number of templates seen for each (word, pos), for unique ids
+    counts = {}
+    for line in lines:
+        try:
+            data = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        lang_code = data.get("lang_code")
+        if lang_code is not None and lang_code != "fi":
+            continue
+        word = data.get("word", "")
+        pos = data.get("pos", "")
+        for args in entry_templates(data):
+            key = (word, pos)
+            n = counts.get(key, 0)
+            counts[key] = n + 1
+            yield {"id": "{}:{}:{}".format(word, pos, n),
+                   "word": word,
+                   "pos": pos,
+                   "args": args}
+
+
+def read_lexemes(source):
+    """Reads a wiktextract JSON Lines dump and yields normalised lexeme
+    records.  ``source`` may be a path, a memory-mapped file, bytes, or a
+    binary file object.  Paths are memory-mapped."""
+    if isinstance(source, (bytes, bytearray, mmap.mmap)):
+        yield from parse_lines(iter_matching_lines(source))
+        return
+    if not isinstance(source, str):
+        yield from parse_lines(iter_file_lines(source))
+        return
+    with open(source, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # Empty file
+        with mm:
+            yield from parse_lines(iter_matching_lines(mm))
@@ -0,0 +1,111 @@
+# Memoisation of generated paradigms for long-running processes (the
+# daemon and the HTTP server).  Generating all forms of a verb takes
+# seconds, so paradigms that have already been generated are kept in a
+# least-recently-used cache whose size is bounded by the total number of
+# forms stored in it.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import json
+import threading
+import collections
+from wiktfinnish.batch import lexeme_key
+from wiktfinnish.inflect import inflect_paradigm, paradigm_pos
+
+# Default maximum number of forms kept in a memo.
+DEFAULT_MAX_FORMS = 1000000
+
+
+def options_key(options):
+    """Returns a hashable key for the keyword arguments ``options`` to
+    inflect_paradigm()."""
+    return json.dumps(options, sort_keys=True)
+
+
+class ParadigmMemo(object):
+    """A thread-safe least-recently-used cache of paradigms generated by
+    inflect_paradigm(), keyed by the arguments, part-of-speech and
+    options.  The total number of forms in the cache is kept below
+    ``max_forms``."""
+
+    def __init__(self, max_forms=DEFAULT_MAX_FORMS):
+        self.max_forms = max_forms
+        self.num_forms = 0
+        self.hits = 0
+        self.misses = 0
+        self.cache = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, args, pos, options):
+        """Returns the cache key for a paradigm."""
+        return (lexeme_key(args), pos, options_key(options))
+
+    def get(self, key):
+        """Returns the cached paradigm for ``key``, or None if it is not
+        in the cache."""
+        with self.lock:
+            forms = self.cache.get(key)
+            if forms is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return forms
+
+    def size(self, value):
+        """Returns the number of forms in the cached value ``value``."""
+        return len(value)
+
+    def put(self, key, forms):
+        """Saves the paradigm ``forms`` (a list of (form, results) tuples)
+        under ``key``.  Paradigms larger than the cache are not saved."""
+        size = self.size(forms)
+        if size > self.max_forms:
+            return
+        with self.lock:
+            old = self.cache.pop(key, None)
+            if old is not None:
+                self.num_forms -= self.size(old)
+            self.cache[key] = forms
+            self.num_forms += size
+            while self.num_forms > self.max_forms:
+                _, old = self.cache.popitem(last=False)
+                self.num_forms -= self.size(old)
+
+    def stats(self):
+        """Returns a dictionary of statistics about the cache."""
+        with self.lock:
+            return {"paradigms": len(self.cache),
+                    "forms": self.num_forms,
+                    "hits": self.hits,
+                    "misses": self.misses}
+
+    def clear(self):
+        """Removes all paradigms from the cache."""
+        with self.lock:
+            self.cache.clear()
+            self.num_forms = 0
+
+
+class FormMemo(ParadigmMemo):
+    """A thread-safe least-recently-used cache of the results of
+    inflect() for individual forms."""
+
+    def key(self, args, form):
+        """Returns the cache key for ``form`` of the word ``args``."""
+        return (lexeme_key(args), tuple(form))
+
+    def size(self, value):
+        return 1
+
+
+def memo_paradigm(memo, args, pos=None, **kwargs):
+    """Returns the paradigm generated by inflect_paradigm(args, pos,
+    **kwargs), using ``memo`` (a ParadigmMemo) to cache the result."""
+    pos = paradigm_pos(args, pos)
+    key = memo.key(args, pos, kwargs)
+    forms = memo.get(key)
+    if forms is None:
+        forms = inflect_paradigm(args, pos, **kwargs)
+        memo.put(key, forms)
+    return forms
@@ -0,0 +1,351 @@
+# A local HTTP/JSON inflection service using only the standard library.
+# Concurrent single-form requests are coalesced into micro-batches that
+# are inflected together with inflect_many(), and results are served from
+# memos shared by all requests.  The following endpoints are supported
+# (all POST requests take and return JSON objects):
+#
+#   POST /inflect       {"args": {...}, "form": form}
+#                       -> {"results": [...]}
+#   POST /inflect_many  {"requests": [{"args": {...}, "form": form}, ...]}
+#                       -> {"results": [[...], ...]}
+#   POST /paradigm      {"args": {...}, "pos": ..., "options": {...}}
+#                       -> {"forms": [[form, [...]], ...]}
+#   POST /encode        {"args": {...}} -> {"stem": ..., "paradigm": ...}
+#   POST /decode        {"stem": ..., "paradigm": ..., "pos": ...}
+#                       -> {"args": {...}}
+#   GET /stats          request, batch and latency counters
+#
+# Forms may be given either as 5-element lists or as strings in the format
+# of formnames.form_to_str(); in responses they are strings.  The server
+# is started with:
+#
+#   python3 -m wiktfinnish.server --port 8080
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import socketserver
+import http.server
+import concurrent.futures
+from wiktfinnish import formnames
+from wiktfinnish.batch import inflect_many
+from wiktfinnish.stem import encode_paradigm, decode_paradigm
+from wiktfinnish.memo import ParadigmMemo, FormMemo, memo_paradigm
+from wiktfinnish.memo import DEFAULT_MAX_FORMS
+
+# Default maximum number of requests in a micro-batch.
+DEFAULT_MAX_BATCH = 256
+
+# Default time (in seconds) to wait for more requests before inflecting a
+# micro-batch.
+DEFAULT_MAX_DELAY = 0.002
+
+# Maximum size of a request body.
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+def parse_form(value):
+    """Converts a form given in a request into a 5-tuple.  Raises
+    ValueError if the form is invalid."""
+    if isinstance(value, str):
+        return formnames.str_to_form(value)
+    form = tuple(value)
+    if len(form) != 5 or not all(isinstance(x, str) for x in form):
+        raise ValueError("invalid form {!r}".format(value))
+    # Checks that each component is a known name
+    formnames.form_id(form)
+    return form
+
+
+class Counters(object):
+    """Thread-safe counters of requests, batches and latencies."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = {}
+        self.errors = 0
+        self.batches = 0
+        self.batched = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def request(self, path, latency, error=False):
+        """Records a request for ``path`` that took ``latency`` seconds."""
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            if error:
+                self.errors += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def batch(self, size):
+        """Records a micro-batch of ``size`` requests."""
+        with self.lock:
+            self.batches += 1
+            self.batched += size
+
+    def stats(self):
+        """Returns the counters as a dictionary."""
+        with self.lock:
+            total = sum(self.requests.values())
+            elapsed = time.time() - self.started
+            return {"uptime": elapsed,
+                    "requests": dict(self.requests),
+                    "errors": self.errors,
+                    "requests_per_second": total / elapsed if elapsed else 0,
+                    "latency_mean": (self.latency_total / total
+                                     if total else 0),
+                    "latency_max": self.latency_max,
+                    "batches": self.batches,
+                    "batch_size_mean": (self.batched / self.batches
+                                        if self.batches else 0)}
+
+
+class MicroBatcher(object):
+    """Coalesces single-form requests from concurrent threads into batches
+    that are inflected with inflect_many() in a background thread."""
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH,
+                 max_delay=DEFAULT_MAX_DELAY, counters=None):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.counters = counters
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, args, form):
+        """Queues a request and returns a Future for its results."""
+        future = concurrent.futures.Future()
+        self.queue.put((args, form, future))
+        return future
+
+    def next_batch(self):
+        """Waits for the next batch of requests.  Returns the batch and a
+        flag indicating whether the batcher has been closed."""
+        item = self.queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def run(self):
+        """Inflects batches of requests until closed."""
+        closed = False
+        while not closed:
+            batch, closed = self.next_batch()
+            if not batch:
+                continue
+            if self.counters is not None:
+                self.counters.batch(len(batch))
+            try:
+                results = inflect_many([(args, form)
+                                        for args, form, _ in batch])
+            except Exception:
+                # Inflect the requests one at a time so that the error
+                # only reaches the requests that caused it
+                for args, form, future in batch:
+                    try:
+                        future.set_result(inflect_many([(args, form)])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            for (_, _, future), ret in zip(batch, results):
+                future.set_result(ret)
+
+    def close(self):
+        """Stops the background thread after processing queued
+        requests."""
+        self.queue.put(None)
+        self.thread.join()
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    """Handles HTTP requests for the inflection service."""
+    server_version = "wiktfinnish"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            http.server.BaseHTTPRequestHandler.log_message(self, format,
+                                                           *args)
+
+    def send_json(self, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        start = time.time()
+        if self.path == "/stats":
+            self.send_json(200, self.server.stats())
+            self.server.counters.request(self.path, time.time() - start)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        start = time.time()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # The body cannot be skipped without a valid length
+            self.close_connection = True
+            self.send_json(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            self.send_json(413, {"error": "request too large"})
+            return
+        body = self.rfile.read(length)
+        method = self.server.endpoints.get(self.path)
+        if method is None:
+            self.send_json(404, {"error": "not found"})
+            return
+        error = True
+        try:
+            req = json.loads(body.decode("utf-8"))
+            if not isinstance(req, dict):
+                raise ValueError("request must be a JSON object")
+            resp = method(req)
+            error = False
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json(400, {"error": "{}: {}".format(type(e).__name__,
+                                                          e)})
+        except Exception as e:
+            self.send_json(500, {"error": "{}: {}".format(type(e).__name__,
+                                                          e)})
+        else:
+            self.send_json(200, resp)
+        finally:
+            self.server.counters.request(self.path, time.time() - start,
+                                         error)
+
+
+class InflectionServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """The HTTP inflection service.  Each connection is served in its own
+    thread; single-form requests are micro-batched and all results are
+    memoised."""
+    daemon_threads = True
+
+    def __init__(self, address, max_batch=DEFAULT_MAX_BATCH,
+                 max_delay=DEFAULT_MAX_DELAY, max_forms=DEFAULT_MAX_FORMS,
+                 verbose=False):
+        self.verbose = verbose
+        self.counters = Counters()
+        self.memo = ParadigmMemo(max_forms)
+        self.form_memo = FormMemo(max_forms)
+        self.batcher = MicroBatcher(max_batch, max_delay, self.counters)
+        self.endpoints = {
+            "/inflect": self.inflect,
+            "/inflect_many": self.inflect_many,
+            "/paradigm": self.paradigm,
+            "/encode": self.encode,
+            "/decode": self.decode,
+        }
+        http.server.HTTPServer.__init__(self, address, RequestHandler)
+
+    def server_close(self):
+        http.server.HTTPServer.server_close(self)
+        self.batcher.close()
+
+    def inflect(self, req):
+        args = req["args"]
+        form = parse_form(req["form"])
+        key = self.form_memo.key(args, form)
+        results = self.form_memo.get(key)
+        if results is None:
+            results = self.batcher.submit(args, form).result()
+            self.form_memo.put(key, results)
+        return {"results": results}
+
+    def inflect_many(self, req):
+        items = [(x["args"], parse_form(x["form"])) for x in req["requests"]]
+        keys = [self.form_memo.key(args, form) for args, form in items]
+        results = [self.form_memo.get(key) for key in keys]
+        missing = [i for i, x in enumerate(results) if x is None]
+        if missing:
+            for i, ret in zip(missing,
+                              inflect_many([items[i] for i in missing])):
+                results[i] = ret
+                self.form_memo.put(keys[i], ret)
+        return {"results": results}
+
+    def paradigm(self, req):
+        options = dict(req.get("options", {}))
+        if options.get("forms") is not None:
+            options["forms"] = [parse_form(x) for x in options["forms"]]
+        forms = memo_paradigm(self.memo, req["args"], req.get("pos"),
+                              **options)
+        return {"forms": [[formnames.form_to_str(form), results]
+                          for form, results in forms]}
+
+    def encode(self, req):
+        stem, paradigm = encode_paradigm(req["args"])
+        return {"stem": stem, "paradigm": paradigm}
+
+    def decode(self, req):
+        return {"args": decode_paradigm(req["stem"], req["paradigm"],
+                                        req.get("pos"))}
+
+    def stats(self):
+        """Returns the counters and memo statistics."""
+        stats = self.counters.stats()
+        stats["paradigm_memo"] = self.memo.stats()
+        stats["form_memo"] = self.form_memo.stats()
+        return stats
+
+
+def main(argv=None):
+    """Runs the HTTP server from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m wiktfinnish.server",
+        description="Serve wiktfinnish requests over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="port to listen on (default: 8080)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="maximum number of requests in a batch")
+    parser.add_argument("--max-delay", type=float, default=DEFAULT_MAX_DELAY,
+                        help="seconds to wait for more requests in a batch")
+    parser.add_argument("--memo-forms", type=int, default=DEFAULT_MAX_FORMS,
+                        help="maximum number of memoised forms")
+    parser.add_argument("--verbose", action="store_true",
+                        help="log requests")
+    opts = parser.parse_args(argv)
+    server = InflectionServer((opts.host, opts.port), opts.max_batch,
+                              opts.max_delay, opts.memo_forms, opts.verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
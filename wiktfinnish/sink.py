@@ -0,0 +1,155 @@
+# Generating word forms directly into a sink, for dumping complete
+# lexicons without building lists and tuples of the results.  A sink is
+# any object with a method
+#
+#   write(lemma_id, form_id, surface)
+#
+# where form_id is the integer returned by formnames.form_id().  The
+# generated forms are pushed into the sink in the order of
+# inflect_paradigm().  BufferSink is a sink that writes TSV lines into a
+# binary file through a preallocated buffer.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import threading
+from wiktfinnish import formnames
+from wiktfinnish.inflect import inflect, iter_results, paradigm_pos
+from wiktfinnish.equivalence import lexeme_form_aliases, canonical_form
+
+# Default size of the buffer in BufferSink.
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+# Cache of form ids for the lists returned by all_forms_list(), keyed by
+# its arguments.  Entries are added while holding form_ids_lock.
+form_ids_cache = {}
+form_ids_lock = threading.Lock()
+
+
+def all_form_ids(pos, **kwargs):
+    """Returns a tuple of the form ids of the forms returned by
+    all_forms_list(pos, **kwargs)."""
+    key = (pos, tuple(sorted(kwargs.items())))
+    ids = form_ids_cache.get(key)
+    if ids is not None:
+        return ids
+    ids = tuple(formnames.form_id(form)
+                for form in formnames.all_forms_list(pos, **kwargs))
+    with form_ids_lock:
+        return form_ids_cache.setdefault(key, ids)
+
+
+def generate_paradigm(sink, lemma_id, args, pos=None, forms=None, **kwargs):
+    """Generates all forms of the word ``args`` into ``sink``.  ``pos``,
+    ``forms`` and the keyword arguments are as for inflect_paradigm().
+    Results are streamed into the sink without building lists, except
+    for forms that other equivalent forms reuse (see equivalence.py).
+    Returns the number of surface forms written."""
+    pos = paradigm_pos(args, pos)
+    if pos != "verb" and "pos" not in args:
+        # Comparatives are only generated for args marked as adjectives
+        args = args.copy()
+        args["pos"] = pos
+    if forms is None:
+        forms = formnames.all_forms_list(pos, **kwargs)
+        ids = all_form_ids(pos, **kwargs)
+    else:
+        ids = [formnames.form_id(form) for form in forms]
+    aliases = lexeme_form_aliases(args)
+    targets = set(aliases.values())
+    done = {}
+    write = sink.write
+    count = 0
+    for form, fid in zip(forms, ids):
+        if aliases:
+            canonical = canonical_form(form, aliases)
+            if canonical is not form:
+                results = done.get(canonical)
+                if results is None:
+                    results = inflect(args, canonical)
+                    done[canonical] = results
+            elif form[0] in targets or form[2] in targets:
+                # Other forms will reuse these results
+                results = inflect(args, form)
+                done[form] = results
+            else:
+                results = iter_results(args, form)
+        else:
+            results = iter_results(args, form)
+        for v in results:
+            write(lemma_id, fid, v)
+            count += 1
+    return count
+
+
+def generate_lexicon(sink, lexemes, **kwargs):
+    """Generates all forms of the lexemes in ``lexemes`` (dictionaries with
+    "id", "args" and optionally "pos") into ``sink``.  The keyword
+    arguments are as for inflect_paradigm().  Returns the number of
+    surface forms written."""
+    count = 0
+    for lexeme in lexemes:
+        count += generate_paradigm(sink, lexeme["id"], lexeme["args"],
+                                   lexeme.get("pos"), **kwargs)
+    return count
+
+
+class BufferSink(object):
+    """A sink that writes lines "lemma_id<TAB>form_id<TAB>surface" into the
+    binary file ``f``.  Lines are encoded into a preallocated buffer of
+    ``buffer_size`` bytes, which is written out when full and by
+    flush().  If ``form_names`` is true, forms are written as by
+    formnames.form_to_str() instead of as numbers."""
+
+    def __init__(self, f, buffer_size=DEFAULT_BUFFER_SIZE, form_names=False):
+        self.f = f
+        self.buf = bytearray(buffer_size)
+        self.view = memoryview(self.buf)
+        self.pos = 0
+        self.form_names = form_names
+        self.names = {}
+        self.last_key = None
+        self.last_prefix = None
+
+    def write(self, lemma_id, form_id, surface):
+        # Consecutive alternatives of the same form share the prefix
+        key = (lemma_id, form_id)
+        if key == self.last_key:
+            prefix = self.last_prefix
+        else:
+            form = form_id
+            if self.form_names:
+                form = self.names.get(form_id)
+                if form is None:
+                    form = formnames.form_to_str(
+                        formnames.form_from_id(form_id))
+                    self.names[form_id] = form
+            prefix = "{}\t{}\t".format(lemma_id, form).encode("utf-8")
+            self.last_key = key
+            self.last_prefix = prefix
+        data = prefix + surface.encode("utf-8") + b"\n"
+        end = self.pos + len(data)
+        if end > len(self.buf):
+            self.flush()
+            if len(data) > len(self.buf):
+                self.f.write(data)
+                return
+            end = len(data)
+        self.buf[self.pos:end] = data
+        self.pos = end
+
+    def flush(self):
+        """Writes out the buffered data."""
+        if self.pos:
+            self.f.write(self.view[:self.pos])
+            self.pos = 0
+
+    def close(self):
+        """Flushes the buffer.  The file is not closed."""
+        self.flush()
+        self.view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
@@ -0,0 +1,360 @@
+# SQLite-backed store of generated word forms, using only the standard
+# library.  The database contains the generated forms of a lexicon keyed
+# by integer lemma ids, paradigm ids and form ids (see formnames.form_id()),
+# an index for looking up the analyses of a surface form, and a
+# read-through cache of inflect() results for words that are not in the
+# lexicon.
+#
+# Schema:
+#
+#   meta (key, value): "options" (JSON) of the forms last loaded,
+#     "cache_hashes" (JSON) as returned by fingerprint.spec_hashes() when
+#     the cache was last checked
+#   paradigms (id, code): paradigm codes as in stem.encode_paradigm()
+#   lemmas (id, paradigm_id, pos, template_name, forms_hash, args): args
+#     as JSON, forms_hash as returned by FormStore.forms_hash()
+#   forms (lemma_id, form_id, seq, surface): the seq-th result of the form
+#   cache (args_hash, form_id, spec_tag, results): results of inflect()
+#     as JSON, spec_tag as returned by fingerprint.spec_tag()
+#
+# Forms are loaded in bulk with executemany() in WAL mode, and the index on
+# surface forms is created after loading.  Each lemma is saved with a
+# hash of the specifications of its declension/conjugation (see
+# fingerprint.spec_hash()) and the options its forms were generated
+# with, so changing one declension makes only its lemmas stale.  Stale
+# lemmas must be regenerated by the caller (see stale_lemmas() and
+# incremental.py), and the store is stale until all of them have been.
+# Cached results are tagged with the hash of their declension (see
+# fingerprint.spec_tag()), and only the results of changed declensions
+# are discarded.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import json
+import sqlite3
+from wiktfinnish import formnames
+from wiktfinnish import fingerprint
+from wiktfinnish.inflect import inflect, paradigm_pos
+from wiktfinnish.analyzer import lexeme_paradigm_code
+from wiktfinnish.sink import generate_paradigm
+from wiktfinnish.bloom import BloomFilter, DEFAULT_FP_RATE
+
+# Default number of rows inserted with one executemany() call.
+DEFAULT_BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS paradigms (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS lemmas (
+    id INTEGER PRIMARY KEY,
+    paradigm_id INTEGER NOT NULL,
+    pos TEXT NOT NULL,
+    template_name TEXT NOT NULL,
+    forms_hash TEXT NOT NULL,
+    args TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS forms (
+    lemma_id INTEGER NOT NULL,
+    form_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    surface TEXT NOT NULL,
+    PRIMARY KEY (lemma_id, form_id, seq)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cache (
+    args_hash TEXT NOT NULL,
+    form_id INTEGER NOT NULL,
+    spec_tag TEXT NOT NULL,
+    results TEXT NOT NULL,
+    PRIMARY KEY (args_hash, form_id)) WITHOUT ROWID;
+"""
+
+SURFACE_INDEX = ("CREATE INDEX IF NOT EXISTS forms_surface "
+                 "ON forms (surface)")
+
+
+def delete_tags(conn, table, tags):
+    """Deletes the rows of ``table`` whose spec_tag is in ``tags``.
+    Returns the number of rows deleted."""
+    tags = list(tags)
+    if not tags:
+        return 0
+    cur = conn.execute("DELETE FROM {} WHERE spec_tag IN ({})".format(
+        table, ", ".join("?" * len(tags))), tags)
+    return cur.rowcount
+
+
+class FormStore(object):
+    """A store of generated word forms in the SQLite database ``path``.
+    The keyword arguments are the options passed to inflect_paradigm()
+    when generating the lexicon; if none are given, the options saved in
+    the database are used.  ``stale`` is True if the forms in the
+    database were generated with other specifications or options; it
+    stays True until the forms of all such lemmas (see stale_lemmas())
+    have been regenerated with a FormWriter."""
+
+    def __init__(self, path, **kwargs):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.paradigm_ids = dict((code, pid) for pid, code in
+                                 self.conn.execute("SELECT id, code "
+                                                   "FROM paradigms"))
+        options = self.get_meta("options")
+        if not kwargs and options is not None:
+            kwargs = json.loads(options)
+        self.options = kwargs
+        self.check_stale()
+        # The cache only depends on the specifications
+        old = self.get_meta("cache_hashes")
+        hashes = json.dumps(fingerprint.spec_hashes(), sort_keys=True)
+        if old != hashes:
+            with self.conn:
+                if old is not None:
+                    delete_tags(self.conn, "cache",
+                                fingerprint.stale_tags(json.loads(old)))
+                self.set_meta("cache_hashes", hashes)
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?",
+                                (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) "
+                          "VALUES (?, ?)", (key, value))
+
+    def forms_hash(self, name):
+        """Returns the hash saved with the lemmas of the
+        declension/conjugation ``name``.  This changes when the
+        specifications of the declension or the options of the store
+        change."""
+        return fingerprint.digest([fingerprint.spec_hash(name),
+                                   self.options])
+
+    def stale_hashes(self):
+        """Returns a list of the (template_name, forms_hash) pairs of
+        lemmas whose forms were generated with other specifications or
+        options."""
+        rows = self.conn.execute("SELECT DISTINCT template_name, forms_hash "
+                                 "FROM lemmas").fetchall()
+        return [(name, h) for name, h in rows if h != self.forms_hash(name)]
+
+    def stale_lemmas(self):
+        """Returns a sorted list of the ids of the lemmas whose forms were
+        generated with other specifications or options."""
+        ret = []
+        for key in self.stale_hashes():
+            rows = self.conn.execute("SELECT id FROM lemmas WHERE "
+                                     "template_name = ? AND forms_hash = ?",
+                                     key)
+            ret.extend(row[0] for row in rows)
+        return sorted(ret)
+
+    def check_stale(self):
+        """Updates ``stale`` from the lemmas in the store and returns
+        it."""
+        self.stale = bool(self.stale_hashes())
+        return self.stale
+
+    def close(self):
+        """Closes the database."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def paradigm_id(self, code):
+        """Returns the id of the paradigm code ``code``, adding it if
+        needed."""
+        pid = self.paradigm_ids.get(code)
+        if pid is None:
+            cur = self.conn.execute("INSERT INTO paradigms (code) "
+                                    "VALUES (?)", (code,))
+            pid = cur.lastrowid
+            self.paradigm_ids[code] = pid
+        return pid
+
+    def writer(self, batch_size=DEFAULT_BATCH_SIZE):
+        """Returns a FormWriter for loading lexemes into the store."""
+        return FormWriter(self, batch_size)
+
+    def add_lexicon(self, lexemes, batch_size=DEFAULT_BATCH_SIZE):
+        """Generates all forms of the lexemes in ``lexemes`` (dictionaries
+        with "id", "args" and optionally "pos"; ids must be integers) into
+        the store, replacing any earlier forms of the same lemmas.
+        Returns the number of rows written."""
+        with self.writer(batch_size) as writer:
+            for lexeme in lexemes:
+                writer.add(lexeme["id"], lexeme["args"], lexeme.get("pos"))
+        return writer.num_rows
+
+    def lookup(self, lemma_id, form):
+        """Returns the list of surface forms of the 5-tuple ``form`` of the
+        lemma ``lemma_id``.  Returns an empty list if there are none."""
+        rows = self.conn.execute(
+            "SELECT surface FROM forms WHERE lemma_id = ? AND form_id = ? "
+            "ORDER BY seq", (lemma_id, formnames.form_id(form)))
+        return [row[0] for row in rows]
+
+    def analyze(self, surface):
+        """Returns a list of (lemma_id, paradigm_code, form) tuples for the
+        analyses of the surface form ``surface``."""
+        rows = self.conn.execute(
+            "SELECT forms.lemma_id, paradigms.code, forms.form_id "
+            "FROM forms JOIN lemmas ON lemmas.id = forms.lemma_id "
+            "JOIN paradigms ON paradigms.id = lemmas.paradigm_id "
+            "WHERE forms.surface = ? ORDER BY forms.lemma_id, forms.form_id",
+            (surface,))
+        return [(lemma_id, code, formnames.form_from_id(fid))
+                for lemma_id, code, fid in rows]
+
+    def lemma_args(self, lemma_id):
+        """Returns (args, pos) of the lemma ``lemma_id``, or None if it is
+        not in the store."""
+        row = self.conn.execute("SELECT args, pos FROM lemmas WHERE id = ?",
+                                (lemma_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def bloom_filter(self, fp_rate=DEFAULT_FP_RATE):
+        """Returns a Bloom filter (see bloom.py) of the surface forms in
+        the store with the false-positive rate ``fp_rate``, for rejecting
+        words before calling analyze().  The filter is sized by counting
+        the distinct surface forms first and the forms are then added as
+        they are read."""
+        count = self.conn.execute(
+            "SELECT COUNT(DISTINCT surface) FROM forms").fetchone()[0]
+        bf = BloomFilter(count, fp_rate)
+        for row in self.conn.execute("SELECT DISTINCT surface FROM forms"):
+            bf.add(row[0])
+        return bf
+
+    def num_forms(self):
+        """Returns the number of rows in the forms table."""
+        return self.conn.execute("SELECT COUNT(*) FROM forms").fetchone()[0]
+
+
+class FormWriter(object):
+    """Bulk writer of generated forms into a FormStore.  This is a sink
+    (see sink.py); rows are buffered and inserted with executemany() in
+    batches of ``batch_size`` rows.  The surface index is created when
+    the writer is closed."""
+
+    def __init__(self, store, batch_size=DEFAULT_BATCH_SIZE):
+        self.store = store
+        self.conn = store.conn
+        self.batch_size = batch_size
+        self.rows = []
+        self.last_key = None
+        self.seq = 0
+        self.num_rows = 0
+        # Loading is much faster without maintaining the index
+        self.conn.execute("DROP INDEX IF EXISTS forms_surface")
+
+    def add(self, lemma_id, args, pos=None):
+        """Generates all forms of the word ``args`` under the integer id
+        ``lemma_id``, replacing any earlier forms of the lemma.  Returns
+        the number of rows added."""
+        self.flush()
+        pos = paradigm_pos(args, pos)
+        pid = self.store.paradigm_id(lexeme_paradigm_code(args))
+        name = args["template_name"]
+        self.conn.execute("DELETE FROM forms WHERE lemma_id = ?", (lemma_id,))
+        self.conn.execute("INSERT OR REPLACE INTO lemmas "
+                          "(id, paradigm_id, pos, template_name, forms_hash, "
+                          "args) VALUES (?, ?, ?, ?, ?, ?)",
+                          (lemma_id, pid, pos, name,
+                           self.store.forms_hash(name),
+                           json.dumps(args, sort_keys=True)))
+        return generate_paradigm(self, lemma_id, args, pos,
+                                 **self.store.options)
+
+    def write(self, lemma_id, form_id, surface):
+        key = (lemma_id, form_id)
+        if key == self.last_key:
+            self.seq += 1
+        else:
+            self.last_key = key
+            self.seq = 0
+        self.rows.append((lemma_id, form_id, self.seq, surface))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Inserts the buffered rows."""
+        if self.rows:
+            self.conn.executemany("INSERT OR REPLACE INTO forms "
+                                  "(lemma_id, form_id, seq, surface) "
+                                  "VALUES (?, ?, ?, ?)", self.rows)
+            self.num_rows += len(self.rows)
+            self.rows = []
+
+    def close(self):
+        """Inserts the remaining rows, creates the surface index and
+        commits.  The options of the store are saved as the default
+        options for opening it."""
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.execute(SURFACE_INDEX)
+        self.store.set_meta("options", json.dumps(self.store.options,
+                                                  sort_keys=True))
+        self.conn.commit()
+        self.store.check_stale()
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None:
+            self.conn.rollback()
+            self.conn.execute(SURFACE_INDEX)
+            self.conn = None
+            return
+        self.close()
+
+
+class CachedInflector(object):
+    """Read-through cache for inflect() in a FormStore.  Results are
+    looked up in the cache table and computed and saved on a miss."""
+
+    def __init__(self, store):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def inflect(self, args, form):
+        """Returns inflect(args, form), using the cache."""
+        conn = self.store.conn
+        key = fingerprint.args_hash(args)
+        fid = formnames.form_id(form)
+        tag = fingerprint.spec_tag(args["template_name"])
+        row = conn.execute("SELECT results FROM cache WHERE args_hash = ? "
+                           "AND form_id = ? AND spec_tag = ?",
+                           (key, fid, tag)).fetchone()
+        if row is not None:
+            self.hits += 1
+            return json.loads(row[0])
+        self.misses += 1
+        results = inflect(args, form)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO cache "
+                         "(args_hash, form_id, spec_tag, results) "
+                         "VALUES (?, ?, ?, ?)",
+                         (key, fid, tag,
+                          json.dumps(results, ensure_ascii=False)))
+        return results
+
+    def stats(self):
+        """Returns a dictionary of statistics about the cache."""
+        return {"hits": self.hits, "misses": self.misses}
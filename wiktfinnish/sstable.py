@@ -0,0 +1,365 @@
+# On-disk sorted table (SSTable) of generated word forms, keyed by
+# (lemma id, form id) with the list of surface forms as the value.  The
+# table is written once by SSTableBuilder and read through a
+# memory-mapped file by SSTableReader, so any number of processes can
+# share a precomputed lexicon without loading or deserialising it.
+#
+# File layout (integers are little-endian unless noted):
+#
+#   MAGIC, header length (4 bytes), header (JSON with the specification
+#   fingerprint, the per-declension hashes (see fingerprint.spec_hashes())
+#   and the options used for generating the forms)
+#   blocks
+#   index: first key (8 bytes) of each block, then the offset (8 bytes)
+#   of each block and the end of the last block
+#   footer (see FOOTER): magic, number of blocks, number of entries,
+#   index offset
+#
+# Keys are 8 bytes: the lemma id and the form id (see formnames.form_id())
+# as big-endian 32-bit integers, so that bytewise order is numeric order.
+# Entries in a block are front-coded: each entry is
+#
+#   varint shared key bytes, varint key suffix length, key suffix,
+#   varint number of surfaces, and for each surface varint shared
+#   characters with the previous surface in the block, varint suffix
+#   length in bytes, suffix (UTF-8)
+#
+# and the first entry of each block is coded in full.  Lookups find the
+# block with a binary search of the sparse index and decode at most one
+# block.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import bisect
+from wiktfinnish import fingerprint
+from wiktfinnish.sink import generate_lexicon
+
+# Magic bytes at the start and in the footer of the file.
+MAGIC = b"WFSST001"
+
+# Footer: magic, number of blocks, number of entries, index offset.
+FOOTER = struct.Struct("<8sQQQ")
+
+# Encoding of keys.
+KEY = struct.Struct(">II")
+
+# Default approximate size of blocks in bytes.
+DEFAULT_BLOCK_SIZE = 4096
+
+
+def encode_varint(n, out):
+    """Appends the unsigned integer ``n`` as a varint to the bytearray
+    ``out``."""
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def decode_varint(buf, pos):
+    """Decodes a varint at ``pos`` in ``buf``.  Returns (value, new
+    position)."""
+    n = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def common_prefix(a, b):
+    """Returns the length of the common prefix of ``a`` and ``b``."""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class SSTableBuilder(object):
+    """Writes an SSTable into the file ``path``.  Entries must be added in
+    increasing order of (lemma_id, form_id).  The keyword arguments are
+    the options used for generating the forms and are saved in the
+    header."""
+
+    def __init__(self, path, block_size=DEFAULT_BLOCK_SIZE, **kwargs):
+        self.path = path
+        self.f = open(path, "wb")
+        self.block_size = block_size
+        header = json.dumps({"fingerprint": fingerprint.spec_fingerprint(),
+                             "hashes": fingerprint.spec_hashes(),
+                             "options": kwargs},
+                            sort_keys=True).encode("utf-8")
+        self.f.write(MAGIC)
+        self.f.write(struct.pack("<I", len(header)))
+        self.f.write(header)
+        self.offset = len(MAGIC) + 4 + len(header)
+        self.first_keys = array.array("Q")
+        self.offsets = array.array("Q")
+        self.block = bytearray()
+        self.prev_key = b""
+        self.prev_surface = ""
+        self.num_entries = 0
+
+    def add(self, lemma_id, form_id, surfaces):
+        """Adds the surface forms ``surfaces`` of the form ``form_id`` of
+        the lemma ``lemma_id``."""
+        key = KEY.pack(lemma_id, form_id)
+        if key <= self.prev_key:
+            raise ValueError("keys not in increasing order: {!r}"
+                             .format((lemma_id, form_id)))
+        block = self.block
+        if not block:
+            self.first_keys.append((lemma_id << 32) | form_id)
+            self.offsets.append(self.offset)
+            self.prev_key = b""
+            self.prev_surface = ""
+        shared = common_prefix(key, self.prev_key)
+        encode_varint(shared, block)
+        encode_varint(len(key) - shared, block)
+        block += key[shared:]
+        encode_varint(len(surfaces), block)
+        for surface in surfaces:
+            shared = common_prefix(surface, self.prev_surface)
+            data = surface[shared:].encode("utf-8")
+            encode_varint(shared, block)
+            encode_varint(len(data), block)
+            block += data
+            self.prev_surface = surface
+        self.prev_key = key
+        self.num_entries += 1
+        if len(block) >= self.block_size:
+            self.flush_block()
+
+    def flush_block(self):
+        if self.block:
+            self.f.write(self.block)
+            self.offset += len(self.block)
+            self.block = bytearray()
+
+    def close(self):
+        """Writes the index and the footer and closes the file."""
+        if self.f is None:
+            return
+        self.flush_block()
+        index_offset = self.offset
+        self.offsets.append(self.offset)
+        for a in (self.first_keys, self.offsets):
+            if sys.byteorder != "little":
+                a = array.array("Q", a)
+                a.byteswap()
+            self.f.write(a.tobytes())
+        self.f.write(FOOTER.pack(MAGIC, len(self.first_keys),
+                                 self.num_entries, index_offset))
+        self.f.close()
+        self.f = None
+
+    def abort(self):
+        """Closes and removes the incomplete file."""
+        if self.f is None:
+            return
+        self.f.close()
+        self.f = None
+        os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None:
+            # Do not leave a table that looks complete but lacks entries
+            self.abort()
+        else:
+            self.close()
+
+
+class SSTableSink(object):
+    """A sink (see sink.py) that writes the generated forms into an
+    SSTableBuilder.  Lemma ids must be increasing integers; the forms of
+    each lemma are sorted by form id before they are written."""
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.lemma_id = None
+        self.forms = {}
+
+    def write(self, lemma_id, form_id, surface):
+        if lemma_id != self.lemma_id:
+            self.flush()
+            self.lemma_id = lemma_id
+        surfaces = self.forms.get(form_id)
+        if surfaces is None:
+            self.forms[form_id] = [surface]
+        else:
+            surfaces.append(surface)
+
+    def flush(self):
+        """Writes the forms of the current lemma."""
+        for form_id in sorted(self.forms):
+            self.builder.add(self.lemma_id, form_id, self.forms[form_id])
+        self.forms = {}
+
+
+def build_sstable(lexemes, path, block_size=DEFAULT_BLOCK_SIZE, **kwargs):
+    """Generates all forms of the lexemes in ``lexemes`` (dictionaries
+    with "id", "args" and optionally "pos"; ids must be increasing
+    integers) into an SSTable in ``path``.  The keyword arguments are as
+    for inflect_paradigm().  Returns the number of entries written."""
+    with SSTableBuilder(path, block_size=block_size, **kwargs) as builder:
+        sink = SSTableSink(builder)
+        generate_lexicon(sink, lexemes, **kwargs)
+        sink.flush()
+    return builder.num_entries
+
+
+class SSTableReader(object):
+    """Memory-mapped reader for an SSTable written by SSTableBuilder."""
+
+    def __init__(self, path):
+        self.views = []
+        self.mm = None
+        self.f = open(path, "rb")
+        try:
+            self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.f.close()
+            raise ValueError("{}: not an SSTable".format(path))
+        self.buf = memoryview(self.mm)
+        self.views.append(self.buf)
+        size = len(self.buf)
+        if (size < len(MAGIC) + 4 + FOOTER.size or
+                self.buf[:len(MAGIC)] != MAGIC):
+            self.close()
+            raise ValueError("{}: not an SSTable".format(path))
+        (hlen,) = struct.unpack_from("<I", self.buf, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self.buf[start:start + hlen])
+                                 .decode("utf-8"))
+        magic, self.num_blocks, self.num_entries, index_offset = \
+            FOOTER.unpack_from(self.buf, size - FOOTER.size)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("{}: truncated SSTable".format(path))
+        n = self.num_blocks
+        self.first_keys = self.uint64_array(index_offset, n)
+        self.offsets = self.uint64_array(index_offset + 8 * n, n + 1)
+
+    def uint64_array(self, pos, n):
+        """Returns a sequence of the ``n`` unsigned 64-bit integers at
+        ``pos`` in the file."""
+        part = self.buf[pos:pos + 8 * n]
+        if sys.byteorder != "little":
+            a = array.array("Q")
+            a.frombytes(part)
+            a.byteswap()
+            part.release()
+            return a
+        part = part.cast("Q")
+        self.views.append(part)
+        return part
+
+    def close(self):
+        """Closes the file."""
+        if self.mm is None:
+            return
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.mm.close()
+        self.f.close()
+        self.mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __len__(self):
+        return self.num_entries
+
+    def check_fingerprint(self):
+        """Returns True if the table was generated with the current
+        specifications."""
+        return fingerprint.check_fingerprint(self.header["fingerprint"])
+
+    def changed_declensions(self):
+        """Returns the set of declension/conjugation names whose forms in
+        the table may differ from those generated with the current
+        specifications."""
+        return fingerprint.changed_declensions(self.header.get("hashes", {}))
+
+    def iter_block(self, i):
+        """Iterates over the (key, surfaces) entries in the ``i``-th block,
+        where key is the 8-byte key."""
+        buf = self.buf
+        pos = self.offsets[i]
+        end = self.offsets[i + 1]
+        key = b""
+        prev = ""
+        while pos < end:
+            shared, pos = decode_varint(buf, pos)
+            n, pos = decode_varint(buf, pos)
+            key = key[:shared] + bytes(buf[pos:pos + n])
+            pos += n
+            count, pos = decode_varint(buf, pos)
+            surfaces = []
+            for _ in range(count):
+                shared, pos = decode_varint(buf, pos)
+                n, pos = decode_varint(buf, pos)
+                prev = prev[:shared] + str(buf[pos:pos + n], "utf-8")
+                pos += n
+                surfaces.append(prev)
+            yield key, surfaces
+
+    def find_block(self, lemma_id, form_id):
+        """Returns the index of the block that may contain the key, or -1
+        if it is before the first key."""
+        return bisect.bisect_right(self.first_keys,
+                                   (lemma_id << 32) | form_id) - 1
+
+    def lookup(self, lemma_id, form_id):
+        """Returns the list of surface forms of the form ``form_id`` of the
+        lemma ``lemma_id``, or None if it is not in the table."""
+        i = self.find_block(lemma_id, form_id)
+        if i < 0:
+            return None
+        target = KEY.pack(lemma_id, form_id)
+        for key, surfaces in self.iter_block(i):
+            if key == target:
+                return surfaces
+            if key > target:
+                break
+        return None
+
+    def scan(self, start=(0, 0), end=None):
+        """Iterates over (lemma_id, form_id, surfaces) tuples with keys
+        from ``start`` (inclusive) to ``end`` (exclusive, or to the end
+        of the table if None) in order.  Keys are (lemma_id, form_id)
+        tuples."""
+        start_key = KEY.pack(*start)
+        end_key = KEY.pack(*end) if end is not None else None
+        for i in range(max(self.find_block(*start), 0), self.num_blocks):
+            for key, surfaces in self.iter_block(i):
+                if key < start_key:
+                    continue
+                if end_key is not None and key >= end_key:
+                    return
+                lemma_id, form_id = KEY.unpack(key)
+                yield lemma_id, form_id, surfaces
+
+    def lemma_forms(self, lemma_id):
+        """Returns a list of (form_id, surfaces) tuples for the forms of
+        the lemma ``lemma_id``."""
+        end = (lemma_id + 1, 0) if lemma_id < 0xffffffff else None
+        return [(form_id, surfaces) for _, form_id, surfaces
+                in self.scan((lemma_id, 0), end)]
@@ -0,0 +1,75 @@
+# Words and fixtures shared by the tests of modules that generate, store
+# or index the forms of a lexicon, so that a change in the specifications
+# needs only one edit here.
+#
+#   lexemes = make_lexemes("talo", "sanoa")
+#   -> [{"id": 1, "args": {"template_name": "fi-decl-valo", ...}},
+#       {"id": 2, "args": {"template_name": "fi-conj-sanoa", ...}}]
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import shutil
+import tempfile
+import unittest
+
+# Declension/conjugation arguments of the test words, by base form.
+WORDS = {
+    "talo": {"template_name": "fi-decl-valo",
+             "1": "tal", "2": "", "3": "", "4": "o", "5": "a"},
+    "valo": {"template_name": "fi-decl-valo",
+             "1": "val", "2": "", "3": "", "4": "o", "5": "a"},
+    "palo": {"template_name": "fi-decl-valo",
+             "1": "pal", "2": "", "3": "", "4": "o", "5": "a"},
+    "puna": {"template_name": "fi-decl-valo",
+             "1": "pun", "2": "", "3": "", "4": "a", "5": "a"},
+    "kukko": {"template_name": "fi-decl-valo",
+              "1": "ku", "2": "kk", "3": "k", "4": "o", "5": "a"},
+    "ja": {"template_name": "fi-decl-valo", "1": "j", "4": "a"},
+    "koira": {"template_name": "fi-decl-koira", "1": "koir", "4": "a"},
+    "kala": {"template_name": "fi-decl-kala", "1": "kal", "4": "a"},
+    "risti": {"template_name": "fi-decl-risti", "1": "rist", "4": "ä"},
+    "hevonen": {"template_name": "fi-decl-nainen", "1": "hevo", "2": "a"},
+    "korkea": {"template_name": "fi-decl-korkea", "1": "korke", "2": "a"},
+    "se": {"template_name": "fi-decl-pron", "1s": "se"},
+    "sanoa": {"template_name": "fi-conj-sanoa",
+              "1": "sa", "2": "", "3": "", "4": "no", "5": "a"},
+    "muistaa": {"template_name": "fi-conj-muistaa",
+                "1": "muist", "2": "", "3": "", "4": "a"},
+    "haistaa": {"template_name": "fi-conj-muistaa",
+                "1": "haist", "2": "", "3": "", "4": "a"},
+}
+
+# Parts-of-speech of the words whose part-of-speech is not the default
+# of their declension.
+POS = {"puna": "adj", "korkea": "adj", "ja": "conj"}
+
+
+def make_lexemes(*names, ids=None):
+    """Returns lexemes (dictionaries with "id", "args" and, for the words
+    in POS, "pos") for the words ``names``.  The ids are 1, 2, ... unless
+    a sequence of ids is given in ``ids``."""
+    if ids is None:
+        ids = range(1, len(names) + 1)
+    ret = []
+    for name, lexeme_id in zip(names, ids):
+        lexeme = {"id": lexeme_id, "args": dict(WORDS[name])}
+        if name in POS:
+            lexeme["pos"] = POS[name]
+        ret.append(lexeme)
+    return ret
+
+
+class TempDirTestCase(unittest.TestCase):
+    """Base class for tests that write files into the temporary directory
+    ``tmpdir``, which is removed after each test.  If ``filename`` is
+    set, ``path`` is that file in the directory."""
+    filename = None
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        if self.filename is not None:
+            self.path = os.path.join(self.tmpdir, self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
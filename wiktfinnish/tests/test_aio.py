@@ -0,0 +1,59 @@
+# Tests for the asyncio interface
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import asyncio
+import unittest
+import concurrent.futures
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.aio import AsyncInflector
+
+valo = {"template_name": "fi-decl-valo", "1": "tal", "2": "", "3": "",
+        "4": "o", "5": "a"}
+sanoa = {"template_name": "fi-conj-sanoa", "1": "sa", "2": "", "3": "",
+         "4": "no", "5": "a"}
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class AioTests(unittest.TestCase):
+
+    def test_process_pool(self):
+        async def main():
+            async with AsyncInflector(max_workers=2) as inflector:
+                ret = await inflector.inflect(valo, ("", "", "gen-sg", "",
+                                                     ""))
+                self.assertEqual(ret, ["talon"])
+                ret = await inflector.inflect_many([
+                    (valo, ("", "", "gen-sg", "", "")),
+                    (sanoa, ("pres-1sg", "", "", "", ""))])
+                self.assertEqual(ret, [["talon"], ["sanon"]])
+                ret = await inflector.inflect_paradigm(valo, no_poss=True,
+                                                       no_clitic=True)
+                self.assertEqual(ret, inflect_paradigm(valo, no_poss=True,
+                                                       no_clitic=True))
+        run(main())
+
+    def test_single_flight(self):
+        async def main():
+            with concurrent.futures.ThreadPoolExecutor(2) as executor:
+                inflector = AsyncInflector(executor=executor)
+                rets = await asyncio.gather(*[
+                    inflector.inflect_paradigm(valo, no_clitic=True)
+                    for i in range(5)])
+                self.assertTrue(all(x is rets[0] for x in rets))
+                stats = inflector.memo.stats()
+                self.assertEqual(stats["paradigms"], 1)
+                self.assertEqual(stats["misses"], 5)
+                # Memoised results are returned without the executor
+                ret = await inflector.inflect_paradigm(valo, no_clitic=True)
+                self.assertIs(ret, rets[0])
+                self.assertEqual(inflector.memo.stats()["hits"], 1)
+                await inflector.close()
+        run(main())
@@ -0,0 +1,42 @@
+# Tests for morphological analysis using generated paradigms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.analyzer import Analyzer
+from wiktfinnish.tests.lexicon import make_lexemes
+
+lexemes = make_lexemes("talo", "sanoa", ids=("talo", "sanoa"))
+
+
+class AnalyzerTests(unittest.TestCase):
+
+    def test_analyze(self):
+        analyzer = Analyzer(no_clitic=True)
+        count = analyzer.add_lexicon(lexemes)
+        self.assertEqual(count, analyzer.num_entries())
+        self.assertEqual(analyzer.analyze("talon"),
+                         [("talo", "Nvalo", ("", "", "gen-sg", "", ""))])
+        self.assertEqual(analyzer.analyze("talonkin"), [])
+        self.assertEqual(analyzer.analyze("foo"), [])
+        assert "sanoisin" in analyzer
+        for lexeme in lexemes:
+            for form, results in inflect_paradigm(lexeme["args"],
+                                                  no_clitic=True):
+                for x in results:
+                    assert (lexeme["id"], form[:3]) in \
+                        [(a[0], a[2][:3]) for a in analyzer.analyze(x)]
+
+    def test_incremental(self):
+        analyzer = Analyzer()
+        forms = [("", "", "", "", ""), ("", "", "gen-sg", "", ""),
+                 ("", "", "nom-pl", "", "")]
+        analyzer.add("talo", lexemes[0]["args"], forms=forms)
+        self.assertEqual(len(analyzer), 3)
+        args = {"template_name": "fi-decl-valo", "1": "ta", "2": "",
+                "3": "", "4": "lo", "5": "a"}
+        analyzer.add("talo2", args, forms=forms)
+        self.assertEqual(analyzer.analyze("talot"),
+                         [("talo", "Nvalo", ("", "", "nom-pl", "", "")),
+                          ("talo2", "Nvalo", ("", "", "nom-pl", "", ""))])
@@ -0,0 +1,45 @@
+# Tests for batch inflection
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+import concurrent.futures
+from wiktfinnish import inflect, inflect_many
+
+valo = {"template_name": "fi-decl-valo",
+        "1": "val", "2": "", "3": "", "4": "o", "5": "a"}
+koira = {"template_name": "fi-decl-koira", "1": "koir", "4": "a"}
+sanoa = {"template_name": "fi-conj-sanoa",
+         "1": "sa", "2": "", "3": "", "4": "no", "5": "a"}
+
+requests = [
+    (valo, ("", "", "ine-pl", "", "")),
+    (sanoa, ("impr-2sg", "", "", "", "kO")),
+    (koira, ("", "", "abe-pl", "", "")),
+    (dict(valo), ("", "", "tra-pl", "1s", "kO")),
+    (sanoa, ("pres-neg", "", "", "", "kO")),
+    (sanoa, ["past-3sg", "", "", "", ""]),
+    ({"template_name": "fi-decl-bogus"}, ("", "", "", "", "")),
+]
+
+
+class BatchTests(unittest.TestCase):
+
+    def check(self, results):
+        self.assertEqual(len(results), len(requests))
+        for (args, form), ret in zip(requests, results):
+            self.assertEqual(ret, inflect(args, form))
+
+    def test_serial(self):
+        results = inflect_many(requests)
+        self.check(results)
+        self.assertEqual(results[0], ["valoissa"])
+        self.assertEqual(results[3], ["valoikseniko"])
+        self.assertEqual(results[6], [])
+
+    def test_empty(self):
+        self.assertEqual(inflect_many([]), [])
+
+    def test_executor(self):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as ex:
+            self.check(inflect_many(requests, executor=ex))
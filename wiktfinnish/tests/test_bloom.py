@@ -0,0 +1,69 @@
+# Tests for the Bloom filter of surface forms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.sqlitestore import FormStore
+from wiktfinnish.bloom import BloomFilter, build_bloom, optimal_params
+from wiktfinnish.tests.lexicon import make_lexemes, TempDirTestCase
+
+lexemes = make_lexemes("talo", "sanoa")
+
+
+class BloomTests(TempDirTestCase):
+
+    def test_params(self):
+        self.assertEqual(optimal_params(1000, 0.01), (9592, 7))
+        self.assertRaises(ValueError, optimal_params, 1000, 0)
+        self.assertRaises(ValueError, optimal_params, 1000, 1.5)
+
+    def test_fp_rate(self):
+        words = ["sana{}".format(i) for i in range(20000)]
+        for rate in (0.01, 0.001):
+            bf = BloomFilter.from_words(words[:10000], rate)
+            self.assertEqual(len(bf), 10000)
+            assert all(w in bf for w in words[:10000])
+            fp = sum(w in bf for w in words[10000:]) / 10000
+            self.assertLess(fp, rate * 2)
+            self.assertAlmostEqual(bf.fp_rate(), rate, delta=rate / 10)
+        self.assertEqual(bf.stats()["bytes"], bf.memory_size())
+        self.assertLess(bf.memory_size(), 2 * 10000)
+        self.assertEqual(list(bf.filter(["sana1", "sana"])), ["sana1"])
+        bf = BloomFilter.from_words(iter(words[:10000]), 0.01,
+                                    capacity=20000)
+        assert all(w in bf for w in words[:10000])
+        self.assertEqual(len(bf), 10000)
+        self.assertLess(bf.fp_rate(), 0.01)
+
+    def test_lexicon(self):
+        bf = build_bloom(lexemes, 5000, 0.001, no_clitic=True)
+        words = set()
+        for lexeme in lexemes:
+            for form, results in inflect_paradigm(lexeme["args"],
+                                                  no_clitic=True):
+                for word in results:
+                    assert word in bf
+                    words.add(word)
+        # The lexemes have no surface forms in common
+        self.assertEqual(len(bf), len(words))
+        self.assertNotIn("talox", bf)
+        path = os.path.join(self.tmpdir, "forms.bloom")
+        bf.save(path)
+        loaded = BloomFilter.load(path)
+        self.assertEqual(loaded.stats(), bf.stats())
+        self.assertEqual(loaded.bits, bf.bits)
+        assert "talossa" in loaded
+        with open(path, "r+b") as f:
+            f.truncate(100)
+        self.assertRaises(ValueError, BloomFilter.load, path)
+
+    def test_store(self):
+        path = os.path.join(self.tmpdir, "forms.db")
+        with FormStore(path, no_clitic=True) as store:
+            store.add_lexicon(lexemes)
+            bf = store.bloom_filter()
+            self.assertEqual(len(bf), store.conn.execute(
+                "SELECT COUNT(DISTINCT surface) FROM forms").fetchone()[0])
+            assert "talossa" in bf
+            assert "sanoimme" in bf
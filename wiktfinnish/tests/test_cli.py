@@ -0,0 +1,79 @@
+# Tests for the command-line interface
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import json
+import tempfile
+import unittest
+import contextlib
+from wiktfinnish.cli import main
+from wiktfinnish.formnames import form_to_str, str_to_form, all_forms_list
+
+
+class CliTests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def run_cli(self, data, *argv):
+        with open(self.path, "w") as f:
+            f.write(data)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = main(list(argv) + ["--no-daemon", self.path])
+        self.assertEqual(status, 0)
+        return out.getvalue()
+
+    def test_form_str(self):
+        self.assertEqual(form_to_str(("", "", "ine-pl", "1s", "kin")),
+                         "ine-pl+1s+kin")
+        self.assertEqual(str_to_form(""), ("", "", "", "", ""))
+        for form in all_forms_list("adj"):
+            self.assertEqual(str_to_form(form_to_str(form)), form)
+        self.assertRaises(ValueError, str_to_form, "foo")
+        self.assertRaises(ValueError, str_to_form, "gen-sg+ptv-sg")
+
+    def test_tsv(self):
+        out = self.run_cli("talo||a\tNvalo\nsano||a\tVsanoa\tverb\tx\n",
+                           "--form", "gen-sg,pres-1sg+kO")
+        self.assertEqual(out, "1\tgen-sg\ttalon\nx\tpres-1sg+kO\tsanonko\n")
+
+    def test_tsv_invalid(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            out = self.run_cli("talo\tNvaloGkk\ntalo||a\tNvalo\n",
+                               "--form", "gen-sg")
+        self.assertEqual(out, "2\tgen-sg\ttalon\n")
+        self.assertIn("line 1", err.getvalue())
+
+    def test_jsonl(self):
+        lexeme = {"id": "talo", "args": {"template_name": "fi-decl-valo",
+                                         "1": "tal", "4": "o", "5": "a"}}
+        out = self.run_cli(json.dumps(lexeme) + "\n", "--output-format",
+                           "jsonl", "--no-poss", "--no-clitic")
+        lines = [json.loads(x) for x in out.splitlines()]
+        self.assertEqual(lines[0], {"id": "talo", "form": "",
+                                    "results": ["talo"]})
+        self.assertIn({"id": "talo", "form": "ine-pl",
+                       "results": ["taloissa"]}, lines)
+
+    def test_factored(self):
+        out = self.run_cli("talo||a\tNvalo\n", "--output-format", "factored")
+        self.assertEqual(json.loads(out.splitlines()[-1])["id"], 1)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, main,
+                              ["--output-format", "factored", "--jobs", "2",
+                               self.path])
+
+    def test_wiktextract(self):
+        entry = {"word": "talo", "pos": "noun", "lang_code": "fi",
+                 "inflection_templates": [
+                     {"name": "fi-decl-valo",
+                      "args": {"1": "tal", "4": "o", "5": "a"}}]}
+        out = self.run_cli(json.dumps(entry) + "\n", "--form", "ptv-sg")
+        self.assertEqual(out, "talo:noun:0\tptv-sg\ttaloa\n")
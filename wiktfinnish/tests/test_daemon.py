@@ -0,0 +1,89 @@
+# Tests for the daemon and its client
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import stat
+import shutil
+import tempfile
+import threading
+import unittest
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.daemon import (Daemon, DaemonError, connect,
+                                remove_stale_socket)
+from wiktfinnish.memo import ParadigmMemo, memo_paradigm
+
+valo = {"template_name": "fi-decl-valo", "1": "tal", "2": "", "3": "",
+        "4": "o", "5": "a"}
+sanoa = {"template_name": "fi-conj-sanoa", "1": "sa", "2": "", "3": "",
+         "4": "no", "5": "a"}
+
+
+class DaemonTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "test.sock")
+        self.server = Daemon(self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_requests(self):
+        client = connect(self.path)
+        self.assertIsNotNone(client)
+        with client:
+            form = ("", "", "gen-sg", "", "")
+            self.assertEqual(client.inflect(valo, form), ["talon"])
+            self.assertEqual(client.inflect_many([(valo, form),
+                                                  (sanoa, ("pres-1sg", "", "",
+                                                           "", ""))]),
+                             [["talon"], ["sanon"]])
+            self.assertRaises(DaemonError, client.request, {"op": "foo"})
+            lexemes = [{"id": 1, "args": valo}, {"id": 2, "args": sanoa}]
+            for i in range(2):
+                items = list(client.expand(lexemes, no_poss=True,
+                                           no_clitic=True))
+                expected = [(1, form, results) for form, results in
+                            inflect_paradigm(valo, no_poss=True,
+                                             no_clitic=True)]
+                self.assertEqual(items[:len(expected)], expected)
+            stats = client.stats()["memo"]
+            self.assertEqual(stats["paradigms"], 2)
+            self.assertEqual(stats["hits"], 2)
+
+    def test_no_daemon(self):
+        self.assertIsNone(connect(os.path.join(self.tmpdir, "none.sock")))
+
+    def test_socket_path(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertRaises(RuntimeError, remove_stale_socket, self.path)
+        # Other files are never removed
+        path = os.path.join(self.tmpdir, "file")
+        with open(path, "w") as f:
+            f.write("data")
+        self.assertRaises(RuntimeError, remove_stale_socket, path)
+        assert os.path.exists(path)
+        remove_stale_socket(os.path.join(self.tmpdir, "none.sock"))
+
+
+class MemoTests(unittest.TestCase):
+
+    def test_eviction(self):
+        n = len(inflect_paradigm(valo, no_poss=True, no_clitic=True))
+        memo = ParadigmMemo(max_forms=n + 1)
+        forms = memo_paradigm(memo, valo, no_poss=True, no_clitic=True)
+        self.assertEqual(memo_paradigm(memo, valo, no_poss=True,
+                                       no_clitic=True), forms)
+        self.assertEqual(memo.stats()["hits"], 1)
+        self.assertEqual(forms[1], (("", "", "gen-sg", "", ""), ["talon"]))
+        memo_paradigm(memo, dict(valo, **{"1": "kal"}), no_poss=True,
+                      no_clitic=True)
+        stats = memo.stats()
+        self.assertEqual(stats["paradigms"], 1)
+        self.assertEqual(stats["forms"], n)
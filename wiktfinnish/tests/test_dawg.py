@@ -0,0 +1,64 @@
+# Tests for the DAWG of surface forms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+from wiktfinnish.sink import generate_lexicon
+from wiktfinnish.dawg import (DawgBuilder, DawgReader, EntrySink, build_dawg,
+                              read_tsv)
+from wiktfinnish.tests.lexicon import make_lexemes, TempDirTestCase
+
+lexemes = make_lexemes("talo", "puna")
+
+
+class DawgTests(TempDirTestCase):
+    filename = "forms.dawg"
+
+    def test_lexicon(self):
+        sink = EntrySink()
+        generate_lexicon(sink, lexemes, no_clitic=True)
+        entries = sink.sorted_entries()
+        builder = build_dawg(entries, self.path)
+        words = sorted(set(x[0] for x in entries),
+                       key=lambda x: x.encode("utf-8"))
+        # Many states are shared between the words
+        assert len(builder.states) < sum(len(x) for x in words) / 4
+        with DawgReader(self.path) as dawg:
+            self.assertEqual(len(dawg), len(words))
+            self.assertEqual(dawg.num_entries, len(set(entries)))
+            self.assertEqual(list(dawg.iter_prefix()), words)
+            self.assertEqual(list(dawg.iter_prefix("talo")),
+                             [x for x in words if x.startswith("talo")])
+            self.assertEqual(list(dawg.iter_prefix("xyz")), [])
+            for word in words[::7]:
+                assert word in dawg
+                self.assertEqual(dawg.payloads(word),
+                                 sorted((x[1], x[2]) for x in set(entries)
+                                        if x[0] == word))
+            assert "tal" not in dawg
+            assert "talox" not in dawg
+            self.assertEqual(dawg.payloads("talox"), [])
+
+    def test_small(self):
+        builder = DawgBuilder()
+        for word, lemma_id, form_id in [("ab", 1, 2), ("ab", 1, 1),
+                                        ("abc", 1, 2), ("cb", 1, 2)]:
+            builder.add(word, lemma_id, form_id)
+        self.assertRaises(ValueError, builder.add, "aa", 1, 1)
+        builder.save(self.path)
+        with DawgReader(self.path) as dawg:
+            self.assertEqual(list(dawg.iter_prefix()), ["ab", "abc", "cb"])
+            self.assertEqual(dawg.payloads("ab"), [(1, 1), (1, 2)])
+            self.assertEqual(dawg.payloads("abc"), [(1, 2)])
+            self.assertEqual(dawg.payloads("cb"), [(1, 2)])
+            self.assertEqual(dawg.index("cb"), 2)
+            assert "a" not in dawg
+
+    def test_read_tsv(self):
+        lines = ["1\t5\ttalo\n", "\n", "2\t7\ttalon\n"]
+        self.assertEqual(list(read_tsv(lines)),
+                         [("talo", 1, 5), ("talon", 2, 7)])
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a dawg file at all, really")
+        self.assertRaises(ValueError, DawgReader, self.path)
@@ -0,0 +1,47 @@
+# Tests for parallel lexicon expansion
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+from wiktfinnish import inflect_paradigm
+from wiktfinnish.expand import lexeme_cost, cost_chunks, expand_lexicon
+from wiktfinnish.tests.lexicon import make_lexemes
+
+names = ("valo", "ja", "sanoa", "koira")
+lexemes = make_lexemes(*names, ids=names)
+
+options = {"no_poss": True, "no_clitic": True, "no_comp": True}
+
+
+class ExpandTests(unittest.TestCase):
+
+    def expected(self):
+        ret = []
+        for lexeme in lexemes:
+            for form, results in inflect_paradigm(lexeme["args"],
+                                                  lexeme.get("pos"),
+                                                  **options):
+                ret.append((lexeme["id"], form, results))
+        return ret
+
+    def test_cost(self):
+        assert lexeme_cost(lexemes[2]) > lexeme_cost(lexemes[0])
+        self.assertEqual(lexeme_cost(lexemes[1]), 1)
+
+    def test_chunks(self):
+        chunks = list(cost_chunks(lexemes, chunk_cost=100, **options))
+        self.assertEqual(sum(len(x) for x in chunks), len(lexemes))
+        self.assertEqual([x["id"] for chunk in chunks for x in chunk],
+                         [x["id"] for x in lexemes])
+        # Each chunk contains at least one lexeme, even if too expensive
+        chunks = list(cost_chunks(lexemes, chunk_cost=1))
+        self.assertEqual(len(chunks), len(lexemes))
+
+    def test_serial(self):
+        self.assertEqual(list(expand_lexicon(lexemes, jobs=1, **options)),
+                         self.expected())
+
+    def test_parallel(self):
+        ret = list(expand_lexicon(lexemes, jobs=2, chunk_cost=50,
+                                  max_pending=2, **options))
+        self.assertEqual(ret, self.expected())
@@ -0,0 +1,56 @@
+# Tests for factored output of paradigms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import unittest
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.factored import factor_paradigm, expand_factored
+from wiktfinnish.factored import write_factored, read_factored, expand_file
+from wiktfinnish.tests.lexicon import make_lexemes
+
+lexemes = make_lexemes("talo", "puna", "sanoa")
+
+
+class FactoredTests(unittest.TestCase):
+
+    def test_expand(self):
+        for lexeme in lexemes:
+            args = lexeme["args"]
+            pos = lexeme.get("pos")
+            factored = factor_paradigm(args, pos)
+            self.assertEqual(list(expand_factored(factored)),
+                             inflect_paradigm(args, pos))
+            self.assertLess(len(factored), len(inflect_paradigm(args, pos)))
+
+    def test_possessive_stems(self):
+        factored = dict((base[2], stems) for base, _, stems in
+                        factor_paradigm(lexemes[0]["args"]))
+        # The possessive stem is the same as the bare form
+        self.assertEqual(factored["ine-sg"],
+                         {"": [(["talossa"], "ine-sg", "")]})
+        self.assertEqual(factored["gen-sg"]["p"],
+                         [(["talo"], "gen-sg", "")])
+
+    def test_forms(self):
+        args = lexemes[0]["args"]
+        forms = [("", "", "cmt", "", ""), ("", "", "cmt", "1s", "kin"),
+                 ("", "", "ine-sg", "", "kO"), ("", "", "ine-sg", "3x", "")]
+        factored = factor_paradigm(args, forms=forms)
+        self.assertEqual([base for base, _, _ in factored],
+                         [("", "", "cmt", "", ""),
+                          ("", "", "ine-sg", "", "")])
+        self.assertEqual(list(expand_factored(factored)),
+                         inflect_paradigm(args, forms=forms))
+
+    def test_file(self):
+        f = io.StringIO()
+        self.assertEqual(write_factored(f, lexemes, no_comp=True), 3)
+        data = f.getvalue()
+        ids = [x[0] for x in read_factored(io.StringIO(data))]
+        self.assertEqual(ids, [1, 2, 3])
+        expected = [(lexeme["id"], form, results) for lexeme in lexemes
+                    for form, results in inflect_paradigm(lexeme["args"],
+                                                          lexeme.get("pos"),
+                                                          no_comp=True)]
+        self.assertEqual(list(expand_file(io.StringIO(data))), expected)
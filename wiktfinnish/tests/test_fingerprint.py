@@ -0,0 +1,75 @@
+# Tests for specification hashes and fingerprints
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+from wiktfinnish import nounspecs
+from wiktfinnish import fingerprint
+from wiktfinnish import spec_hash, spec_hashes, spec_fingerprint
+from wiktfinnish import changed_declensions, check_fingerprint
+
+
+class FingerprintTests(unittest.TestCase):
+
+    def test_hash(self):
+        h = spec_hash("fi-decl-valo")
+        assert isinstance(h, str)
+        self.assertEqual(h, spec_hash("fi-decl-valo"))
+        self.assertNotEqual(h, spec_hash("fi-decl-koira"))
+        self.assertEqual(spec_hash("fi-decl-kauneus"),
+                         spec_hash("fi-decl-kalleus"))
+        assert spec_hash("fi-decl-nonexistent") is None
+
+    def test_hashes(self):
+        hashes = spec_hashes()
+        assert "fi-decl-valo" in hashes
+        assert "fi-conj-sanoa" in hashes
+        assert "fi-decl-nuori" in hashes
+        self.assertEqual(changed_declensions(hashes), set())
+
+    def test_fingerprint(self):
+        fp = spec_fingerprint()
+        assert check_fingerprint(fp)
+        assert not check_fingerprint("0" * 16)
+
+    def test_changed(self):
+        old = spec_hashes()
+        decl = nounspecs.noun_decls["fi-decl-kala"]
+        saved = decl["gen-sg"]
+        try:
+            decl["gen-sg"] = "134nn"
+            fingerprint.spec_hash_cache.clear()
+            changed = changed_declensions(old)
+            tags = fingerprint.stale_tags(old)
+        finally:
+            decl["gen-sg"] = saved
+            fingerprint.spec_hash_cache.clear()
+        assert old["fi-decl-kala"] in tags
+        assert old["fi-decl-koira"] not in tags
+        assert "fi-decl-kala" in changed
+        assert "fi-decl-koira" not in changed
+        # Compound declensions that use fi-decl-kala also change
+        assert "fi-decl-koira-kala" in changed
+        self.assertEqual(changed_declensions(old), set())
+
+    def test_comparison_changes_conjugation(self):
+        # Comparatives of participles use fi-decl-vanhempi
+        old = spec_hashes()
+        decl = nounspecs.noun_decls["fi-decl-vanhempi"]
+        saved = decl["gen-sg"]
+        try:
+            decl["gen-sg"] = saved + "x"
+            fingerprint.spec_hash_cache.clear()
+            changed = changed_declensions(old)
+        finally:
+            decl["gen-sg"] = saved
+            fingerprint.spec_hash_cache.clear()
+        assert "fi-conj-sanoa" in changed
+
+    def test_dependencies(self):
+        deps = fingerprint.spec_dependencies("fi-conj-sanoa")
+        assert "fi-conj-sanoa" in deps
+        assert "fi-decl-kuollut" in deps
+        assert "fi-decl-vanhempi" in deps
+        assert "fi-decl-sisin" in deps
+        self.assertEqual(fingerprint.spec_dependencies("bogus"), [])
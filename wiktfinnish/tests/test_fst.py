@@ -0,0 +1,70 @@
+# Tests for exporting lexicons as finite-state transducers
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import unittest
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.fst import (build_export, iter_export, write_lexc,
+                             write_att, form_tags, lexeme_lemma)
+from wiktfinnish.tests.lexicon import make_lexemes
+
+lexemes = make_lexemes("talo", "palo", "hevonen", "risti", "muistaa",
+                       "haistaa")
+
+
+def att_pairs(text):
+    """Returns the set of (upper, lower) pairs accepted by a transducer in
+    the AT&T format (which must be acyclic)."""
+    arcs = {}
+    finals = set()
+    for line in text.splitlines():
+        parts = line.split("\t")
+        if len(parts) == 1:
+            finals.add(parts[0])
+            continue
+        arcs.setdefault(parts[0], []).append(parts[1:])
+    ret = set()
+    stack = [("0", "", "")]
+    while stack:
+        state, upper, lower = stack.pop()
+        if state in finals:
+            ret.add((upper, lower))
+        for dst, a, b in arcs.get(state, ()):
+            stack.append((dst, upper + a.replace("@0@", ""),
+                          lower + b.replace("@0@", "")))
+    return ret
+
+
+class FstTests(unittest.TestCase):
+
+    def test_export(self):
+        export = build_export(lexemes, no_comp=True)
+        # Words with the same paradigm and stem ending share a class
+        self.assertEqual(len(export.classes), 4)
+        expected = set()
+        for lexeme in lexemes:
+            lemma = lexeme_lemma(lexeme)
+            for form, results in inflect_paradigm(lexeme["args"],
+                                                  no_comp=True):
+                tags = "".join(form_tags(form))
+                expected.update((lemma + tags, x) for x in results)
+        self.assertEqual(set(iter_export(export)), expected)
+
+    def test_lexc(self):
+        export = build_export(lexemes[:2], no_poss=True, no_clitic=True)
+        f = io.StringIO()
+        write_lexc(f, export)
+        lines = f.getvalue().splitlines()
+        self.assertEqual(lines[0], "Multichar_Symbols")
+        assert "+gen-sg" in lines
+        assert "talo:tal decl-valo_0 ;" in lines
+        assert "palo:pal decl-valo_0 ;" in lines
+        assert "LEXICON decl-valo_0" in lines
+        assert any(x.startswith("+ine-pl:oissa ") for x in lines)
+
+    def test_att(self):
+        export = build_export(lexemes[2:4], no_clitic=True)
+        f = io.StringIO()
+        write_att(f, export)
+        self.assertEqual(att_pairs(f.getvalue()), set(iter_export(export)))
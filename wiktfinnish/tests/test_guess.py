@@ -0,0 +1,83 @@
+# Tests for guessing lemmas of unknown words
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+from wiktfinnish.formnames import form_id
+from wiktfinnish.inflect import inflect
+from wiktfinnish.stem import decode_paradigm
+from wiktfinnish.guess import Guesser
+from wiktfinnish.tests.lexicon import make_lexemes
+
+# Exception templates and internal declensions (se) are not used
+lexemes = make_lexemes("talo", "kukko", "risti", "sanoa", "se")
+
+
+class GuessTests(unittest.TestCase):
+
+    def setUp(self):
+        self.guesser = Guesser(lexemes, no_clitic=True)
+
+    def test_classes(self):
+        self.assertEqual(len(self.guesser), 4)
+        self.assertFalse(self.guesser.add({"template_name": "fi-decl",
+                                           "1s": "x"}))
+
+    def test_guess(self):
+        self.assertEqual(self.guesser.guess_lemmas("kalossa"),
+                         [("kalo", "kalo||a", "Nvalo",
+                           ("", "", "ine-sg", "", ""))])
+        guesses = self.guesser.guess_lemmas("pukon")
+        self.assertIn(("pukko", "pu|o|a", "NvaloGkk-k",
+                       ("", "", "gen-sg", "", "")), guesses)
+        self.assertIn(("kanoa", "kano||a", "Vsanoa",
+                       ("past-1pl", "", "", "", "")),
+                      self.guesser.guess_lemmas("kanoimme"))
+        self.assertEqual(self.guesser.guess_lemmas("xyz"), [])
+        self.assertEqual(self.guesser.guess_lemmas(""), [])
+
+    def test_verified(self):
+        for word in ("pistejä", "palloillamme", "kanoimme", "pukon"):
+            guesses = self.guesser.guess_lemmas(word)
+            assert guesses
+            for lemma, stem, code, form in guesses:
+                args = decode_paradigm(stem, code)
+                self.assertIn(word, inflect(args, form))
+
+    def test_prune(self):
+        fid = form_id(("", "", "gen-sg", "", ""))
+        candidates = {("pu|o|a", "NvaloGkk-k", "noun"): {fid: [1]},
+                      ("puk|o|a", "NvaloGk-", "noun"): {fid: [1]},
+                      ("|o|a", "NvaloGkk-k", "noun"): {fid: [1]}}
+        # k- gradation is blocked by kk-k and the empty stem is too short
+        self.assertEqual(self.guesser.prune(candidates),
+                         [("pu|o|a", "NvaloGkk-k", "noun", fid, [1])])
+
+    def test_stream(self):
+        words = ["kalossa", "xyz", "kalossa"]
+        results = list(self.guesser.guess_stream(words))
+        self.assertEqual([x[0] for x in results], words)
+        self.assertEqual(results[0][1], results[2][1])
+        self.assertEqual(self.guesser.cache.stats()["hits"], 1)
+
+    def test_infer(self):
+        observed = [(("", "", "", "", ""), "pukko"),
+                    (("", "", "gen-sg", "", ""), "pukon"),
+                    (("", "", "ptv-pl", "", ""), "pukkoja")]
+        self.assertEqual(self.guesser.infer_paradigm(observed),
+                         [("pu|o|a", "NvaloGkk-k")])
+        # The genitive alone is ambiguous
+        for verify in (True, False):
+            inferred = self.guesser.infer_paradigm(observed[1:2],
+                                                   verify=verify)
+            self.assertIn(("pu|o|a", "NvaloGkk-k"), inferred)
+            self.assertIn(("puko||a", "Nvalo"), inferred)
+        observed = [(("inf1", "", "", "", ""), "kanoa"),
+                    (("past-3sg", "", "", "", ""), "kanoi")]
+        self.assertEqual(self.guesser.infer_paradigm(observed),
+                         [("kano||a", "Vsanoa")])
+        # Forms that no candidate produces
+        self.assertEqual(self.guesser.infer_paradigm(
+            [(("", "", "", "", ""), "pukko"),
+             (("", "", "gen-sg", "", ""), "pukkan")]), [])
+        self.assertEqual(self.guesser.infer_paradigm([]), [])
@@ -0,0 +1,39 @@
+# Tests for exporting Hunspell dictionaries
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+from wiktfinnish.hunspell import write_hunspell, verify, AffixData
+from wiktfinnish.tests.lexicon import make_lexemes, TempDirTestCase
+
+lexemes = make_lexemes("talo", "palo", "hevonen", "muistaa")
+
+
+class HunspellTests(TempDirTestCase):
+    filename = "fi"
+
+    def test_write(self):
+        write_hunspell(lexemes, self.path, no_clitic=True)
+        with open(self.path + ".dic", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "4")
+        assert lines[1].startswith("tal/")
+        assert lines[1].endswith(" st:talo")
+        # The paradigm class is shared
+        self.assertEqual(lines[1].split()[0][3:], lines[2].split()[0][3:])
+        data = AffixData(self.path)
+        words = data.expand_lemma("talo")
+        assert "talo" in words
+        assert "taloissani" in words
+        assert "tal" not in words
+        assert "talonkin" not in words
+
+    def test_verify(self):
+        write_hunspell(lexemes, self.path, no_comp=True)
+        result = verify(self.path, lexemes, sample=3, no_comp=True)
+        self.assertEqual(result["lexemes"], 3)
+        self.assertEqual(result["missing"], [])
+        self.assertEqual(result["extra"], [])
+        self.assertEqual(result["coverage"], 1.0)
+        # Verifying with different options finds the differences
+        result = verify(self.path, lexemes[:1], no_comp=True, no_poss=True)
+        assert result["extra"]
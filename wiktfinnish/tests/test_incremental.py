@@ -0,0 +1,87 @@
+# Tests for building form stores and regenerating them incrementally
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+from wiktfinnish import nounspecs
+from wiktfinnish import fingerprint
+from wiktfinnish import inflect_paradigm
+from wiktfinnish.incremental import (build_store, incremental_build,
+                                     apply_delta, read_store)
+from wiktfinnish.tests.lexicon import WORDS, make_lexemes, TempDirTestCase
+
+lexemes = make_lexemes("valo", "kala", "korkea")
+
+options = {"no_poss": True, "no_clitic": True}
+
+
+class IncrementalTests(TempDirTestCase):
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def test_paradigm(self):
+        forms = dict(inflect_paradigm(lexemes[0]["args"], no_poss=True,
+                                      no_clitic=True))
+        self.assertEqual(forms[("", "", "ine-pl", "", "")], ["valoissa"])
+        assert ("", "comp", "", "", "") not in forms
+        forms = dict(inflect_paradigm(lexemes[2]["args"], "adj",
+                                      no_poss=True, no_clitic=True))
+        assert ("", "comp", "", "", "") in forms
+
+    def test_unchanged(self):
+        build_store(lexemes, self.path("old"), **options)
+        stats = incremental_build(lexemes, self.path("old"),
+                                  self.path("delta"), **options)
+        self.assertEqual(stats, {"unchanged": 3, "changed": 0,
+                                 "added": 0, "deleted": 0})
+
+    def test_args_changed(self):
+        build_store(lexemes, self.path("old"), **options)
+        new_lexemes = [lexemes[0],
+                       {"id": 2, "args": {"template_name": "fi-decl-kala",
+                                          "1": "hal", "4": "a"}},
+                       {"id": 4, "args": WORDS["koira"]}]
+        stats = incremental_build(new_lexemes, self.path("old"),
+                                  self.path("delta"), **options)
+        self.assertEqual(stats, {"unchanged": 1, "changed": 1,
+                                 "added": 1, "deleted": 1})
+        count = apply_delta(self.path("old"), self.path("delta"),
+                            self.path("new"))
+        self.assertEqual(count, 3)
+        header, records = read_store(self.path("new"))
+        records = {x["id"]: x for x in records}
+        self.assertEqual(list(sorted(records)), [1, 2, 4])
+        forms = {tuple(form): results
+                 for form, results in records[2]["forms"]}
+        self.assertEqual(forms[("", "", "", "", "")], ["hala"])
+
+    def test_spec_changed(self):
+        build_store(lexemes, self.path("old"), **options)
+        decl = nounspecs.noun_decls["fi-decl-kala"]
+        saved = decl["gen-sg"]
+        try:
+            decl["gen-sg"] = "134nn"
+            fingerprint.spec_hash_cache.clear()
+            stats = incremental_build(lexemes, self.path("old"),
+                                      self.path("delta"), **options)
+        finally:
+            decl["gen-sg"] = saved
+            fingerprint.spec_hash_cache.clear()
+        self.assertEqual(stats["changed"], 1)
+        self.assertEqual(stats["unchanged"], 2)
+        header, records = read_store(self.path("delta"))
+        records = list(records)
+        self.assertEqual(records[0]["id"], 2)
+
+    def test_options_changed(self):
+        build_store(lexemes, self.path("old"), **options)
+        stats = incremental_build(lexemes, self.path("old"),
+                                  self.path("delta"), no_poss=True,
+                                  no_clitic=True, no_case=True)
+        self.assertEqual(stats["changed"], 3)
+
+    def test_not_store(self):
+        with open(self.path("bad"), "w") as f:
+            f.write("foo\n")
+        self.assertRaises(ValueError, read_store, self.path("bad"))
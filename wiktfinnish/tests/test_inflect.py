@@ -4,6 +4,9 @@
 
 import unittest
 from wiktfinnish import inflect
+from wiktfinnish import nounspecs, verbspecs
+from wiktfinnish.inflect import process_template, apply_template
+from wiktfinnish.inflect import suffix_table, iter_inflect
 
 testcases = [
     ["fi-decl-valo", {"1": "val", "2": "", "3": "", "4": "o", "5": "a"},
@@ -556,6 +559,66 @@ class InflectTests(unittest.TestCase):
                     print(form, result, "GOT UNEXPECTED RESULT:", ret)
                     assert result in ret
 
+    def test_compiled_templates(self):
+        # Compiled templates must give the same results as
+        # process_template() for all templates and many kinds of stems.
+        stems = ["laati", "rosé", "SAK", "tyttö", "k", "x", "é", "", "(')",
+                 "vaa"]
+        argsets = [{"2": "", "3": "", "4": "o", "5": "a"},
+                   {"2": "kk", "3": "k", "4": "a"},
+                   {2: "t", "3": "d", "4": "ä", "par_sg_a": "a"},
+                   {"2": "k", "3": "", "4": "i", "5": "ä"},
+                   {"2": "ä"}]
+        templates = set()
+        for decls in (nounspecs.noun_decls, verbspecs.verb_conjs):
+            for decl in decls.values():
+                for k, v in decl.items():
+                    if isinstance(v, str):
+                        templates.add(v)
+                    elif isinstance(v, list):
+                        templates.update(v)
+        for clitic in ("kO", "kAAn", "pAhAn", "ks", "hAn"):
+            templates.add("1" + clitic)
+        for template in sorted(templates):
+            for stem in stems:
+                for args in argsets:
+                    args = args.copy()
+                    args["1"] = stem
+                    for vowel in ((None, "e") if "@" in template
+                                  else (None,)):
+                        self.assertEqual(
+                            apply_template(template, args, vowel),
+                            process_template(template, args, vowel))
+
+    def test_suffix_table(self):
+        args = {"1": "laati", "2": "kk", "3": "k", "4": "o", "5": "a"}
+        table = suffix_table("fi-decl-laatikko", args)
+        self.assertEqual(table["ade-sg"], ["kolla"])
+        self.assertEqual(table["ill-sg"], ["kkoon"])
+        # The same table is used for stems of the same class
+        args2 = args.copy()
+        args2["1"] = "mura"
+        self.assertEqual(suffix_table("fi-decl-laatikko", args2), table)
+        assert suffix_table("fi-decl-bogus", args) is None
+        # Templates depending on stem characters have no suffix
+        table = suffix_table("fi-decl-valo", {"1": "", "2": "", "3": "",
+                                              "4": "", "5": "a"})
+        self.assertEqual(table["hkO"], [None])
+
+    def test_iter_inflect(self):
+        args = {"template_name": "fi-decl-valo", "1": "tal", "2": "",
+                "3": "", "4": "o", "5": "a"}
+        form = ("", "", "ine-sg", "3x", "kOs")
+        ret = inflect(args, form)
+        self.assertEqual(list(iter_inflect(args, form)), ret)
+        self.assertEqual(list(iter_inflect(args, form, max_alternatives=1)),
+                         ret[:1])
+        self.assertEqual(list(iter_inflect(args, form, max_alternatives=0)),
+                         [])
+        args = {"template_name": "fi-decl-bogus"}
+        self.assertEqual(list(iter_inflect(args, form)), [])
+
+
 # XXX test comparatives / superlatives:
 # hienoin, hauskin
 # suurin, kiltein, kaunein
@@ -0,0 +1,69 @@
+# Tests for reading wiktextract dumps
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import json
+import tempfile
+import unittest
+from wiktfinnish.ingest import read_lexemes, iter_matching_lines
+
+entries = [
+    {"word": "talo", "pos": "noun", "lang_code": "fi",
+     "inflection_templates": [
+         {"name": "fi-decl-valo",
+          "args": {"1": "tal", "2": "", "3": "", "4": "o", "5": "a"}}]},
+    {"word": "house", "pos": "noun", "lang_code": "en"},
+    {"word": "talo", "pos": "verb", "lang_code": "sv",
+     "inflection_templates": [{"name": "fi-decl-valo", "args": {}}]},
+    {"word": "sanoa", "pos": "verb", "lang": "Finnish",
+     "conjugation": [{"template_name": "fi-conj-sanoa", "1": "sa",
+                      "4": "no", "5": "a"}]},
+    {"word": "talo", "pos": "noun", "lang_code": "fi",
+     "inflection_templates": [
+         {"name": "fi-decl-valo",
+          "args": {"1": "tal", "2": "", "3": "", "4": "o", "5": "a"}},
+         {"name": "en-noun", "args": {}}]},
+]
+
+
+def dump():
+    return "".join(json.dumps(x, ensure_ascii=False) + "\n"
+                   for x in entries).encode("utf-8") + b'{"fi-decl"'
+
+
+class IngestTests(unittest.TestCase):
+
+    def check(self, lexemes):
+        self.assertEqual([x["id"] for x in lexemes],
+                         ["talo:noun:0", "sanoa:verb:0", "talo:noun:1"])
+        self.assertEqual(lexemes[0]["args"],
+                         {"template_name": "fi-decl-valo", "1": "tal",
+                          "2": "", "3": "", "4": "o", "5": "a"})
+        self.assertEqual(lexemes[1]["args"]["template_name"],
+                         "fi-conj-sanoa")
+        self.assertEqual(lexemes[1]["pos"], "verb")
+
+    def test_lines(self):
+        lines = list(iter_matching_lines(dump()))
+        self.assertEqual(len(lines), 5)
+        assert all(not x.endswith(b"\n") for x in lines)
+
+    def test_bytes(self):
+        self.check(list(read_lexemes(dump())))
+
+    def test_file_object(self):
+        self.check(list(read_lexemes(io.BytesIO(dump()))))
+
+    def test_mmap(self):
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dump())
+            self.check(list(read_lexemes(path)))
+            with open(path, "wb") as f:
+                pass
+            self.assertEqual(list(read_lexemes(path)), [])
+        finally:
+            os.remove(path)
@@ -0,0 +1,127 @@
+# Tests for the HTTP inflection service
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import json
+import threading
+import unittest
+import http.client
+import urllib.error
+import urllib.request
+import concurrent.futures
+from wiktfinnish.inflect import inflect
+from wiktfinnish.server import InflectionServer
+
+valo = {"template_name": "fi-decl-valo", "1": "tal", "2": "", "3": "",
+        "4": "o", "5": "a"}
+sanoa = {"template_name": "fi-conj-sanoa", "1": "sa", "2": "", "3": "",
+         "4": "no", "5": "a"}
+
+
+class ServerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = InflectionServer(("127.0.0.1", 0), max_delay=0.01)
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+        cls.server.server_close()
+
+    def post(self, path, data):
+        req = urllib.request.Request(self.url + path,
+                                     json.dumps(data).encode("utf-8"),
+                                     {"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as f:
+            return json.loads(f.read().decode("utf-8"))
+
+    def test_inflect(self):
+        self.assertEqual(self.post("/inflect", {"args": valo,
+                                                "form": "ine-pl+1s"}),
+                         {"results": ["taloissani"]})
+        self.assertEqual(self.post("/inflect", {"args": sanoa,
+                                                "form": ["pres-1sg", "", "",
+                                                         "", ""]}),
+                         {"results": ["sanon"]})
+
+    def test_concurrent(self):
+        cases = ["nom-pl", "gen-sg", "gen-pl", "ptv-sg", "ptv-pl",
+                 "ine-sg", "ine-pl", "ill-sg", "ill-pl", "ess-sg"]
+        with concurrent.futures.ThreadPoolExecutor(10) as executor:
+            results = list(executor.map(
+                lambda x: self.post("/inflect", {"args": valo,
+                                                 "form": x + "+kin"}),
+                cases))
+        for case, ret in zip(cases, results):
+            self.assertEqual(ret["results"],
+                             inflect(valo, ("", "", case, "", "kin")))
+        stats = json.loads(urllib.request.urlopen(self.url + "/stats")
+                           .read().decode("utf-8"))
+        self.assertGreater(stats["batches"], 0)
+        self.assertGreaterEqual(stats["requests"]["/inflect"], 10)
+
+    def test_inflect_many(self):
+        ret = self.post("/inflect_many", {"requests": [
+            {"args": valo, "form": "gen-sg"},
+            {"args": sanoa, "form": "pres-1sg"},
+            {"args": valo, "form": "gen-sg"}]})
+        self.assertEqual(ret, {"results": [["talon"], ["sanon"], ["talon"]]})
+
+    def test_paradigm(self):
+        ret = self.post("/paradigm", {"args": valo, "options": {
+            "forms": ["gen-sg", "ptv-pl"]}})
+        self.assertEqual(ret, {"forms": [["gen-sg", ["talon"]],
+                                         ["ptv-pl", ["taloja"]]]})
+
+    def test_encode_decode(self):
+        ret = self.post("/encode", {"args": valo})
+        self.assertEqual(ret, {"stem": "talo||a", "paradigm": "Nvalo"})
+        ret = self.post("/decode", ret)
+        self.assertEqual(inflect(ret["args"], ("", "", "gen-sg", "", "")),
+                         ["talon"])
+
+    def test_errors(self):
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self.post("/inflect", {"args": valo, "form": "foo"})
+        self.assertEqual(cm.exception.code, 400)
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self.post("/foo", {})
+        self.assertEqual(cm.exception.code, 404)
+
+    def test_content_length(self):
+        for length in ("abc", "-1"):
+            conn = http.client.HTTPConnection(*self.server.server_address,
+                                              timeout=5)
+            conn.putrequest("POST", "/inflect")
+            conn.putheader("Content-Length", length)
+            conn.endheaders()
+            resp = conn.getresponse()
+            self.assertEqual(resp.status, 400)
+            self.assertEqual(json.loads(resp.read().decode("utf-8")),
+                             {"error": "invalid Content-Length"})
+            conn.close()
+
+    def test_invalid_in_batch(self):
+        # An invalid request must not fail the others in its micro-batch
+        bad = {"template_name": 5}
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            self.post("/inflect", {"args": valo,
+                                   "form": ["bogus", "", "", "", ""]})
+        self.assertEqual(cm.exception.code, 400)
+
+        def post(args):
+            try:
+                return self.post("/inflect", {"args": args,
+                                              "form": "ela-pl"})
+            except urllib.error.HTTPError as e:
+                return e.code
+        with concurrent.futures.ThreadPoolExecutor(3) as executor:
+            results = list(executor.map(post, [valo, bad, valo]))
+        self.assertEqual(results[0], {"results": ["taloista"]})
+        self.assertEqual(results[2], results[0])
+        self.assertEqual(results[1], 500)
@@ -0,0 +1,59 @@
+# Tests for generating forms into sinks
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import unittest
+from wiktfinnish.formnames import form_id, form_from_id, all_forms_list
+from wiktfinnish.formnames import NUM_FORM_IDS
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.sink import generate_lexicon, generate_paradigm, BufferSink
+from wiktfinnish.tests.lexicon import make_lexemes
+
+lexemes = make_lexemes("talo", "sanoa")
+
+
+class ListSink(object):
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, lemma_id, fid, surface):
+        self.rows.append((lemma_id, fid, surface))
+
+
+class SinkTests(unittest.TestCase):
+
+    def test_form_id(self):
+        ids = set()
+        for pos in ("noun", "adj", "verb"):
+            for form in all_forms_list(pos):
+                fid = form_id(form)
+                assert 0 <= fid < NUM_FORM_IDS
+                self.assertEqual(form_from_id(fid), form)
+                ids.add(fid)
+        self.assertEqual(form_id(("", "", "", "", "")), 0)
+        self.assertRaises(ValueError, form_id, ("", "", "foo", "", ""))
+        self.assertRaises(ValueError, form_from_id, NUM_FORM_IDS)
+
+    def test_generate(self):
+        sink = ListSink()
+        count = generate_lexicon(sink, lexemes, no_clitic=True)
+        expected = []
+        for lexeme in lexemes:
+            for form, results in inflect_paradigm(lexeme["args"],
+                                                  no_clitic=True):
+                expected.extend((lexeme["id"], form_id(form), x)
+                                for x in results)
+        self.assertEqual(sink.rows, expected)
+        self.assertEqual(count, len(expected))
+
+    def test_buffer_sink(self):
+        f = io.BytesIO()
+        forms = [("", "", "gen-sg", "", ""), ("", "", "ine-sg", "3x", "")]
+        with BufferSink(f, buffer_size=20, form_names=True) as sink:
+            generate_paradigm(sink, "talo", lexemes[0]["args"], forms=forms)
+        self.assertEqual(f.getvalue().decode("utf-8"),
+                         "talo\tgen-sg\ttalon\n"
+                         "talo\tine-sg+3x\ttalossaan\n"
+                         "talo\tine-sg+3x\ttalossansa\n")
@@ -0,0 +1,115 @@
+# Tests for the SQLite-backed form store
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import json
+from wiktfinnish import verbspecs
+from wiktfinnish import fingerprint
+from wiktfinnish.inflect import inflect, inflect_paradigm
+from wiktfinnish.sqlitestore import FormStore, CachedInflector
+from wiktfinnish.tests.lexicon import make_lexemes, TempDirTestCase
+
+lexemes = make_lexemes("talo", "sanoa")
+
+
+class FormStoreTests(TempDirTestCase):
+    filename = "forms.db"
+
+    def test_store(self):
+        with FormStore(self.path, no_clitic=True) as store:
+            rows = store.add_lexicon(lexemes, batch_size=1000)
+            self.assertEqual(rows, store.num_forms())
+            for lexeme in lexemes:
+                for form, results in inflect_paradigm(lexeme["args"],
+                                                      no_clitic=True)[::40]:
+                    self.assertEqual(store.lookup(lexeme["id"], form),
+                                     results)
+            self.assertEqual(store.analyze("talon"),
+                             [(1, "Nvalo", ("", "", "gen-sg", "", ""))])
+            self.assertEqual(store.analyze("foo"), [])
+            self.assertEqual(store.lemma_args(2),
+                             (lexemes[1]["args"], "verb"))
+            # Adding a lemma again replaces its forms
+            store.add_lexicon(lexemes[:1])
+            self.assertEqual(rows, store.num_forms())
+        with FormStore(self.path) as store:
+            assert not store.stale
+            self.assertEqual(store.lookup(1, ("", "", "ine-sg", "", "")),
+                             ["talossa"])
+
+    def test_cache(self):
+        with FormStore(self.path) as store:
+            cache = CachedInflector(store)
+            args = lexemes[0]["args"]
+            form = ("", "", "ine-pl", "1s", "")
+            self.assertEqual(cache.inflect(args, form), inflect(args, form))
+            self.assertEqual(cache.inflect(args, form), inflect(args, form))
+            self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+            other = {"template_name": "fi-conj-sanoa", "1": "sa",
+                     "4": "no", "5": "a"}
+            cache.inflect(other, ("pres-1sg", "", "", "", ""))
+        # Only the results of changed declensions are discarded
+        with FormStore(self.path) as store:
+            hashes = json.loads(store.get_meta("cache_hashes"))
+            hashes["fi-decl-valo"] = "x"
+            store.conn.execute("UPDATE cache SET spec_tag = 'x' WHERE "
+                               "spec_tag = ?",
+                               (fingerprint.spec_hash("fi-decl-valo"),))
+            store.set_meta("cache_hashes", json.dumps(hashes))
+            store.conn.commit()
+        with FormStore(self.path) as store:
+            self.assertEqual(store.conn.execute(
+                "SELECT COUNT(*) FROM cache").fetchone()[0], 1)
+            cache = CachedInflector(store)
+            cache.inflect(args, form)
+            cache.inflect(other, ("pres-1sg", "", "", "", ""))
+            self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_stale(self):
+        with FormStore(self.path, no_clitic=True) as store:
+            assert not store.stale
+            rows = store.add_lexicon(lexemes)
+            store.conn.execute("UPDATE lemmas SET forms_hash = 'x'")
+            store.conn.commit()
+        # The store stays stale until the forms are regenerated
+        for i in range(2):
+            with FormStore(self.path) as store:
+                assert store.stale
+                self.assertEqual(store.stale_lemmas(), [1, 2])
+                self.assertEqual(store.num_forms(), rows)
+        with FormStore(self.path) as store:
+            store.add_lexicon(lexemes)
+            assert not store.stale
+        with FormStore(self.path) as store:
+            assert not store.stale
+            self.assertEqual(store.options, {"no_clitic": True})
+        # Other options make the store stale without replacing the saved
+        # options
+        with FormStore(self.path, no_poss=True) as store:
+            assert store.stale
+        with FormStore(self.path) as store:
+            assert not store.stale
+            self.assertEqual(store.options, {"no_clitic": True})
+
+    def test_stale_declension(self):
+        with FormStore(self.path, no_clitic=True) as store:
+            store.add_lexicon(lexemes)
+        conj = verbspecs.verb_conjs["fi-conj-sanoa"]
+        saved = conj["pres-1sg"]
+        try:
+            conj["pres-1sg"] = "134m"
+            fingerprint.spec_hash_cache.clear()
+            # Reloading other lemmas does not make the verb current
+            with FormStore(self.path) as store:
+                self.assertEqual(store.stale_lemmas(), [2])
+                with store.writer() as writer:
+                    writer.add(1, lexemes[0]["args"])
+                assert store.stale
+            with FormStore(self.path) as store:
+                self.assertEqual(store.stale_lemmas(), [2])
+                with store.writer() as writer:
+                    writer.add(2, lexemes[1]["args"])
+                assert not store.stale
+        finally:
+            conj["pres-1sg"] = saved
+            fingerprint.spec_hash_cache.clear()
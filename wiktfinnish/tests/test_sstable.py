@@ -0,0 +1,66 @@
+# Tests for the sorted on-disk form table
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+from wiktfinnish.formnames import form_id
+from wiktfinnish.inflect import inflect_paradigm
+from wiktfinnish.sstable import (SSTableBuilder, SSTableReader,
+                                 build_sstable)
+from wiktfinnish.tests.lexicon import make_lexemes, TempDirTestCase
+
+lexemes = make_lexemes("talo", "sanoa", ids=(1, 5))
+
+
+class SSTableTests(TempDirTestCase):
+    filename = "forms.sst"
+
+    def test_lexicon(self):
+        count = build_sstable(lexemes, self.path, block_size=512,
+                              no_clitic=True)
+        expected = []
+        for lexeme in lexemes:
+            for form, results in inflect_paradigm(lexeme["args"],
+                                                  no_clitic=True):
+                expected.append((lexeme["id"], form_id(form), results))
+        expected.sort()
+        self.assertEqual(count, len(expected))
+        with SSTableReader(self.path) as table:
+            assert table.num_blocks > 10
+            assert table.check_fingerprint()
+            self.assertEqual(table.changed_declensions(), set())
+            self.assertEqual(table.header["options"], {"no_clitic": True})
+            self.assertEqual(len(table), len(expected))
+            self.assertEqual(list(table.scan()), expected)
+            for lemma_id, fid, results in expected[::50]:
+                self.assertEqual(table.lookup(lemma_id, fid), results)
+            self.assertEqual(table.lookup(1, form_id(("", "", "gen-sg",
+                                                      "", ""))), ["talon"])
+            self.assertEqual(table.lookup(0, 0), None)
+            self.assertEqual(table.lookup(3, 0), None)
+            self.assertEqual(table.lookup(9, 0), None)
+            self.assertEqual(table.lemma_forms(1),
+                             [x[1:] for x in expected if x[0] == 1])
+            self.assertEqual(list(table.scan((5, 0), (5, 0))), [])
+
+    def test_order(self):
+        with SSTableBuilder(self.path) as builder:
+            builder.add(1, 2, ["a"])
+            self.assertRaises(ValueError, builder.add, 1, 2, ["b"])
+            self.assertRaises(ValueError, builder.add, 0, 5, ["b"])
+            builder.add(1, 3, ["äb", "äc"])
+        with SSTableReader(self.path) as table:
+            self.assertEqual(list(table.scan()),
+                             [(1, 2, ["a"]), (1, 3, ["äb", "äc"])])
+
+    def test_abort(self):
+        with self.assertRaises(ValueError):
+            with SSTableBuilder(self.path) as builder:
+                builder.add(1, 2, ["a"])
+                builder.add(1, 1, ["b"])
+        assert not os.path.exists(self.path)
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not an sstable, just some bytes in a file")
+        self.assertRaises(ValueError, SSTableReader, self.path)
@@ -0,0 +1,46 @@
+# Tests for using the module from multiple threads
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+import concurrent.futures
+from wiktfinnish import formnames
+from wiktfinnish.inflect import inflect_paradigm, first_undefined
+from wiktfinnish.inflect import stem_class_cache, template_info_cache
+from wiktfinnish.inflect import compiled_template_cache
+
+words = [
+    {"template_name": "fi-decl-valo", "1": "tal", "2": "", "3": "",
+     "4": "o", "5": "a"},
+    {"template_name": "fi-decl-koira", "1": "koir", "4": "a"},
+    {"template_name": "fi-decl-risti", "1": "rist", "4": "ä"},
+    {"template_name": "fi-decl-nainen", "1": "nai", "2": "a"},
+    {"template_name": "fi-conj-sanoa", "1": "sa", "2": "", "3": "",
+     "4": "no", "5": "a"},
+]
+
+
+def clear_caches():
+    formnames.all_forms_cache.clear()
+    stem_class_cache.clear()
+    template_info_cache.clear()
+    compiled_template_cache.clear()
+
+
+class ThreadTests(unittest.TestCase):
+
+    def test_threads(self):
+        options = {"no_poss": True, "no_clitic": True}
+        expected = [inflect_paradigm(args, **options) for args in words]
+        clear_caches()
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            futures = [executor.submit(inflect_paradigm, words[i % 5],
+                                       **options) for i in range(40)]
+            for i, future in enumerate(futures):
+                self.assertEqual(future.result(), expected[i % 5])
+
+    def test_undefined(self):
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            flags = list(executor.map(first_undefined,
+                                      ["fi-decl-undefined-test"] * 16))
+        self.assertEqual(flags.count(True), 1)
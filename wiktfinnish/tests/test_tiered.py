@@ -0,0 +1,103 @@
+# Tests for the tiered cache of generated forms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import json
+import sqlite3
+from wiktfinnish.inflect import inflect, inflect_paradigm
+from wiktfinnish.sstable import build_sstable, SSTableReader
+from wiktfinnish.tiered import (TieredCache, MemoryTier, SQLiteTier,
+                                SSTableTier, form_key, paradigm_key)
+from wiktfinnish.tests.lexicon import WORDS, make_lexemes, TempDirTestCase
+
+lexemes = make_lexemes("talo", "sanoa")
+
+other = WORDS["koira"]
+
+form = ("", "", "ine-pl", "1s", "")
+
+
+class TieredCacheTests(TempDirTestCase):
+    filename = "cache.db"
+
+    def test_keys(self):
+        args = dict(reversed(list(lexemes[0]["args"].items())))
+        self.assertEqual(form_key(args, form),
+                         form_key(lexemes[0]["args"], list(form)))
+        self.assertEqual(paradigm_key(args, None, {"no_clitic": True}),
+                         paradigm_key(lexemes[0]["args"], "noun",
+                                      {"no_clitic": True}))
+        self.assertNotEqual(paradigm_key(args, None, {}),
+                            paradigm_key(args, None, {"no_clitic": True}))
+
+    def test_memory_sqlite(self):
+        sqlite = SQLiteTier(self.path)
+        cache = TieredCache([MemoryTier(), sqlite])
+        args = lexemes[0]["args"]
+        self.assertEqual(cache.inflect(args, form), inflect(args, form))
+        self.assertEqual(cache.inflect(args, form), inflect(args, form))
+        stats = cache.stats()
+        self.assertEqual(stats["computed"], 1)
+        self.assertEqual(stats["memory"]["hits"], 1)
+        self.assertEqual(stats["sqlite"]["misses"], 1)
+        sqlite.close()
+
+        # A new process finds the value in the persistent tier and
+        # promotes it into memory
+        sqlite = SQLiteTier(self.path)
+        cache = TieredCache([MemoryTier(), sqlite])
+        for i in range(2):
+            self.assertEqual(cache.inflect(args, form), inflect(args, form))
+            paradigm = cache.inflect_paradigm(args, no_clitic=True)
+        self.assertEqual(paradigm, inflect_paradigm(args, no_clitic=True))
+        stats = cache.stats()
+        self.assertEqual(stats["computed"], 1)
+        self.assertEqual(stats["sqlite"]["hits"], 1)
+        self.assertEqual(stats["memory"]["hits"], 2)
+        sqlite.close()
+
+        # Entries of declensions that have changed are discarded
+        conn = sqlite3.connect(self.path)
+        row = conn.execute("SELECT value FROM meta").fetchone()
+        hashes = json.loads(row[0])
+        tag = hashes["fi-decl-valo"]
+        hashes["fi-decl-valo"] = "x"
+        with conn:
+            conn.execute("UPDATE meta SET value = ?", (json.dumps(hashes),))
+            conn.execute("UPDATE entries SET spec_tag = 'x' "
+                         "WHERE spec_tag = ?", (tag,))
+        conn.close()
+        sqlite = SQLiteTier(self.path)
+        cache = TieredCache([sqlite])
+        self.assertEqual(cache.inflect(args, form), inflect(args, form))
+        self.assertEqual(cache.stats()["sqlite"],
+                         {"hits": 0, "misses": 1, "stale": 2})
+        sqlite.close()
+
+    def test_sstable(self):
+        table = os.path.join(self.tmpdir, "forms.sst")
+        build_sstable(lexemes, table, no_clitic=True)
+        with SSTableReader(table) as reader:
+            memory = MemoryTier()
+            cache = TieredCache([memory, SSTableTier(reader, lexemes)])
+            args = lexemes[1]["args"]
+            self.assertEqual(cache.inflect_paradigm(args, no_clitic=True),
+                             inflect_paradigm(args, no_clitic=True))
+            self.assertEqual(cache.inflect(args, form), [])
+            self.assertEqual(cache.inflect(other, form), inflect(other, form))
+            # Paradigms with other options are computed
+            cache.inflect_paradigm(args, no_comp=True)
+            stats = cache.stats()
+            self.assertEqual(stats["sstable"], {"hits": 1, "misses": 3})
+            self.assertEqual(stats["computed"], 3)
+            # The paradigm was promoted into memory
+            self.assertEqual(memory.get(paradigm_key(args, None,
+                                                     {"no_clitic": True})),
+                             inflect_paradigm(args, no_clitic=True))
+            # Words of declensions that have changed are not used
+            reader.header["hashes"]["fi-conj-sanoa"] = "x"
+            tier = SSTableTier(reader, lexemes)
+            self.assertEqual(tier.get(form_key(args, form)), None)
+            self.assertEqual(tier.get(form_key(lexemes[0]["args"], form)),
+                             inflect(lexemes[0]["args"], form))
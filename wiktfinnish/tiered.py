@@ -0,0 +1,221 @@
+# Tiered caching of generated forms: an in-process LRU cache in front of
+# persistent stores in front of computing the forms.  TieredCache looks up
+# a key in each tier in turn; on a hit, the value is promoted into the
+# writable tiers before it, and on a miss in all tiers it is computed and
+# saved in all writable tiers.  Each tier keeps its own hit/miss
+# statistics.
+#
+# Keys are derived canonically from the lexeme arguments (see
+# fingerprint.args_hash()) and the form id (see formnames.form_id()):
+#
+#   ("form", args_hash, form_id, spec_tag)
+#   ("paradigm", args_hash, pos, options, spec_tag)
+#
+# where options is the JSON encoding of the keyword arguments of
+# inflect_paradigm() and spec_tag is the hash of the declension (see
+# fingerprint.spec_tag()), so that values computed with other
+# specifications are never found.  SQLiteTier discards the entries of
+# declensions that have changed when it is opened, and SSTableTier does
+# not use the words of declensions that have changed since the table was
+# built.
+#
+#   cache = TieredCache([MemoryTier(), SSTableTier(reader, lexemes),
+#                        SQLiteTier("cache.db")])
+#   results = cache.inflect(args, form)
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import json
+import sqlite3
+import threading
+from wiktfinnish import formnames
+from wiktfinnish import fingerprint
+from wiktfinnish.inflect import inflect, inflect_paradigm, paradigm_pos
+from wiktfinnish.memo import ParadigmMemo, options_key
+from wiktfinnish.sqlitestore import delete_tags
+
+
+def form_key(args, form):
+    """Returns the cache key for ``form`` of the word ``args``."""
+    return ("form", fingerprint.args_hash(args), formnames.form_id(form),
+            fingerprint.spec_tag(args["template_name"]))
+
+
+def paradigm_key(args, pos, options):
+    """Returns the cache key for the paradigm generated by
+    inflect_paradigm(args, pos, **options)."""
+    return ("paradigm", fingerprint.args_hash(args), paradigm_pos(args, pos),
+            options_key(options), fingerprint.spec_tag(args["template_name"]))
+
+
+class MemoryTier(ParadigmMemo):
+    """In-process least-recently-used tier.  The size of the tier is
+    bounded by the total number of forms (or results of single forms) in
+    it."""
+    name = "memory"
+    writable = True
+
+
+class SQLiteTier(object):
+    """Persistent tier in the SQLite database ``path``.  Each entry is
+    saved with the spec_tag of its key, and the entries of declensions
+    whose specifications have changed since the database was last opened
+    are deleted (``stale`` in the statistics)."""
+    name = "sqlite"
+    writable = True
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta ("
+                          "key TEXT PRIMARY KEY, "
+                          "value TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                          "key TEXT PRIMARY KEY, "
+                          "spec_tag TEXT NOT NULL, "
+                          "value TEXT NOT NULL)")
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        row = self.conn.execute("SELECT value FROM meta "
+                                "WHERE key = 'hashes'").fetchone()
+        hashes = json.dumps(fingerprint.spec_hashes(), sort_keys=True)
+        if row is None or row[0] != hashes:
+            with self.conn:
+                if row is not None:
+                    self.stale = delete_tags(
+                        self.conn, "entries",
+                        fingerprint.stale_tags(json.loads(row[0])))
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) "
+                                  "VALUES ('hashes', ?)", (hashes,))
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM entries "
+                                    "WHERE key = ?",
+                                    (json.dumps(key),)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        value = json.loads(row[0])
+        if key[0] == "paradigm":
+            value = [(tuple(form), results) for form, results in value]
+        return value
+
+    def put(self, key, value):
+        data = json.dumps(value, ensure_ascii=False)
+        with self.lock:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO entries "
+                                  "(key, spec_tag, value) "
+                                  "VALUES (?, ?, ?)",
+                                  (json.dumps(key), key[-1], data))
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "stale": self.stale}
+
+    def close(self):
+        self.conn.close()
+
+
+class SSTableTier(object):
+    """Read-only tier backed by a memory-mapped SSTable (see sstable.py)
+    of the lexemes in ``lexemes`` (dictionaries with "id", "args" and
+    optionally "pos", as used for building the table).  Lookups of words
+    whose declension has changed since the table was built miss."""
+    name = "sstable"
+    writable = False
+
+    def __init__(self, reader, lexemes):
+        self.reader = reader
+        self.lemma_ids = {}
+        changed = reader.changed_declensions()
+        for lexeme in lexemes:
+            args = lexeme["args"]
+            if args["template_name"] in changed:
+                continue
+            self.lemma_ids[fingerprint.args_hash(args)] = (
+                lexeme["id"], paradigm_pos(args, lexeme.get("pos")))
+        self.options = options_key(reader.header["options"])
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = None
+        lemma = self.lemma_ids.get(key[1])
+        if lemma is not None:
+            lemma_id, pos = lemma
+            if key[0] == "form":
+                value = self.reader.lookup(lemma_id, key[2])
+            elif key[2] == pos and key[3] == self.options:
+                found = dict(self.reader.lemma_forms(lemma_id))
+                options = json.loads(key[3])
+                value = []
+                for form in formnames.all_forms_list(pos, **options):
+                    results = found.get(formnames.form_id(form))
+                    if results:
+                        value.append((form, results))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        raise TypeError("SSTableTier is read-only")
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class TieredCache(object):
+    """Cache of inflect() and inflect_paradigm() results in ``tiers``
+    (fastest first).  Values found in a tier are promoted into the
+    writable tiers before it; computed values are saved in all writable
+    tiers."""
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self.computed = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Returns the value for ``key``, calling ``compute()`` if it is
+        not in any tier."""
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for before in self.tiers[:i]:
+                    if before.writable:
+                        before.put(key, value)
+                return value
+        value = compute()
+        with self.lock:
+            self.computed += 1
+        for tier in self.tiers:
+            if tier.writable:
+                tier.put(key, value)
+        return value
+
+    def inflect(self, args, form):
+        """Returns inflect(args, form), using the cache."""
+        return list(self.get(form_key(args, form),
+                             lambda: inflect(args, form)))
+
+    def inflect_paradigm(self, args, pos=None, **kwargs):
+        """Returns inflect_paradigm(args, pos, **kwargs), using the
+        cache."""
+        return self.get(paradigm_key(args, pos, kwargs),
+                        lambda: inflect_paradigm(args, pos, **kwargs))
+
+    def stats(self):
+        """Returns a dictionary of statistics for each tier (by name) and
+        the number of computed values."""
+        ret = {tier.name: tier.stats() for tier in self.tiers}
+        with self.lock:
+            ret["computed"] = self.computed
+        return ret